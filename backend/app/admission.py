@@ -0,0 +1,277 @@
+"""Cost-aware admission control and load shedding for API requests.
+
+Every ``/api`` request is assigned a query class from the filters it carries,
+before any worker thread or database connection is spent on it:
+
+- ``heavy``: scans most of the table. Location searches with no ``city_id``,
+  no ``limit`` and no (or a radius above ``ADMISSION_HEAVY_RADIUS_KM``)
+  ``max_distance``, unpaged listings with no ``city_id``, batch nearest
+  searches and bulk loads
+- ``search``: every other contractor search or listing
+- ``light``: lookups by id, cities, specialties and single creates
+
+Each class has its own concurrency limit (``ADMISSION_<CLASS>_LIMIT``) and a
+bounded FIFO wait queue (``ADMISSION_<CLASS>_QUEUE``), so a burst of heavy
+searches queues behind itself and never starves cheap requests. A request
+that finds its queue full, or waits longer than ``ADMISSION_QUEUE_TIMEOUT``
+seconds, is shed immediately with ``503`` and a ``Retry-After`` header rather
+than piling up behind the database. Queue times and rejections are exported
+per class at ``/metrics``, and live limiter state is shown by ``GET /health``
+and ``GET /pool/stats``.
+Set ``ADMISSION_ENABLED=false`` to admit everything.
+"""
+
+import asyncio
+import math
+import os
+from collections import deque
+from enum import Enum
+from urllib.parse import parse_qs
+
+import orjson
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.env import env_flag
+from app.metrics import METRICS_ENABLED, Counter, Histogram, registry
+
+ADMISSION_ENABLED = env_flag("ADMISSION_ENABLED", default=True)
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "1.0"))
+RETRY_AFTER = float(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+# Radius searches without a city above this radius are priced as full scans
+HEAVY_RADIUS_KM = float(os.getenv("ADMISSION_HEAVY_RADIUS_KM", "50"))
+
+ADMISSION_QUEUE_TIME = registry.register(
+    Histogram(
+        "admission_queue_seconds",
+        "Time admitted requests waited for a concurrency slot.",
+        ("query_class",),
+    )
+)
+ADMISSION_REJECTED = registry.register(
+    Counter(
+        "admission_rejected",
+        "Requests shed by admission control.",
+        ("query_class", "reason"),
+    )
+)
+
+SHED_BODY = orjson.dumps({"detail": "Server is busy, retry later"})
+
+
+class QueryClass(str, Enum):
+    """Admission classes, by estimated cost."""
+
+    LIGHT = "light"
+    SEARCH = "search"
+    HEAVY = "heavy"
+
+
+# (concurrency limit, queue size) per class
+DEFAULT_LIMITS = {
+    QueryClass.LIGHT: (32, 128),
+    QueryClass.SEARCH: (16, 64),
+    QueryClass.HEAVY: (4, 8),
+}
+
+
+def _float(values: list[str] | None) -> float | None:
+    try:
+        return float(values[0]) if values else None
+    except ValueError:
+        return None
+
+
+def _positive_int(values: list[str] | None) -> bool:
+    try:
+        return bool(values) and int(values[0]) > 0
+    except ValueError:
+        return False
+
+
+def classify(method: str, path: str, query_string: bytes = b"") -> QueryClass | None:
+    """
+    Estimate the cost class of a request from its route and filters.
+
+    Returns:
+        The request's class, or ``None`` for requests outside ``/api``
+        (health, readiness and metrics), which are never queued
+    """
+    if not path.startswith("/api/"):
+        return None
+    if method == "POST" and path in ("/api/contractors/nearest", "/api/contractors/bulk"):
+        return QueryClass.HEAVY
+    if method != "GET" or path.rstrip("/") != "/api/contractors":
+        return QueryClass.LIGHT
+
+    params = parse_qs(query_string.decode("latin-1"))
+    # city_id=0 filters nothing: searches treat it as no city
+    city = _positive_int(params.get("city_id"))
+    if "q" in params or city or "limit" in params:
+        return QueryClass.SEARCH
+    if "latitude" in params and "longitude" in params:
+        radius = _float(params.get("max_distance"))
+        bounded = radius is not None and radius <= HEAVY_RADIUS_KM
+    else:
+        bounded = "page_size" in params or "cursor" in params
+    return QueryClass.SEARCH if bounded else QueryClass.HEAVY
+
+
+class ClassLimiter:
+    """
+    Concurrency limit with a bounded FIFO wait queue, for one query class.
+
+    Runs on the event loop: admission and release happen between awaits,
+    so no lock is needed. A released slot is handed directly to the oldest
+    waiter, which keeps the queue fair under sustained load.
+    """
+
+    def __init__(self, limit: int, queue_size: int, timeout: float = QUEUE_TIMEOUT) -> None:
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> str | None:
+        """
+        Wait for a slot.
+
+        Returns:
+            ``None`` once admitted, or the reason the request was shed:
+            ``"queue_full"`` or ``"queue_timeout"``
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            async with asyncio.timeout(self.timeout):
+                await waiter
+        except TimeoutError:
+            # Unless release() handed it the slot just as the timeout fired
+            if not self._handed_over(waiter):
+                self._discard(waiter)
+                self.rejected += 1
+                return "queue_timeout"
+        except asyncio.CancelledError:
+            # The client went away while queued
+            if self._handed_over(waiter):
+                # The slot is already ours; pass it on
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        self.admitted += 1
+        return None
+
+    @staticmethod
+    def _handed_over(waiter: asyncio.Future) -> bool:
+        return waiter.done() and not waiter.cancelled()
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        """Hand the slot to the oldest waiter, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+def build_limiters() -> dict[QueryClass, ClassLimiter]:
+    """One limiter per class, sized from ``ADMISSION_<CLASS>_LIMIT`` / ``_QUEUE``."""
+    limiters = {}
+    for query_class, (limit, queue_size) in DEFAULT_LIMITS.items():
+        prefix = f"ADMISSION_{query_class.name}"
+        limiters[query_class] = ClassLimiter(
+            int(os.getenv(f"{prefix}_LIMIT", str(limit))),
+            int(os.getenv(f"{prefix}_QUEUE", str(queue_size))),
+        )
+    return limiters
+
+
+admission_limiters = build_limiters()
+
+
+def admission_stats() -> dict:
+    """Live state of every class limiter, for ``GET /health`` and ``GET /pool/stats``."""
+    return {
+        query_class.value: limiter.stats() for query_class, limiter in admission_limiters.items()
+    }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware admitting, queueing or shedding each request by its query class."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiters: dict[QueryClass, ClassLimiter] | None = None,
+        enabled: bool = ADMISSION_ENABLED,
+    ) -> None:
+        self.app = app
+        self.limiters = admission_limiters if limiters is None else limiters
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        query_class = None
+        if self.enabled and scope["type"] == "http":
+            query_class = classify(scope["method"], scope["path"], scope.get("query_string", b""))
+        if query_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[query_class]
+        start = asyncio.get_running_loop().time()
+        reason = await limiter.acquire()
+        if reason is not None:
+            if METRICS_ENABLED:
+                ADMISSION_REJECTED.inc(query_class.value, reason)
+            await self._shed(send)
+            return
+
+        if METRICS_ENABLED:
+            ADMISSION_QUEUE_TIME.observe(
+                asyncio.get_running_loop().time() - start, query_class.value
+            )
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    @staticmethod
+    async def _shed(send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(SHED_BODY)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(RETRY_AFTER))).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": SHED_BODY})
@@ -0,0 +1,299 @@
+"""Bulk contractor ingest, shared by ``POST /api/contractors/bulk`` and the CLI.
+
+Records are validated and inserted in chunks: each chunk is one
+``executemany`` inside its own transaction, so a partner feed of 100k rows
+costs a few hundred round trips instead of 100k commits. NDJSON request
+bodies are split into lines as they stream in and loaded batch by batch, so
+the upload is never held in memory whole. Invalid rows are reported
+individually and never abort the rest of the load::
+
+    python -m app.bulk_load contractors.csv
+    python -m app.bulk_load contractors.ndjson --batch-size 2000
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.constants import Specialty
+from app.database import SessionLocal, get_engine
+from app.models import City, Contractor, spatial_columns
+from app.schemas import BulkLoadResponse, BulkRowError, ContractorCreate
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+# Longest NDJSON line buffered from a request body; longer lines fail their own row
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", "65536"))
+
+# Failed rows beyond this many are counted but not listed in the report
+MAX_REPORTED_ERRORS = 1000
+
+
+class OversizedLine:
+    """Stands in for an NDJSON line longer than the line size cap, which was skipped."""
+
+    __slots__ = ("max_bytes",)
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+
+
+# A record is a parsed dict (JSON array, CSV) or a raw JSON document (NDJSON line)
+Record = dict[str, Any] | str | bytes | OversizedLine
+
+
+class BulkLoad:
+    """Running totals and per-row errors of a bulk load."""
+
+    def __init__(self) -> None:
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[BulkRowError] = []
+        self.written: set[tuple[int, Specialty]] = set()
+        # Records read so far, and the known cities, for loads fed in several calls
+        self.rows = 0
+        self.city_ids: set[int] | None = None
+
+    def fail(self, row: int, errors: list[str]) -> None:
+        """Record a rejected row."""
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(BulkRowError(row=row, errors=errors))
+
+    def result(self) -> BulkLoadResponse:
+        """Summarize the load."""
+        return BulkLoadResponse(inserted=self.inserted, failed=self.failed, errors=self.errors)
+
+
+def validation_errors(exc: ValidationError) -> list[str]:
+    """Flatten a validation error into ``field: message`` strings."""
+    return [
+        f"{'.'.join(str(part) for part in error['loc']) or 'record'}: {error['msg']}"
+        for error in exc.errors()
+    ]
+
+
+def validate_record(record: Record) -> ContractorCreate:
+    """Validate one record; raw JSON documents are parsed and validated in one step."""
+    if isinstance(record, str | bytes):
+        return ContractorCreate.model_validate_json(record)
+    return ContractorCreate.model_validate(record)
+
+
+def contractor_values(contractor: ContractorCreate) -> dict[str, Any]:
+    """Build the insert parameters for a validated contractor, spatial columns included."""
+    values = contractor.model_dump()
+    values.update(spatial_columns(contractor.latitude, contractor.longitude))
+    return values
+
+
+def load_contractors(
+    db: Session,
+    records: Iterable[Record],
+    batch_size: int = BULK_BATCH_SIZE,
+    load: BulkLoad | None = None,
+) -> BulkLoad:
+    """
+    Validate and insert contractors in batch-sized transactions.
+
+    Args:
+        db: Database session; each batch is committed separately
+        records: Records in input order; rows are numbered from 1
+        batch_size: Rows validated and inserted per transaction
+        load: Load to continue, when the records arrive in several parts;
+            row numbers carry on from its previous records
+
+    Returns:
+        Totals and per-row errors of the load
+    """
+    load = load or BulkLoad()
+    if load.city_ids is None:
+        load.city_ids = set(db.scalars(select(City.id)))
+    iterator = iter(records)
+
+    while chunk := list(islice(iterator, batch_size)):
+        insert_batch(db, validate_batch(chunk, load), load)
+    return load
+
+
+def validate_batch(records: Iterable[Record], load: BulkLoad) -> list[tuple[int, dict[str, Any]]]:
+    """
+    Validate a batch of records, recording the rejected ones on ``load``.
+
+    Validation needs no database session, so async callers run it in the
+    threadpool and only hand the insert to the session.
+
+    Args:
+        records: Records in input order; rows are numbered after ``load.rows``
+        load: Load the records belong to, with ``city_ids`` already set
+
+    Returns:
+        (row, insert parameters) of the valid records
+    """
+    city_ids = load.city_ids or set()
+    batch = []
+    for row, record in enumerate(records, start=load.rows + 1):
+        load.rows = row
+        if isinstance(record, OversizedLine):
+            load.fail(row, [f"record: line longer than {record.max_bytes} bytes"])
+            continue
+        try:
+            contractor = validate_record(record)
+        except ValidationError as exc:
+            load.fail(row, validation_errors(exc))
+            continue
+        if contractor.city_id not in city_ids:
+            load.fail(row, ["city_id: City not found"])
+            continue
+        batch.append((row, contractor_values(contractor)))
+    return batch
+
+
+def insert_batch(db: Session, batch: list[tuple[int, dict[str, Any]]], load: BulkLoad) -> None:
+    """Insert a validated batch in one statement, isolating failing rows if it is rejected."""
+    if not batch:
+        return
+
+    table = Contractor.__table__
+    try:
+        db.execute(insert(table), [values for _, values in batch])
+        db.commit()
+        accepted = batch
+    except DBAPIError:
+        db.rollback()
+        # Retry row by row so one bad row does not cost the whole batch
+        accepted = []
+        for row, values in batch:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(table), values)
+            except DBAPIError as exc:
+                load.fail(row, [str(exc.orig)])
+            else:
+                accepted.append((row, values))
+        db.commit()
+
+    load.inserted += len(accepted)
+    load.written.update((values["city_id"], values["specialty"]) for _, values in accepted)
+
+
+def read_records(path: Path, file_format: str | None = None) -> Iterator[Record]:
+    """
+    Lazily read contractor records from a CSV, NDJSON or JSON file.
+
+    Args:
+        path: Input file
+        file_format: ``csv``, ``ndjson`` or ``json``; inferred from the suffix if omitted
+    """
+    file_format = file_format or {".csv": "csv", ".json": "json"}.get(path.suffix, "ndjson")
+
+    with path.open(encoding="utf-8", newline="") as stream:
+        if file_format == "csv":
+            # Empty cells are missing values, not empty strings
+            for row in csv.DictReader(stream):
+                yield {key: value if value != "" else None for key, value in row.items()}
+        elif file_format == "json":
+            yield from json.load(stream)
+        else:
+            yield from (line for line in stream if line.strip())
+
+
+def body_records(body: bytes) -> list[Record]:
+    """
+    Parse a JSON array request body into records.
+
+    Raises:
+        ValueError: If the body is not a JSON array
+    """
+    records = json.loads(body)
+    if not isinstance(records, list):
+        raise ValueError("Expected a JSON array of contractors")
+    return records
+
+
+async def ndjson_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int = BULK_MAX_LINE_BYTES
+) -> AsyncIterator[Record]:
+    """
+    Split a streamed NDJSON body into records as it arrives.
+
+    Lines are left unparsed, so a malformed line only fails its own row. At
+    most one line is buffered: a line longer than ``max_line_bytes`` is
+    skipped up to its newline and yielded as an :class:`OversizedLine`.
+    """
+    line = bytearray()
+    oversized = False
+    async for chunk in chunks:
+        *complete, rest = chunk.split(b"\n")
+        for segment in complete:
+            if oversized or len(line) + len(segment) > max_line_bytes:
+                yield OversizedLine(max_line_bytes)
+            else:
+                line += segment
+                if line.strip():
+                    yield bytes(line)
+            line.clear()
+            oversized = False
+        if not oversized:
+            line += rest
+            if len(line) > max_line_bytes:
+                oversized = True
+                line.clear()
+    if oversized:
+        yield OversizedLine(max_line_bytes)
+    elif line.strip():
+        yield bytes(line)
+
+
+async def batched(
+    records: Iterable[Record] | AsyncIterable[Record], size: int = BULK_BATCH_SIZE
+) -> AsyncIterator[list[Record]]:
+    """Group records from a sync or async source into lists of up to ``size``."""
+    if not isinstance(records, AsyncIterable):
+        iterator = iter(records)
+        while batch := list(islice(iterator, size)):
+            yield batch
+        return
+
+    batch = []
+    async for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk load contractors from a file.")
+    parser.add_argument("path", type=Path, help="CSV, NDJSON or JSON array file")
+    parser.add_argument("--format", choices=("csv", "ndjson", "json"), dest="file_format")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    get_engine()
+    db = SessionLocal()
+    try:
+        load = load_contractors(db, read_records(args.path, args.file_format), args.batch_size)
+    finally:
+        db.close()
+
+    for error in load.errors:
+        print(f"row {error.row}: {'; '.join(error.errors)}", file=sys.stderr)
+    print(f"Inserted {load.inserted} contractors, {load.failed} failed")
+    return 1 if load.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
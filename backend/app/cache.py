@@ -0,0 +1,424 @@
+"""Result cache for contractor searches.
+
+Two backends are available, selected with ``SEARCH_CACHE_BACKEND``:
+
+- ``memory`` (default): per-process LRU with a TTL and a bounded entry count
+- ``redis``: shared cache on a Redis-compatible server at ``SEARCH_CACHE_REDIS_URL``
+
+Entries are tagged with the (city, specialty) combination they were computed
+for, so a write only drops the searches it can actually change. Each tag also
+has a generation counter, bumped on every invalidation: a search reads it
+before querying and its result is only stored if no write invalidated the
+tag meanwhile, so a search that raced a write cannot cache stale rows.
+
+The cache is an optimization: when the Redis backend is unreachable, lookups
+count as misses and writes and invalidations are skipped and logged, and
+searches keep working from the database.
+"""
+
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable, Mapping
+from typing import Any
+
+from app.constants import Specialty
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is only needed for the redis backend
+    redis = None
+
+ANY = "*"
+
+# Stands in for generations that could not be read; never matches, so nothing is stored
+UNKNOWN_GENERATION = -1
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStats:
+    """Hit/miss/eviction counters shared by every backend."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counters as a plain dict."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with per-entry TTL and tag invalidation."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any, tuple[str, ...]]] = OrderedDict()
+        self._tags: dict[str, set[Hashable]] = {}
+        self._generations: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value for ``key``, or ``None`` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                    self.stats.evictions += 1
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[1]
+
+    def generations(self, tags: Iterable[str]) -> dict[str, int]:
+        """Return the invalidation counter of each of ``tags``."""
+        with self._lock:
+            return {tag: self._generations.get(tag, 0) for tag in tags}
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        tags: Iterable[str] = (),
+        generations: Mapping[str, int] | None = None,
+    ) -> bool:
+        """
+        Store ``value`` under ``key``, evicting the least recently used entries.
+
+        Args:
+            generations: Counters of ``tags`` read with :meth:`generations` before
+                the value was computed; if any tag was invalidated since, nothing is stored
+
+        Returns:
+            Whether the value was stored
+        """
+        tags = tuple(tags)
+        with self._lock:
+            if generations is not None and any(
+                self._generations.get(tag, 0) != generations.get(tag, 0) for tag in tags
+            ):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+        return True
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying any of ``tags``; returns the number dropped."""
+        dropped = 0
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    dropped += 1
+            self.stats.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        """Drop every entry; generations are kept so in-flight searches still see writes."""
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+# Stores an entry unless one of its tags was invalidated since the search read
+# the tag generations. KEYS: entry, n tag sets, n generation counters;
+# ARGV: value, ttl, n expected generations
+SET_IF_CURRENT = """
+local n = (#KEYS - 1) / 2
+for i = 1, n do
+    if tonumber(redis.call('GET', KEYS[1 + n + i]) or '0') ~= tonumber(ARGV[2 + i]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+for i = 1, n do
+    redis.call('SADD', KEYS[1 + i], KEYS[1])
+    redis.call('EXPIRE', KEYS[1 + i], ARGV[2])
+end
+return 1
+"""
+
+# Drops every entry of the given tags and bumps their generations, atomically,
+# so an entry stored concurrently is either dropped or refused.
+# KEYS: n tag sets, n generation counters. Returns the number of entries dropped.
+INVALIDATE_TAGS = """
+local n = #KEYS / 2
+local dropped = 0
+for i = 1, n do
+    redis.call('INCR', KEYS[n + i])
+    local keys = redis.call('SMEMBERS', KEYS[i])
+    -- unpack() is limited by the Lua stack, so delete in slices
+    for first = 1, #keys, 1000 do
+        dropped = dropped + redis.call('DEL', unpack(keys, first, math.min(first + 999, #keys)))
+    end
+    redis.call('DEL', KEYS[i])
+end
+return dropped
+"""
+
+
+class RedisCache:
+    """Cache backed by a Redis-compatible server, shared by every worker."""
+
+    def __init__(self, url: str, ttl: float = 60.0, prefix: str = "search:") -> None:
+        if redis is None:
+            raise RuntimeError("The redis package is required for SEARCH_CACHE_BACKEND=redis")
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+        self._client = redis.Redis.from_url(url)
+        self._set_if_current = self._client.register_script(SET_IF_CURRENT)
+        self._invalidate_tags = self._client.register_script(INVALIDATE_TAGS)
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        self.stats.errors += 1
+        logger.warning("Search cache %s skipped, Redis unavailable: %s", operation, error)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value for ``key``, or ``None`` on a miss (or a Redis error)."""
+        try:
+            payload = self._client.get(self._key(key))
+        except redis.RedisError as error:
+            self._failed("get", error)
+            payload = None
+        if payload is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return pickle.loads(payload)
+
+    def generations(self, tags: Iterable[str]) -> dict[str, int]:
+        """Return the invalidation counter of each of ``tags``."""
+        tags = list(tags)
+        if not tags:
+            return {}
+        try:
+            values = self._client.mget([self._generation(tag) for tag in tags])
+        except redis.RedisError as error:
+            self._failed("generation read", error)
+            return dict.fromkeys(tags, UNKNOWN_GENERATION)
+        return {tag: int(value or 0) for tag, value in zip(tags, values, strict=True)}
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        tags: Iterable[str] = (),
+        generations: Mapping[str, int] | None = None,
+    ) -> bool:
+        """Store ``value`` under ``key`` with the configured TTL; see :meth:`MemoryCache.set`."""
+        redis_key = self._key(key)
+        ttl = max(1, int(self.ttl))
+        tags = list(tags)
+        try:
+            if generations is not None:
+                # Checked and written in one script, so an invalidation cannot land in between
+                stored = self._set_if_current(
+                    keys=[
+                        redis_key,
+                        *(self._tag(tag) for tag in tags),
+                        *(self._generation(tag) for tag in tags),
+                    ],
+                    args=[pickle.dumps(value), ttl, *(generations.get(tag, 0) for tag in tags)],
+                )
+                return bool(stored)
+
+            pipeline = self._client.pipeline()
+            pipeline.set(redis_key, pickle.dumps(value), ex=ttl)
+            for tag in tags:
+                pipeline.sadd(self._tag(tag), redis_key)
+                pipeline.expire(self._tag(tag), ttl)
+            pipeline.execute()
+        except redis.RedisError as error:
+            self._failed("write", error)
+            return False
+        return True
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """
+        Drop every entry carrying any of ``tags``; returns the number dropped.
+
+        When Redis is unreachable nothing is dropped; entries then expire with their TTL.
+        """
+        tags = list(tags)
+        try:
+            dropped = self._invalidate_tags(
+                keys=[
+                    *(self._tag(tag) for tag in tags),
+                    *(self._generation(tag) for tag in tags),
+                ]
+            )
+        except redis.RedisError as error:
+            self._failed("invalidation", error)
+            return 0
+        self.stats.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        """Drop every entry under this cache's prefix; generations are kept."""
+        try:
+            keys = [
+                key
+                for key in self._client.scan_iter(match=f"{self.prefix}*")
+                if not key.startswith(f"{self.prefix}gen:".encode())
+            ]
+            if keys:
+                self._client.delete(*keys)
+        except redis.RedisError as error:
+            self._failed("clear", error)
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}{key!r}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _generation(self, tag: str) -> str:
+        return f"{self.prefix}gen:{tag}"
+
+
+class SearchCache:
+    """Front end for contractor search caching: keys, quantization and tags."""
+
+    def __init__(
+        self,
+        backend: MemoryCache | RedisCache | None,
+        coord_decimals: int = 4,
+        max_rows: int = 5000,
+    ) -> None:
+        self.backend = backend
+        self.coord_decimals = coord_decimals
+        self.max_rows = max_rows
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a backend is configured."""
+        return self.backend is not None
+
+    def quantize(self, coordinate: float) -> float:
+        """
+        Snap a coordinate to the cache grid so that nearby searches share entries.
+
+        Four decimals is roughly 11 m; cached searches measure distances from
+        the snapped origin, so every search sharing an entry gets the same
+        result. Coordinates pass through unchanged when caching is off.
+        """
+        if self.backend is None:
+            return coordinate
+        return round(coordinate, self.coord_decimals)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return a cached search result, or ``None`` on a miss."""
+        return self.backend.get(key) if self.backend is not None else None
+
+    def generations(self, city_id: int | None, specialty: Specialty | None) -> dict[str, int]:
+        """Invalidation counters for a search's filters; read them before running the search."""
+        if self.backend is None:
+            return {}
+        return self.backend.generations([self._tag(city_id, specialty)])
+
+    def set(
+        self,
+        key: Hashable,
+        value: list,
+        city_id: int | None,
+        specialty: Specialty | None,
+        generations: Mapping[str, int] | None = None,
+    ) -> None:
+        """
+        Cache a search result computed for the given filters, unless it is too large.
+
+        Args:
+            generations: From :meth:`generations`, read before the search ran; the
+                result is dropped if a write invalidated these filters meanwhile
+        """
+        if self.backend is not None and len(value) <= self.max_rows:
+            self.backend.set(key, value, [self._tag(city_id, specialty)], generations)
+
+    def invalidate_contractor(self, city_id: int, specialty: Specialty) -> int:
+        """Drop cached searches whose results may include a contractor with these values."""
+        if self.backend is None:
+            return 0
+        return self.backend.invalidate(
+            [
+                self._tag(city_id, specialty),
+                self._tag(city_id, None),
+                self._tag(None, specialty),
+                self._tag(None, None),
+            ]
+        )
+
+    def clear(self) -> None:
+        """Drop every cached search."""
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Return the backend's counters."""
+        if self.backend is None:
+            return {"backend": "off"}
+        backend = "redis" if isinstance(self.backend, RedisCache) else "memory"
+        return {"backend": backend, **self.backend.stats.as_dict()}
+
+    @staticmethod
+    def _tag(city_id: int | None, specialty: Specialty | None) -> str:
+        city = ANY if city_id is None else str(city_id)
+        return f"{city}:{ANY if specialty is None else Specialty(specialty).value}"
+
+
+def create_search_cache() -> SearchCache:
+    """Build the search cache from environment settings."""
+    backend_name = os.getenv("SEARCH_CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("SEARCH_CACHE_TTL", "60"))
+    coord_decimals = int(os.getenv("SEARCH_CACHE_COORD_DECIMALS", "4"))
+    max_rows = int(os.getenv("SEARCH_CACHE_MAX_ROWS", "5000"))
+
+    if backend_name == "off":
+        backend = None
+    elif backend_name == "redis":
+        backend = RedisCache(os.getenv("SEARCH_CACHE_REDIS_URL", "redis://localhost:6379/0"), ttl)
+    else:
+        backend = MemoryCache(int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024")), ttl)
+
+    return SearchCache(backend, coord_decimals, max_rows)
+
+
+search_cache = create_search_cache()
@@ -0,0 +1,213 @@
+"""Single-flight coalescing of identical in-flight contractor searches.
+
+When a popular search spikes, many identical ``GET /api/contractors``
+requests arrive while the first one is still running. The first request
+with a given normalized parameter set becomes the leader and runs the
+search; the others wait for it and receive a copy of its serialized
+response (status, headers and body), so the spike costs one database query
+and one scoring pass instead of one per request.
+
+Coalescing happens in ASGI middleware, before FastAPI resolves the route's
+dependencies, so it covers the sync routes (run in the threadpool) and the
+``DB_ASYNC`` routes alike, and waiters hold neither a worker thread nor a
+database connection. It only spans the lifetime of the leader's request;
+repeated searches over time are the job of :mod:`app.cache`. NDJSON streams
+are never coalesced. Set ``COALESCE_ENABLED=false`` to turn it off.
+"""
+
+import asyncio
+import functools
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from concurrent.futures import Future
+from typing import TypeVar
+from urllib.parse import parse_qs
+
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.env import env_flag
+from app.pagination import wants_ndjson
+from app.replicas import reads_primary
+from app.search import MAX_QUERY_LENGTH
+from app.text_index import tokenize
+
+COALESCE_ENABLED = env_flag("COALESCE_ENABLED", default=True)
+
+COALESCED_PATH = "/api/contractors"
+
+T = TypeVar("T")
+
+
+def _fields(value: str) -> frozenset[str]:
+    # The projection is returned in a fixed field order, whatever order it was asked in
+    return frozenset(field.strip() for field in value.split(",") if field.strip())
+
+
+def _query(value: str) -> str:
+    if len(value) > MAX_QUERY_LENGTH:
+        raise ValueError("query too long")
+    # Text search only sees the folded tokens: "Plomería  24/7" == "plomeria 24/7"
+    return " ".join(tokenize(value))
+
+
+# How each get_contractors parameter is normalized into the coalescing key
+NORMALIZERS: dict[str, Callable[[str], Hashable]] = {
+    "city_id": int,
+    "specialty": str,
+    "latitude": float,
+    "longitude": float,
+    "max_distance": float,
+    "limit": int,
+    "fields": _fields,
+    "q": _query,
+    "sort": str,
+    "cursor": str,
+    "page_size": int,
+}
+
+
+def search_key(query_string: bytes, primary: bool = False) -> tuple | None:
+    """
+    Normalized key of a contractor search, equal for requests with the same result.
+
+    Args:
+        query_string: Raw query string of the request
+        primary: Whether the client reads from the primary (read-your-writes)
+
+    Returns:
+        The key, or ``None`` when the request should not be coalesced:
+        unknown or repeated parameters and values that fail validation are
+        left to the route to reject
+    """
+    params = parse_qs(query_string.decode("latin-1"), keep_blank_values=True)
+    key = []
+    for name, values in sorted(params.items()):
+        normalize = NORMALIZERS.get(name)
+        if normalize is None or len(values) != 1:
+            return None
+        try:
+            key.append((name, normalize(values[0])))
+        except ValueError:
+            return None
+    return (primary, *key)
+
+
+class SingleFlight:
+    """
+    Runs one call per key at a time and shares its outcome with concurrent callers.
+
+    Calls are tracked with thread-safe ``concurrent.futures`` futures, so
+    callers on different event loops (or threads) can join the same call.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await ``work()``, or the call already in flight for ``key``.
+
+        The leader's work runs as its own task, so a leader whose client
+        disconnects does not cancel the call for the requests waiting on it.
+        Exceptions are raised to every caller.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if leader:
+            task = asyncio.ensure_future(work())
+            task.add_done_callback(functools.partial(self._settle, key, future))
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _settle(self, key: Hashable, future: Future, task: asyncio.Task) -> None:
+        # Later arrivals start a new call, so they never see results older than their request
+        with self._lock:
+            del self._calls[key]
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    def stats(self) -> dict[str, int]:
+        """Calls run, and requests that joined a call already in flight."""
+        with self._lock:
+            return {"leaders": self.leaders, "shared": self.shared, "in_flight": len(self._calls)}
+
+
+search_flights = SingleFlight()
+
+
+class _CapturedResponse:
+    """A complete response recorded from the leader, replayed to every waiter."""
+
+    __slots__ = ("start", "body", "route")
+
+    def __init__(self, start: Message, body: bytes, route) -> None:
+        self.start = start
+        self.body = body
+        self.route = route
+
+    async def send(self, send: Send) -> None:
+        await send(self.start)
+        await send({"type": "http.response.body", "body": self.body})
+
+
+class CoalescingMiddleware:
+    """ASGI middleware coalescing concurrent identical ``GET /api/contractors`` requests."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        flights: SingleFlight | None = None,
+        enabled: bool = COALESCE_ENABLED,
+    ) -> None:
+        self.app = app
+        self.flights = search_flights if flights is None else flights
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        key = None
+        if (
+            self.enabled
+            and scope["type"] == "http"
+            and scope["method"] == "GET"
+            and scope["path"] == COALESCED_PATH
+        ):
+            request = Request(scope)
+            if not wants_ndjson(request):
+                key = search_key(scope.get("query_string", b""), reads_primary(request))
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        response = await self.flights.do(key, lambda: self._capture(scope, receive))
+        # Waiters never reach the router; give the timing metrics the leader's route
+        scope.setdefault("route", response.route)
+        await response.send(send)
+
+    async def _capture(self, scope: Scope, receive: Receive) -> _CapturedResponse:
+        scope = dict(scope)
+        start: Message = {}
+        body = bytearray()
+
+        async def capture(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                body.extend(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        return _CapturedResponse(start, bytes(body), scope.get("route"))
@@ -0,0 +1,145 @@
+"""Negotiated gzip/brotli response compression.
+
+Responses of at least ``COMPRESSION_MIN_SIZE`` bytes are compressed with
+the best encoding the client accepts: brotli when the ``brotli`` package is
+installed, gzip otherwise. Streamed responses (NDJSON) are compressed chunk
+by chunk and flushed after every chunk, so clients still receive rows as
+they are produced. Set ``COMPRESSION_MIN_SIZE=0`` to compress every
+response, or ``COMPRESSION_ENABLED=false`` to turn compression off.
+"""
+
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.env import env_flag
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSION_ENABLED = env_flag("COMPRESSION_ENABLED", default=True)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Moderate levels: most of the size reduction for a fraction of the maximum-level CPU cost
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+
+class _Gzip:
+    encoding = "gzip"
+
+    def __init__(self) -> None:
+        # wbits=31 writes the gzip container rather than a raw zlib stream
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush_mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(flush_mode)
+
+
+class _Brotli:
+    encoding = "br"
+
+    def __init__(self) -> None:
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """
+    Pick the response encoding for an ``Accept-Encoding`` header.
+
+    Encodings with ``q=0`` are refused; among the rest the highest quality
+    wins, preferring brotli over gzip on ties.
+
+    Returns:
+        ``"br"``, ``"gzip"`` or ``None`` to send the response uncompressed
+    """
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        key, _, value = params.strip().partition("=")
+        if key.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        if name:
+            qualities[name.strip()] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = max(candidates, key=lambda name: qualities.get(name, wildcard))
+    return best if qualities.get(best, wildcard) > 0 else None
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the negotiated encoding."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        compressor: _Gzip | _Brotli | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether to compress
+                start = message
+                passthrough = "content-encoding" in Headers(raw=message["headers"])
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start is not None:
+                initial, start = start, None
+                if passthrough or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(initial)
+                    await send(message)
+                    return
+
+                compressor = _Brotli() if encoding == "br" else _Gzip()
+                headers = MutableHeaders(raw=initial["headers"])
+                headers["Content-Encoding"] = compressor.encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = compressor.compress(body, final=True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(initial)
+                    await send({**message, "body": body})
+                    return
+                await send(initial)
+
+            if passthrough or compressor is None:
+                await send(message)
+                return
+            await send({**message, "body": compressor.compress(body, final=not more_body)})
+
+        await self.app(scope, receive, send_compressed)
@@ -18,3 +18,27 @@ class Specialty(str, Enum):
     def __str__(self) -> str:
         """Return the value of the enum."""
         return self.value
+
+
+class PriceRange(str, Enum):
+    """Contractor price ranges."""
+
+    LOW = "$"
+    MEDIUM = "$$"
+    HIGH = "$$$"
+    PREMIUM = "$$$$"
+
+    def __str__(self) -> str:
+        """Return the value of the enum."""
+        return self.value
+
+
+class SearchSort(str, Enum):
+    """Result orders for full-text contractor searches."""
+
+    RELEVANCE = "relevance"
+    DISTANCE = "distance"
+
+    def __str__(self) -> str:
+        """Return the value of the enum."""
+        return self.value
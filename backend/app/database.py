@@ -1,27 +1,181 @@
+"""Database engines and sessions.
+
+Nothing connects, or even creates an engine, at import time: engines are
+built by :func:`get_engine` / :func:`get_async_engine` on first use, which
+the application lifespan does at startup before warming the pools, and
+:func:`dispose_engines` closes them at shutdown. Tables are created and
+migrated by ``python -m app.migrations``, never by the web app.
+"""
+
 import os
 
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from app.env import env_flag
+from app.pool import pool_options
+from app.replicas import REPLICA_URLS, ReadRouter, reads_primary
+
 # Get DATABASE_URL from environment variable (no default for security)
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-if not DATABASE_URL:
-    raise ValueError(
-        "DATABASE_URL environment variable is not set. "
-        "Please set it in your .env file or environment."
-    )
+# Async drivers used when ASYNC_DATABASE_URL is not set explicitly
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Derive the async driver URL for ``url`` (e.g. mysql+pymysql -> mysql+aiomysql)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver known for {parsed.drivername}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
 
-engine = create_engine(DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Bound to the engine by get_engine()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
+# Async mode (DB_ASYNC=true) serves the API from async routes on the async engine
+DB_ASYNC = env_flag("DB_ASYNC")
+
+_engine: Engine | None = None
+_read_router: ReadRouter[Engine] | None = None
+_async_engine: AsyncEngine | None = None
+_async_sessionmaker: async_sessionmaker[AsyncSession] | None = None
+_async_read_router: ReadRouter[AsyncEngine] | None = None
+
+
+def database_url() -> str:
+    """Return ``DATABASE_URL``, failing with a clear message when it is not set."""
+    if not DATABASE_URL:
+        raise ValueError(
+            "DATABASE_URL environment variable is not set. "
+            "Please set it in your .env file or environment."
+        )
+    return DATABASE_URL
+
+
+def get_engine() -> Engine:
+    """Create the engine (and the replica engines) on first use."""
+    global _engine, _read_router
+    if _engine is None:
+        url = database_url()
+        _engine = create_engine(url, **pool_options(url))
+        SessionLocal.configure(bind=_engine)
+        # Read-only routes are served from DATABASE_REPLICA_URLS when set, each with its own pool
+        _read_router = ReadRouter(
+            _engine, [create_engine(replica, **pool_options(replica)) for replica in REPLICA_URLS]
+        )
+    return _engine
+
+
+def get_read_router() -> ReadRouter[Engine]:
+    """Read router over the primary and replica engines, created with them on first use."""
+    get_engine()
+    assert _read_router is not None, "get_engine() creates the read router"
+    return _read_router
+
+
+def get_async_engine() -> AsyncEngine:
+    """Create the async engine on first use, so sync deployments never load async drivers."""
+    global _async_engine, _async_sessionmaker, _async_read_router
+    if _async_engine is None:
+        url = os.getenv("ASYNC_DATABASE_URL") or async_database_url(database_url())
+        _async_engine = create_async_engine(url, **pool_options(url, asynchronous=True))
+        _async_sessionmaker = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+        replicas = [async_database_url(replica) for replica in REPLICA_URLS]
+        _async_read_router = ReadRouter(
+            _async_engine,
+            [
+                create_async_engine(replica, **pool_options(replica, asynchronous=True))
+                for replica in replicas
+            ],
+        )
+    return _async_engine
+
+
+def get_async_read_router() -> ReadRouter[AsyncEngine]:
+    """Read router over the async engines, created with them on first use."""
+    get_async_engine()
+    assert _async_read_router is not None, "get_async_engine() creates the read router"
+    return _async_read_router
+
+
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Async session factory, created with the async engine on first use."""
+    get_async_engine()
+    assert _async_sessionmaker is not None, "get_async_engine() creates the session factory"
+    return _async_sessionmaker
+
+
+def current_read_router(asynchronous: bool = False) -> ReadRouter | None:
+    """The sync (or async) read router if its engines exist, without creating them."""
+    return _async_read_router if asynchronous else _read_router
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection and forget the engines; they are recreated on next use."""
+    global _engine, _read_router, _async_engine, _async_sessionmaker, _async_read_router
+    if _read_router is not None:
+        for replica in _read_router.replicas:
+            replica.dispose()
+    if _engine is not None:
+        _engine.dispose()
+    if _async_read_router is not None:
+        for replica in _async_read_router.replicas:
+            await replica.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _engine = _read_router = _async_engine = _async_sessionmaker = _async_read_router = None
+
 
 def get_db():
+    get_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db(request: Request):
+    """Session for read-only routes, on a replica unless the client wrote recently."""
+    connection = get_read_router().connect(primary=reads_primary(request))
+    db = SessionLocal(bind=connection)
+    try:
+        yield db
+    finally:
+        db.close()
+        connection.close()
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def get_async_read_db(request: Request):
+    """Async counterpart of :func:`get_read_db`."""
+    connection = await get_async_read_router().connect_async(primary=reads_primary(request))
+    try:
+        async with get_async_sessionmaker()(bind=connection) as db:
+            yield db
+    finally:
+        await connection.close()
@@ -0,0 +1,11 @@
+"""Environment variable parsing shared by modules that read settings at import time."""
+
+import os
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean environment variable."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,358 @@
+"""Geospatial helpers for the Contractor Finder application."""
+
+import math
+from collections.abc import Sequence
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371  # Earth's radius in kilometers
+DISTANCE_DECIMALS = 2
+
+# Precision stored on each contractor row (~4.8m x 4.8m cells)
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Rounded distances are compared against max_distance, so spatial
+# prefilters must reach half a rounding step beyond the requested radius
+ROUNDING_SLACK_KM = 0.5 * 10**-DISTANCE_DECIMALS
+
+# Covers rounding plus the error of distances derived from dot products,
+# when those are only used to screen candidates for exact scoring
+SCREEN_SLACK_KM = 10**-DISTANCE_DECIMALS
+
+
+def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Calculate distance between two coordinates using Haversine formula.
+    Returns distance in kilometers.
+    """
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+
+    a = (
+        math.sin(dlat / 2) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    )
+
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    distance = EARTH_RADIUS_KM * c
+
+    return round(distance, DISTANCE_DECIMALS)
+
+
+def to_unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    """Convert a coordinate to a point on the unit sphere."""
+    lat = math.radians(latitude)
+    lon = math.radians(longitude)
+    return math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)
+
+
+def chord_length(distance_km: float) -> float:
+    """Convert a great-circle distance to the matching unit-sphere chord length."""
+    angle = min(distance_km / EARTH_RADIUS_KM, math.pi)
+    return 2 * math.sin(angle / 2)
+
+
+def chord_to_distance(chord: float) -> float:
+    """Convert a unit-sphere chord length back to an (unrounded) great-circle distance."""
+    return EARTH_RADIUS_KM * 2 * math.asin(min(chord / 2, 1.0))
+
+
+def haversine_many(
+    latitude: float, longitude: float, latitudes: Sequence[float], longitudes: Sequence[float]
+):
+    """
+    Calculate unrounded Haversine distances from one origin to many points at once.
+
+    Args:
+        latitude: Origin latitude
+        longitude: Origin longitude
+        latitudes: Candidate latitudes (any array-like of floats)
+        longitudes: Candidate longitudes, aligned with ``latitudes``
+
+    Returns:
+        NumPy array of distances in kilometers
+    """
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    np.clip(a, 0.0, 1.0, out=a)
+
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def rank_by_distance(
+    latitude: float,
+    longitude: float,
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+    max_distance: float | None = None,
+) -> tuple[list[int], list[float]]:
+    """
+    Score a whole candidate set against an origin and sort it by distance.
+
+    Distances are rounded to two decimals before the ``max_distance`` cutoff
+    and the sort, exactly like :func:`calculate_distance`. Ties keep the
+    candidates' original order.
+
+    Args:
+        latitude: Origin latitude
+        longitude: Origin longitude
+        latitudes: Candidate latitudes
+        longitudes: Candidate longitudes, aligned with ``latitudes``
+        max_distance: Optional maximum distance in km
+
+    Returns:
+        Tuple of (candidate indices, rounded distances), nearest first
+    """
+    return _rank(haversine_many(latitude, longitude, latitudes, longitudes), max_distance)
+
+
+def rank_by_unit_vectors(
+    latitude: float,
+    longitude: float,
+    unit_vectors: Sequence[tuple[float, float, float]],
+    max_distance: float | None = None,
+) -> tuple[list[int], list[float]]:
+    """
+    Like :func:`rank_by_distance`, for candidates with precomputed unit vectors.
+
+    The chord between two unit vectors gives the great-circle distance with a
+    single ``arcsin``, instead of the four trig calls of the Haversine formula.
+
+    Args:
+        latitude: Origin latitude
+        longitude: Origin longitude
+        unit_vectors: Candidate (x, y, z) points on the unit sphere
+        max_distance: Optional maximum distance in km
+
+    Returns:
+        Tuple of (candidate indices, rounded distances), nearest first
+    """
+    origin = to_unit_vector(latitude, longitude)
+    return _rank(unit_vector_distances(origin, unit_vectors), max_distance)
+
+
+def unit_vector_distances(origin: tuple[float, float, float], unit_vectors):
+    """
+    Calculate unrounded great-circle distances from one unit vector to many.
+
+    Args:
+        origin: Origin (x, y, z) on the unit sphere
+        unit_vectors: Candidate points, any array-like of shape (n, 3)
+
+    Returns:
+        NumPy array of distances in kilometers
+    """
+    points = np.asarray(unit_vectors, dtype=np.float64).reshape(-1, 3)
+    chords = np.sqrt(((points - origin) ** 2).sum(axis=1))
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.minimum(chords / 2, 1.0))
+
+
+def _rank(distances, max_distance: float | None) -> tuple[list[int], list[float]]:
+    """Round, filter and stably sort an array of distances."""
+    distances = np.round(distances, DISTANCE_DECIMALS)
+    indices = nearest_indices(distances, max_distance)
+    return indices.tolist(), distances[indices].tolist()
+
+
+def nearest_indices(distances, max_distance: float | None = None, limit: int | None = None):
+    """
+    Select and order candidates by their (already rounded) distances.
+
+    Args:
+        distances: NumPy array of rounded distances in km
+        max_distance: Optional maximum distance in km
+        limit: Optional number of nearest candidates to keep
+
+    Returns:
+        NumPy array of candidate indices, nearest first and ties in index order
+    """
+    if max_distance is None:
+        indices = np.arange(len(distances))
+    else:
+        indices = np.flatnonzero(distances <= max_distance)
+
+    if limit is not None and len(indices) > limit:
+        # Keep everything tied with the k-th distance so the stable sort picks the lowest indices
+        kth = np.partition(distances[indices], limit - 1)[limit - 1]
+        indices = indices[distances[indices] <= kth]
+
+    indices = indices[np.argsort(distances[indices], kind="stable")]
+    return indices if limit is None else indices[:limit]
+
+
+def nearest_many(
+    origins: Sequence[tuple[float, float, float]],
+    unit_vectors,
+    limits: Sequence[int | None],
+    max_distances: Sequence[float | None],
+    max_cells: int,
+) -> list[tuple[list[int], list[float]]]:
+    """
+    Rank one candidate set against many origins with an origin x candidate matrix.
+
+    The matrix holds dot products (the cosine of each great-circle angle)
+    and is computed a chunk of origins at a time, so at most ``max_cells``
+    values exist at once however large the batch. Dot products lose
+    precision for very close points, so each origin's candidates are only
+    screened on it (with :data:`SCREEN_SLACK_KM` of margin) and the few
+    survivors are re-scored exactly; results match :func:`rank_by_unit_vectors`.
+
+    Args:
+        origins: Origin (x, y, z) points on the unit sphere
+        unit_vectors: Candidate points, any array-like of shape (n, 3)
+        limits: Per-origin number of nearest candidates to keep
+        max_distances: Per-origin maximum distance in km
+        max_cells: Largest number of matrix values computed at once
+
+    Returns:
+        Per origin, a tuple of (candidate indices, rounded distances), nearest first
+    """
+    points = np.asarray(unit_vectors, dtype=np.float64).reshape(-1, 3)
+    origin_points = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+    rows_per_chunk = max(1, max_cells // max(len(points), 1))
+    results = []
+
+    for start in range(0, len(origin_points), rows_per_chunk):
+        chunk = origin_points[start : start + rows_per_chunk]
+        dots = chunk @ points.T
+        np.clip(dots, -1.0, 1.0, out=dots)
+
+        for offset, row in enumerate(dots):
+            index = start + offset
+            limit, max_distance = limits[index], max_distances[index]
+            angle = math.pi
+            if limit is not None and limit < len(row):
+                kth = -np.partition(-row, limit - 1)[limit - 1]
+                angle = math.acos(kth) + SCREEN_SLACK_KM / EARTH_RADIUS_KM
+            if max_distance is not None:
+                angle = min(angle, (max_distance + SCREEN_SLACK_KM) / EARTH_RADIUS_KM)
+            candidates = np.flatnonzero(row >= math.cos(min(angle, math.pi)))
+
+            distances = np.round(
+                unit_vector_distances(chunk[offset], points[candidates]), DISTANCE_DECIMALS
+            )
+            order = nearest_indices(distances, max_distance, limit)
+            results.append((candidates[order].tolist(), distances[order].tolist()))
+
+    return results
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Encode a coordinate as a geohash string.
+
+    Args:
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        precision: Number of base32 characters to produce
+
+    Returns:
+        Geohash of the cell containing the coordinate
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+
+    while len(chars) < precision:
+        coordinate, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bits += 1
+
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+
+    return "".join(chars)
+
+
+def bounding_box(
+    latitude: float, longitude: float, radius_km: float
+) -> tuple[float, float, float | None, float | None]:
+    """
+    Calculate the lat/lon box enclosing a circle on the sphere.
+
+    Longitude bounds are ``None`` when the circle covers a pole or crosses
+    the antimeridian, since no single longitude range encloses it then.
+
+    Args:
+        latitude: Center latitude
+        longitude: Center longitude
+        radius_km: Circle radius in kilometers
+
+    Returns:
+        Tuple of (min_lat, max_lat, min_lon, max_lon)
+    """
+    angular_radius = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angular_radius)
+    min_lat = latitude - dlat
+    max_lat = latitude + dlat
+
+    if min_lat <= -90 or max_lat >= 90 or angular_radius >= math.pi / 2:
+        return max(min_lat, -90.0), min(max_lat, 90.0), None, None
+
+    dlon = math.degrees(math.asin(math.sin(angular_radius) / math.cos(math.radians(latitude))))
+    min_lon = longitude - dlon
+    max_lon = longitude + dlon
+
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, None, None
+
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def geohash_cover(latitude: float, longitude: float, radius_km: float) -> list[str]:
+    """
+    Find geohash prefixes whose cells together cover a search circle.
+
+    Picks the finest precision whose cells are at least as large as the
+    circle's bounding box, then returns the center cell and its neighbours.
+
+    Args:
+        latitude: Center latitude
+        longitude: Center longitude
+        radius_km: Circle radius in kilometers
+
+    Returns:
+        Sorted list of geohash prefixes, or an empty list if the circle is
+        too large or too close to a pole/antimeridian to cover this way
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    if min_lon is None or max_lon is None:
+        return []
+
+    half_height = (max_lat - min_lat) / 2
+    half_width = (max_lon - min_lon) / 2
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_bits = 5 * precision // 2
+        cell_height = 180 / 2**lat_bits
+        cell_width = 360 / 2 ** (5 * precision - lat_bits)
+        if cell_height >= half_height and cell_width >= half_width:
+            break
+    else:
+        return []
+
+    cells = set()
+    for dlat in (-cell_height, 0.0, cell_height):
+        for dlon in (-cell_width, 0.0, cell_width):
+            lat = min(max(latitude + dlat, -90.0), 90.0)
+            lon = (longitude + dlon + 180) % 360 - 180
+            cells.add(encode_geohash(lat, lon, precision))
+
+    return sorted(cells)
@@ -1,16 +1,69 @@
 import os
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.exc import SQLAlchemyError
 
-from app.database import Base, engine
-from app.routers import cities, contractors
+from app import parallel_rank
+from app.admission import AdmissionMiddleware, admission_stats
+from app.cache import search_cache
+from app.coalesce import CoalescingMiddleware, search_flights
+from app.compression import CompressionMiddleware
+from app.database import (
+    DB_ASYNC,
+    current_read_router,
+    dispose_engines,
+    get_async_engine,
+    get_engine,
+)
+from app.metrics import CONTENT_TYPE, TimingMiddleware, install_sql_metrics, registry
+from app.pagination import FastJSONResponse
+from app.pool import (
+    check_async_connection,
+    check_connection,
+    pool_stats,
+    warm_async_pool,
+    warm_pool,
+)
+from app.routers import async_cities, async_contractors, cities, contractors
+from app.sql_logging import install_sql_logging
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the engines and warm their pools before serving; close them on shutdown.
+
+    Importing this module never touches the database, so workers boot fast
+    and a database outage cannot stop them from starting. ``/ready`` reports
+    503 until this has finished.
+    """
+    # Open pooled connections before the first request rather than during it
+    if DB_ASYNC:
+        await warm_async_pool(get_async_engine())
+    else:
+        await run_in_threadpool(warm_pool, get_engine())
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    await dispose_engines()
+    parallel_rank.shutdown()
 
-app = FastAPI(title="Contractor Finder API")
+
+app = FastAPI(
+    title="Contractor Finder API", default_response_class=FastJSONResponse, lifespan=lifespan
+)
+app.state.ready = False
 
 # CORS configuration
 origins = os.getenv("BACKEND_CORS_ORIGINS", "http://localhost:3000").split(",")
 
+# Innermost, so shed responses still get CORS headers and preflights are never queued
+app.add_middleware(AdmissionMiddleware)
+# Outside admission control, so requests joining an in-flight search never take a slot
+app.add_middleware(CoalescingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -18,13 +71,18 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(TimingMiddleware)
+install_sql_metrics()
+install_sql_logging()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-# Include routers
-app.include_router(contractors.router, prefix="/api", tags=["contractors"])
-app.include_router(cities.router, prefix="/api", tags=["cities"])
+# Include routers; DB_ASYNC serves the same API from async routes
+if DB_ASYNC:
+    app.include_router(async_contractors.router, prefix="/api", tags=["contractors"])
+    app.include_router(async_cities.router, prefix="/api", tags=["cities"])
+else:
+    app.include_router(contractors.router, prefix="/api", tags=["contractors"])
+    app.include_router(cities.router, prefix="/api", tags=["cities"])
 
 
 @app.get("/")
@@ -32,6 +90,72 @@ def read_root():
     return {"message": "Contractor Finder API is running"}
 
 
+def live_pool_stats() -> dict[str, dict] | None:
+    """Statistics of every connection pool, or ``None`` before the engines are created."""
+    router = current_read_router(DB_ASYNC)
+    if router is None:
+        return None
+    prefix = "async-" if DB_ASYNC else ""
+    pools = {"async" if DB_ASYNC else "sync": pool_stats(router.primary.pool)}
+    for index, replica in enumerate(router.replicas):
+        pools[f"{prefix}replica-{index}"] = pool_stats(replica.pool)
+    return pools
+
+
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    """
+    Report that the process is alive, with live pool and admission queue statistics.
+
+    Never creates an engine or reads the database configuration, so liveness
+    does not depend on the database; pools are reported once startup has
+    created them. Database checks belong to ``/ready``.
+    """
+    health = {"status": "healthy", "admission": admission_stats()}
+    pools = live_pool_stats()
+    if pools is not None:
+        health["pools"] = pools
+    return health
+
+
+@app.get("/ready")
+async def readiness_check(request: Request):
+    """
+    Report whether this worker can take traffic.
+
+    Unlike ``/health`` (liveness), this answers 503 until startup has
+    finished and whenever the primary database cannot be reached.
+    """
+    if not request.app.state.ready:
+        return FastJSONResponse({"status": "starting"}, status_code=503)
+    try:
+        if DB_ASYNC:
+            await check_async_connection(get_async_engine())
+        else:
+            await run_in_threadpool(check_connection, get_engine())
+    except SQLAlchemyError as exc:
+        return FastJSONResponse(
+            {"status": "unavailable", "detail": type(exc).__name__}, status_code=503
+        )
+    return {"status": "ready"}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Get search result cache and in-flight search coalescing counters."""
+    return {"search": search_cache.stats(), "coalescing": search_flights.stats()}
+
+
+@app.get("/pool/stats")
+def pool_statistics():
+    """Get live connection pool and admission queue statistics; 503 before startup."""
+    pools = live_pool_stats()
+    if pools is None:
+        return FastJSONResponse({"detail": "Connection pools not created yet"}, status_code=503)
+    return {"pools": pools, "admission": admission_stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Expose request, search phase and SQL metrics in Prometheus text format."""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
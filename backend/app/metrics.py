@@ -0,0 +1,261 @@
+"""Request timing, search phase spans and SQL metrics in Prometheus text format.
+
+Metrics are plain in-process counters and fixed-bucket histograms: an
+observation is a bisect plus a few additions under a lock, cheap enough
+to leave on in production. ``GET /metrics`` renders them for scraping.
+Set ``METRICS_ENABLED=false`` to turn every recording into a no-op.
+"""
+
+import bisect
+import threading
+import time
+from collections.abc import Iterable, Sequence
+from typing import TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.env import env_flag
+
+METRICS_ENABLED = env_flag("METRICS_ENABLED", default=True)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond cache hits up to multi-second full scans
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+SQL_OPERATIONS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE"))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        """Add ``amount`` to the series identified by ``labelvalues``."""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        """Current value of a series."""
+        return self._values.get(labelvalues, 0.0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labelvalues, value in values:
+            yield f"{self.name}_total{_labels(self.labelnames, labelvalues)} {value:g}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Fixed-bucket histogram with a fixed set of label names."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # Per series: [non-cumulative bucket counts..., overflow count], sum
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """Record one observation in the series identified by ``labelvalues``."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, *labelvalues: str) -> int:
+        """Number of observations in a series."""
+        series = self._series.get(labelvalues)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            snapshot = [
+                (key, list(counts), total[0]) for key, (counts, total) in self._series.items()
+            ]
+        for labelvalues, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _labels(self.labelnames, labelvalues, f'le="{le}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {total:.6g}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+MetricT = TypeVar("MetricT", Counter, Histogram)
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together by ``GET /metrics``."""
+
+    def __init__(self) -> None:
+        self.metrics: list[Counter | Histogram] = []
+
+    def register(self, metric: MetricT) -> MetricT:
+        """Add ``metric`` to the rendered output and return it."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Reset every metric."""
+        for metric in self.metrics:
+            metric.clear()
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time spent handling HTTP requests, including streaming the body.",
+        ("method", "route", "status"),
+    )
+)
+SQL_QUERIES = registry.register(Counter("db_queries", "SQL statements executed.", ("operation",)))
+SQL_DURATION = registry.register(
+    Histogram("db_query_duration_seconds", "SQL statement execution time.", ("operation",))
+)
+SEARCH_PHASES = registry.register(
+    Histogram(
+        "contractor_search_phase_seconds",
+        "Time spent in each phase of a contractor search.",
+        ("phase",),
+    )
+)
+
+
+class Span:
+    """Time a hot-path phase of a contractor search into ``SEARCH_PHASES``."""
+
+    __slots__ = ("phase", "start")
+
+    def __init__(self, phase: str) -> None:
+        self.phase = phase
+        self.start = 0.0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if METRICS_ENABLED:
+            SEARCH_PHASES.observe(time.perf_counter() - self.start, self.phase)
+
+
+class TimingMiddleware:
+    """ASGI middleware recording request durations per route template and status."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The route template keeps the label set bounded (no raw ids or query strings)
+            route = scope.get("route")
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            )
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip()[:6].upper()
+    return keyword if keyword in SQL_OPERATIONS else "OTHER"
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, statement, _parameters, _context, _executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+    operation = _operation(statement)
+    SQL_QUERIES.inc(operation)
+    SQL_DURATION.observe(elapsed, operation)
+
+
+def _handle_error(context) -> None:
+    starts = context.connection.info.get("metrics_query_start") if context.connection else None
+    if starts:
+        starts.pop()
+
+
+def install_sql_metrics() -> None:
+    """Count and time SQL statements on every engine, sync and async alike."""
+    if METRICS_ENABLED and not event.contains(
+        Engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
@@ -0,0 +1,162 @@
+"""Schema migrations for the Contractor Finder application.
+
+Each migration is idempotent: it inspects the live schema and only applies
+what is missing, so the command is safe to run on every deploy. Only the
+migrations that changed something are reported::
+
+    python -m app.migrations
+"""
+
+from collections.abc import Callable, Sequence
+
+from sqlalchemy import (
+    Column,
+    Connection,
+    Engine,
+    Index,
+    bindparam,
+    inspect,
+    or_,
+    select,
+    update,
+)
+
+from app.database import Base, get_engine
+from app.models import Contractor, spatial_columns
+
+BACKFILL_BATCH_SIZE = 1000
+
+SPATIAL_COLUMNS = ("geohash", "unit_x", "unit_y", "unit_z")
+UNIT_VECTOR_COLUMNS = ("unit_x", "unit_y", "unit_z")
+
+# Composite indexes added by add_contractor_filter_indexes
+FILTER_INDEXES = (
+    "ix_contractors_city_specialty",
+    "ix_contractors_specialty_location",
+    "ix_contractors_location",
+)
+
+
+def _add_column(connection: Connection, column: Column) -> bool:
+    """Add ``column`` to its table if the table does not have it yet."""
+    table = column.table
+    existing = {c["name"] for c in inspect(connection).get_columns(table.name)}
+    if column.name in existing:
+        return False
+
+    column_type = column.type.compile(dialect=connection.dialect)
+    connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+    return True
+
+
+def _create_index(connection: Connection, index: Index) -> bool:
+    """Create ``index`` if its table does not have it yet."""
+    existing = {i["name"] for i in inspect(connection).get_indexes(index.table.name)}
+    if index.name in existing:
+        return False
+
+    index.create(connection)
+    return True
+
+
+def backfill_spatial_columns(
+    connection: Connection,
+    columns: Sequence[str] = SPATIAL_COLUMNS,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+) -> int:
+    """
+    Fill precomputed spatial columns for rows written before they existed.
+
+    Args:
+        connection: Open database connection
+        columns: Spatial columns to fill, a subset of :func:`spatial_columns` keys
+        batch_size: Number of rows updated per round trip
+
+    Returns:
+        Number of rows backfilled
+    """
+    table = Contractor.__table__
+    missing = or_(*[table.c[name].is_(None) for name in columns])
+    total = 0
+
+    while True:
+        rows = connection.execute(
+            select(table.c.id, table.c.latitude, table.c.longitude).where(missing).limit(batch_size)
+        ).all()
+        if not rows:
+            return total
+
+        params = []
+        for row in rows:
+            values = spatial_columns(row.latitude, row.longitude)
+            params.append({"row_id": row.id, **{name: values[name] for name in columns}})
+        connection.execute(update(table).where(table.c.id == bindparam("row_id")), params)
+        total += len(rows)
+
+
+def add_contractor_geohash(connection: Connection) -> bool:
+    """Add the geohash spatial index column to contractors and backfill it."""
+    table = Contractor.__table__
+    added = _add_column(connection, table.c.geohash)
+    index = next(i for i in table.indexes if i.name == "ix_contractors_geohash")
+    indexed = _create_index(connection, index)
+    backfilled = backfill_spatial_columns(connection, ["geohash"])
+    return added or indexed or backfilled > 0
+
+
+def add_contractor_unit_vectors(connection: Connection) -> bool:
+    """Add the unit-sphere coordinate columns to contractors and backfill them."""
+    table = Contractor.__table__
+    added = [_add_column(connection, table.c[name]) for name in UNIT_VECTOR_COLUMNS]
+    backfilled = backfill_spatial_columns(connection, UNIT_VECTOR_COLUMNS)
+    return any(added) or backfilled > 0
+
+
+def add_contractor_filter_indexes(connection: Connection) -> bool:
+    """Add the composite indexes used by the contractor filter combinations."""
+    created = [
+        _create_index(connection, index)
+        for index in Contractor.__table__.indexes
+        if index.name in FILTER_INDEXES
+    ]
+    return any(created)
+
+
+# Each migration returns whether it changed the schema or backfilled rows
+MIGRATIONS: list[tuple[str, Callable[[Connection], bool]]] = [
+    ("add_contractor_geohash", add_contractor_geohash),
+    ("add_contractor_filter_indexes", add_contractor_filter_indexes),
+    ("add_contractor_unit_vectors", add_contractor_unit_vectors),
+]
+
+
+def migrate(bind: Engine | None = None) -> list[str]:
+    """
+    Create missing tables and apply every migration.
+
+    This is the only place the schema is created; the web app never does it.
+
+    Args:
+        bind: Engine to migrate; defaults to the ``DATABASE_URL`` engine
+
+    Returns:
+        Names of the migrations that changed something; on an up-to-date
+        database this is empty
+    """
+    bind = bind or get_engine()
+    Base.metadata.create_all(bind=bind)
+
+    applied = []
+    for name, step in MIGRATIONS:
+        with bind.begin() as connection:
+            if step(connection):
+                applied.append(name)
+    return applied
+
+
+if __name__ == "__main__":
+    applied = migrate()
+    for name in applied:
+        print(f"Applied migration: {name}")
+    if not applied:
+        print("Schema is up to date")
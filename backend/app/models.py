@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Enum, Float, ForeignKey, Integer, String
+from sqlalchemy import Column, Double, Enum, Float, ForeignKey, Index, Integer, String, event
 from sqlalchemy.orm import relationship
 
-from app.constants import Specialty
+from app.constants import PriceRange, Specialty
 from app.database import Base
+from app.geo import GEOHASH_PRECISION, encode_geohash, to_unit_vector
 
 
 class City(Base):
@@ -20,16 +21,52 @@ class City(Base):
 
 class Contractor(Base):
     __tablename__ = "contractors"
+    __table_args__ = (
+        # Covers the city + specialty filter combination and specialty-only filters
+        Index("ix_contractors_city_specialty", "city_id", "specialty"),
+        Index("ix_contractors_specialty_location", "specialty", "latitude", "longitude"),
+        # Bounding-box prefilter of location searches without a specialty
+        Index("ix_contractors_location", "latitude", "longitude"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
     specialty = Column(Enum(Specialty), nullable=False)
+    location = Column(String(200), nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
+    price_range = Column(Enum(PriceRange), nullable=False)
     phone = Column(String(25))
     email = Column(String(75))
     description = Column(String(500))
     city_id = Column(Integer, ForeignKey("cities.id"), nullable=False, index=True)
 
+    # Precomputed spatial index columns, see spatial_columns()
+    geohash = Column(String(GEOHASH_PRECISION), index=True)
+    # Position on the unit sphere, so distances need no trig at query time.
+    # Double precision: a single-precision unit vector is only accurate to ~1 km
+    unit_x = Column(Double)
+    unit_y = Column(Double)
+    unit_z = Column(Double)
+
     # Relationship with city
     city = relationship("City", back_populates="contractors")
+
+
+def spatial_columns(latitude: float, longitude: float) -> dict:
+    """Compute the precomputed spatial index column values for a coordinate."""
+    unit_x, unit_y, unit_z = to_unit_vector(latitude, longitude)
+    return {
+        "geohash": encode_geohash(latitude, longitude),
+        "unit_x": unit_x,
+        "unit_y": unit_y,
+        "unit_z": unit_z,
+    }
+
+
+@event.listens_for(Contractor, "before_insert")
+@event.listens_for(Contractor, "before_update")
+def set_spatial_columns(_mapper, _connection, target: Contractor) -> None:
+    """Keep the spatial index columns in sync with the contractor's coordinates."""
+    for key, value in spatial_columns(target.latitude, target.longitude).items():
+        setattr(target, key, value)
@@ -0,0 +1,153 @@
+"""Keyset pagination and NDJSON streaming helpers for list endpoints."""
+
+import base64
+import binascii
+import json
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from typing import Any
+
+from fastapi import HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from app.reference_cache import serialize
+
+MAX_PAGE_SIZE = 1000
+
+# Rows fetched per round trip from the server-side cursor while streaming
+STREAM_BATCH_SIZE = 500
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class PageParams:
+    """Query parameters shared by keyset-paginated endpoints."""
+
+    def __init__(
+        self,
+        cursor: str | None = Query(
+            None, description=f"Opaque cursor from a previous {NEXT_CURSOR_HEADER} header"
+        ),
+        page_size: int | None = Query(
+            None, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of results per page"
+        ),
+    ) -> None:
+        self.cursor = cursor
+        self.page_size = page_size
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the client asked for a page rather than the full list."""
+        return self.cursor is not None or self.page_size is not None
+
+    def after(self, *types: type) -> tuple | None:
+        """
+        Decode the cursor into the sort key of the last row already returned.
+
+        Args:
+            types: Expected type of each sort key component
+
+        Raises:
+            HTTPException: 400 if the cursor does not match the expected key
+        """
+        if self.cursor is None:
+            return None
+
+        key = decode_cursor(self.cursor)
+        if len(key) != len(types):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        try:
+            return tuple(cast(value) for cast, value in zip(types, key, strict=True))
+        except (TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def encode_cursor(key: Iterable) -> str:
+    """Encode a row's sort key as an opaque, URL-safe cursor."""
+    payload = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """
+    Decode a cursor produced by :func:`encode_cursor`.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(payload)
+    except (binascii.Error, ValueError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+    if not isinstance(key, list) or not key:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Whether the client negotiated a newline-delimited JSON stream."""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by :func:`serialize` (orjson) instead of ``json.dumps``."""
+
+    def render(self, content: Any) -> bytes:
+        return serialize(content)
+
+
+def encode_row(row: Any) -> bytes:
+    """Serialize a response model, or an already trusted result row or dict, to JSON bytes."""
+    if isinstance(row, BaseModel):
+        return row.model_dump_json().encode()
+    return serialize(row)
+
+
+def ndjson_response(
+    rows: Iterable[Any] | AsyncIterable[Any],
+    next_cursor: str | None = None,
+) -> StreamingResponse:
+    """
+    Stream rows as newline-delimited JSON, serializing each row as it is produced.
+
+    Args:
+        rows: Lazily produced response models, result rows or dicts, from a sync or async source
+        next_cursor: Cursor for the following page, if any
+
+    Returns:
+        Streaming response that never holds more than one serialized row
+    """
+    if isinstance(rows, AsyncIterable):
+
+        async def lines() -> AsyncIterator[bytes]:
+            async for row in rows:
+                yield encode_row(row) + b"\n"
+
+    else:
+
+        def lines() -> Iterator[bytes]:
+            for row in rows:
+                yield encode_row(row) + b"\n"
+
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+def json_response(rows: Iterable[Any], next_cursor: str | None = None) -> Response:
+    """
+    Serialize trusted result rows or dicts into a JSON array in a single pass.
+
+    Bypasses FastAPI's response-model validation, which would otherwise
+    rebuild a model for every row read from the database.
+    """
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return FastJSONResponse(list(rows), headers=headers)
+
+
+def set_next_cursor(response: Response, next_cursor: str | None) -> None:
+    """Advertise the next page's cursor on a regular JSON response."""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
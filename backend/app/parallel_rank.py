@@ -0,0 +1,151 @@
+"""Opt-in process-pool scoring for very large radius search candidate sets.
+
+Unfiltered radius queries can load most of the contractors table, and
+scoring them runs on one core inside the request thread. With
+``PARALLEL_RANK=true``, candidate sets of at least
+``PARALLEL_RANK_MIN_CANDIDATES`` rows are split into contiguous shards and
+scored by a pool of ``PARALLEL_RANK_WORKERS`` processes.
+
+Coordinates are not pickled: the parent writes the candidates' unit vectors
+once into a shared memory block, and each worker maps its slice of that
+block, scores it and returns only the indices and distances it keeps. Every
+shard comes back sorted, so the parent merges them with a stable sort over
+already-ordered runs. Results are identical to :func:`app.geo.rank_by_unit_vectors`,
+including the id order of ties.
+
+Waiting on the shards blocks the calling thread. Searches call it from a
+threadpool worker on both the sync and the ``DB_ASYNC`` routes, never on the
+event loop.
+
+Worker processes are spawned on first use and only import this module and
+:mod:`app.geo`, never the database or the web app.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections.abc import Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.env import env_flag
+from app.geo import DISTANCE_DECIMALS, nearest_indices, to_unit_vector, unit_vector_distances
+
+PARALLEL_RANK_ENABLED = env_flag("PARALLEL_RANK")
+# Below this many candidates, process start-up and result transfer cost more than they save
+PARALLEL_RANK_MIN_CANDIDATES = int(os.getenv("PARALLEL_RANK_MIN_CANDIDATES", "200000"))
+PARALLEL_RANK_WORKERS = int(os.getenv("PARALLEL_RANK_WORKERS", "0")) or os.cpu_count() or 1
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def use_parallel(candidates: int) -> bool:
+    """Whether a candidate set is large enough to be scored by the process pool."""
+    return (
+        PARALLEL_RANK_ENABLED
+        and PARALLEL_RANK_WORKERS > 1
+        and candidates >= PARALLEL_RANK_MIN_CANDIDATES
+    )
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the shared scoring pool, spawning it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                PARALLEL_RANK_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def shutdown() -> None:
+    """Stop the scoring pool, if it was started."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+def _rank_shard(
+    name: str,
+    count: int,
+    start: int,
+    stop: int,
+    origin: tuple[float, float, float],
+    max_distance: float | None,
+    limit: int | None,
+):
+    """Score rows ``start:stop`` of the shared unit-vector block (runs in a worker)."""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        points = np.ndarray((count, 3), dtype=np.float64, buffer=block.buf)
+        distances = np.round(unit_vector_distances(origin, points[start:stop]), DISTANCE_DECIMALS)
+        # Views into the block must be released before it can be closed
+        del points
+    finally:
+        block.close()
+
+    indices = nearest_indices(distances, max_distance, limit)
+    return indices + start, distances[indices]
+
+
+def rank_parallel(
+    latitude: float,
+    longitude: float,
+    unit_vectors: Sequence[tuple[float, float, float]],
+    max_distance: float | None = None,
+    limit: int | None = None,
+    executor: Executor | None = None,
+    shards: int | None = None,
+) -> tuple[list[int], list[float]]:
+    """
+    Score candidates against an origin across the process pool.
+
+    Args:
+        latitude: Origin latitude
+        longitude: Origin longitude
+        unit_vectors: Candidate (x, y, z) points on the unit sphere
+        max_distance: Optional maximum distance in km
+        limit: Optional number of nearest candidates to keep
+        executor: Pool to run on; defaults to the shared pool
+        shards: Number of shards; defaults to ``PARALLEL_RANK_WORKERS``
+
+    Returns:
+        Tuple of (candidate indices, rounded distances), nearest first, like
+        :func:`app.geo.rank_by_unit_vectors`
+    """
+    count = len(unit_vectors)
+    if count == 0:
+        return [], []
+
+    executor = executor or get_executor()
+    shards = max(1, min(shards or PARALLEL_RANK_WORKERS, count))
+    origin = to_unit_vector(latitude, longitude)
+    bounds = np.linspace(0, count, shards + 1, dtype=np.int64)
+
+    block = shared_memory.SharedMemory(create=True, size=count * 3 * 8)
+    try:
+        points = np.ndarray((count, 3), dtype=np.float64, buffer=block.buf)
+        points[:] = unit_vectors
+        del points
+        futures = [
+            executor.submit(
+                _rank_shard, block.name, count, int(start), int(stop), origin, max_distance, limit
+            )
+            for start, stop in zip(bounds[:-1], bounds[1:], strict=True)
+        ]
+        parts = [future.result() for future in futures]
+    finally:
+        block.close()
+        block.unlink()
+
+    indices = np.concatenate([part[0] for part in parts])
+    distances = np.concatenate([part[1] for part in parts])
+    # Shards are sorted runs in index order, so a stable sort is a cheap k-way merge
+    order = np.argsort(distances, kind="stable")[:limit]
+    return indices[order].tolist(), distances[order].tolist()
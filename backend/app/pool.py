@@ -0,0 +1,224 @@
+"""Database connection pool configuration, warmup and live statistics.
+
+Server databases get a ``QueuePool`` sized from the environment:
+
+- ``DB_POOL_SIZE`` connections kept open, plus up to ``DB_MAX_OVERFLOW``
+  extra connections opened under bursts and closed when returned
+- ``DB_POOL_TIMEOUT`` seconds a request waits for a free connection before
+  failing, instead of queueing indefinitely
+- ``DB_POOL_RECYCLE`` seconds after which a connection is replaced, kept
+  below MySQL's ``wait_timeout`` so the server never drops it first
+- ``DB_POOL_PRE_PING`` to test each connection on checkout and transparently
+  reconnect connections the server closed while idle
+
+At startup the pool is warmed with ``DB_POOL_WARMUP`` connections (the pool
+size by default), so the first requests after a deploy don't pay for the
+connection handshakes. The pool also times every checkout; ``GET /health``
+and ``GET /pool/stats`` report checked-out and overflow connections alongside
+those wait times, which is what the pool should be sized against.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import AsyncExitStack, ExitStack
+
+from sqlalchemy import exc, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.env import env_flag
+from app.metrics import METRICS_ENABLED, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+POOL_PRE_PING = env_flag("DB_POOL_PRE_PING", default=True)
+POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", str(POOL_SIZE)))
+
+POOL_CHECKOUT_WAIT = registry.register(
+    Histogram(
+        "db_pool_checkout_seconds",
+        "Time to obtain a pooled connection, including waiting for a free one.",
+        ("pool",),
+    )
+)
+
+
+class CheckoutStats:
+    """Running totals of connection checkout times for one pool."""
+
+    __slots__ = ("_lock", "checkouts", "total", "max", "timeouts")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.timeouts = 0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            average = self.total / self.checkouts if self.checkouts else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_ms": round(average * 1000, 3),
+                "max_ms": round(self.max * 1000, 3),
+            }
+
+
+class _TimedCheckout:
+    """Pool mixin timing every checkout into ``checkout_stats`` and the metrics."""
+
+    label = "sync"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.checkout_stats.timeout()
+            raise
+        elapsed = time.perf_counter() - start
+        self.checkout_stats.record(elapsed)
+        if METRICS_ENABLED:
+            POOL_CHECKOUT_WAIT.observe(elapsed, self.label)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() replaces the pool; the totals carry over
+        pool = super().recreate()
+        pool.checkout_stats = self.checkout_stats
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """``QueuePool`` recording checkout times."""
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """``AsyncAdaptedQueuePool`` recording checkout times."""
+
+    label = "async"
+
+
+def pool_options(url: str, asynchronous: bool = False) -> dict:
+    """
+    Connection pool settings from the environment.
+
+    SQLite uses SQLAlchemy's single-connection pools, which take no sizing
+    options, so only server databases get them.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": TimedAsyncQueuePool if asynchronous else TimedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+
+
+def _warmup_count(pool: Pool, connections: int) -> int:
+    # Overflow connections are closed on return, so warming beyond the pool size is wasted
+    limit = pool.size() if isinstance(pool, QueuePool) else 1
+    return max(0, min(connections, limit))
+
+
+def warm_pool(engine: Engine, connections: int = POOL_WARMUP) -> int:
+    """
+    Open pooled connections ahead of the first requests.
+
+    The connections are checked out together, so each one is a separate
+    physical connection, and then returned to the pool. A database that is
+    not reachable yet is logged rather than raised: the pool simply fills
+    on demand once it is.
+
+    Args:
+        engine: Engine whose pool to warm
+        connections: Number of connections to open, capped at the pool size
+
+    Returns:
+        Number of connections opened
+    """
+    opened = 0
+    with ExitStack() as stack:
+        try:
+            for _ in range(_warmup_count(engine.pool, connections)):
+                stack.enter_context(engine.connect())
+                opened += 1
+        except exc.SQLAlchemyError as error:
+            logger.warning("Pool warmup stopped after %d connections: %s", opened, error)
+    return opened
+
+
+async def warm_async_pool(engine: AsyncEngine, connections: int = POOL_WARMUP) -> int:
+    """Async counterpart of :func:`warm_pool`."""
+    opened = 0
+    async with AsyncExitStack() as stack:
+        try:
+            for _ in range(_warmup_count(engine.pool, connections)):
+                await stack.enter_async_context(engine.connect())
+                opened += 1
+        except exc.SQLAlchemyError as error:
+            logger.warning("Pool warmup stopped after %d connections: %s", opened, error)
+    return opened
+
+
+def check_connection(engine: Engine) -> None:
+    """Run a trivial query on a pooled connection; raises if the database is unreachable."""
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+async def check_async_connection(engine: AsyncEngine) -> None:
+    """Async counterpart of :func:`check_connection`."""
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+def pool_stats(pool: Pool) -> dict:
+    """
+    Live statistics of a connection pool.
+
+    Returns:
+        Dict with the pool class, and for queue pools its size, idle,
+        checked-out and overflow connections and checkout times
+    """
+    stats: dict = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            # overflow() counts up from -size; only connections beyond the pool size are overflow
+            overflow=max(pool.overflow(), 0),
+        )
+    checkout_stats = getattr(pool, "checkout_stats", None)
+    if checkout_stats is not None:
+        stats["checkout"] = checkout_stats.as_dict()
+    return stats
@@ -0,0 +1,167 @@
+"""Pre-serialized, ETag-validated payloads for rarely changing reference data.
+
+Reference endpoints (cities, specialties) are fetched on every frontend page
+load. Their JSON bodies are built once, hashed into a strong ETag and served
+as raw bytes; clients that send a matching ``If-None-Match`` get a 304.
+"""
+
+import hashlib
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+import orjson
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class ReferencePayload:
+    """A serialized response body and its strong ETag."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def _encode_slots(value: Any) -> Any:
+    """Encode slotted objects (such as search result rows) as JSON objects."""
+    slots = getattr(type(value), "__slots__", None)
+    if slots is None:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return {name: getattr(value, name) for name in slots}
+
+
+def serialize(data: Any) -> bytes:
+    """
+    Serialize ``data`` to compact UTF-8 JSON bytes.
+
+    orjson writes bytes directly and encodes enums and slotted dataclasses
+    natively; other slotted objects go through their ``__slots__``.
+    """
+    return orjson.dumps(data, default=_encode_slots)
+
+
+class ReferenceCache:
+    """
+    Lazily built payload that is rebuilt only after it is invalidated.
+
+    Sync callers pass a ``build`` function and use :meth:`get`; async callers
+    load the data themselves and use :meth:`peek`, :attr:`version` and :meth:`put`.
+
+    ``max_age`` bounds how long a payload is trusted without a rebuild, which
+    only matters for writes made by other processes; rebuilding unchanged
+    data yields the same ETag, so clients keep getting 304s.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[Session], Any],
+        cache_control: str,
+        max_age: float | None = None,
+    ) -> None:
+        self.build = build
+        self.cache_control = cache_control
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._payload: ReferencePayload | None = None
+        self._built_at = 0.0
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        """Invalidation counter; read it before loading the data passed to :meth:`put`."""
+        return self._version
+
+    def get(self, db: Session) -> ReferencePayload:
+        """Return the current payload, building it if needed."""
+        payload = self.peek()
+        if payload is None:
+            version = self._version
+            payload = self.put(self.build(db), version)
+        return payload
+
+    def peek(self) -> ReferencePayload | None:
+        """Return the current payload if it is still valid, without building it."""
+        payload = self._payload
+        if payload is None or self._expired():
+            return None
+        return payload
+
+    def put(self, data: Any, version: int | None = None) -> ReferencePayload:
+        """
+        Serialize freshly loaded data into the current payload.
+
+        Args:
+            data: Data loaded from the database
+            version: :attr:`version` read before the data was loaded; when the
+                cache was invalidated since, the data may predate the commit, so
+                the payload is returned for this request but not stored
+        """
+        payload = ReferencePayload(serialize(data))
+        with self._lock:
+            if version is None or version == self._version:
+                self._payload = payload
+                self._built_at = time.monotonic()
+        return payload
+
+    def invalidate(self) -> None:
+        """Drop the payload so the next request rebuilds it."""
+        with self._lock:
+            self._payload = None
+            self._version += 1
+
+    def response(self, request: Request, db: Session) -> Response:
+        """Serve the payload, answering conditional requests with 304 Not Modified."""
+        return conditional_response(request, self.get(db), self.cache_control)
+
+    def _expired(self) -> bool:
+        return self.max_age is not None and time.monotonic() - self._built_at > self.max_age
+
+
+def conditional_response(
+    request: Request, payload: ReferencePayload, cache_control: str
+) -> Response:
+    """Serve ``payload``, or a bodiless 304 if the client already has this version."""
+    headers = {"ETag": payload.etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an ``If-None-Match`` header against an ETag using weak comparison."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def invalidate_on_commit(model: type, cache: ReferenceCache) -> None:
+    """
+    Invalidate ``cache`` whenever a session commits changes to ``model`` rows.
+
+    Invalidating at commit (not at flush) keeps concurrent requests from
+    rebuilding the payload from data that is about to be rolled back.
+    """
+    flag = f"reference_cache_dirty:{id(cache)}"
+
+    @event.listens_for(Session, "after_flush")
+    def _mark(session: Session, _flush_context) -> None:
+        changed = (*session.new, *session.dirty, *session.deleted)
+        if any(isinstance(obj, model) for obj in changed):
+            session.info[flag] = True
+
+    @event.listens_for(Session, "after_commit")
+    def _invalidate(session: Session) -> None:
+        if session.info.pop(flag, False):
+            cache.invalidate()
+
+    @event.listens_for(Session, "after_rollback")
+    def _discard(session: Session) -> None:
+        session.info.pop(flag, None)
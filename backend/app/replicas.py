@@ -0,0 +1,155 @@
+"""Read/write routing between the primary database and read replicas.
+
+Writes always use the primary. Read-only routes (searches, lookups, city
+listings) get a session on one of the ``DATABASE_REPLICA_URLS``, picked by
+``DB_REPLICA_SELECTION``:
+
+- ``round_robin`` cycles through the replicas
+- ``least_connections`` picks the replica with the fewest checked-out
+  connections in its pool
+
+Each replica has its own connection pool. A replica that fails to hand out a
+connection is skipped for ``DB_REPLICA_RETRY_SECONDS``, and when no replica
+is available reads fall back to the primary.
+
+Replicas lag behind the primary, so after a write the client gets a
+short-lived cookie that keeps its reads on the primary for
+``DB_READ_YOUR_WRITES_SECONDS``: a contractor is visible to whoever created
+it as soon as the create returns.
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from collections.abc import Sequence
+from typing import Generic, TypeVar
+
+from fastapi import Request, Response
+from sqlalchemy import exc
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+REPLICA_SELECTION = os.getenv("DB_REPLICA_SELECTION", "round_robin")
+REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+SELECTIONS = ("round_robin", "least_connections")
+READ_PRIMARY_COOKIE = "read_primary_until"
+# Tolerated clock difference between the worker that set the cookie and the one reading it
+CLOCK_SKEW_SECONDS = 1.0
+
+# Errors meaning a replica could not provide a connection; the read is retried elsewhere
+CONNECT_ERRORS = (exc.OperationalError, exc.InterfaceError, exc.TimeoutError)
+
+EngineT = TypeVar("EngineT", Engine, AsyncEngine)
+
+
+class ReadRouter(Generic[EngineT]):
+    """Chooses the engine serving each read-only request."""
+
+    def __init__(
+        self,
+        primary: EngineT,
+        replicas: Sequence[EngineT] = (),
+        selection: str = REPLICA_SELECTION,
+        retry_seconds: float = REPLICA_RETRY_SECONDS,
+    ) -> None:
+        if selection not in SELECTIONS:
+            raise ValueError(f"DB_REPLICA_SELECTION must be one of {', '.join(SELECTIONS)}")
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.selection = selection
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._down_until = [0.0] * len(self.replicas)
+
+    def candidates(self, primary: bool = False) -> list[EngineT]:
+        """
+        Engines to try for a read, in order; the primary is always last.
+
+        Args:
+            primary: Skip the replicas (read-your-writes window)
+        """
+        if primary or not self.replicas:
+            return [self.primary]
+
+        now = time.monotonic()
+        up = [i for i, until in enumerate(self._down_until) if until <= now]
+        if self.selection == "least_connections":
+            up.sort(key=lambda i: _checked_out(self.replicas[i]))
+        elif up:
+            start = next(self._turn) % len(up)
+            up = up[start:] + up[:start]
+        return [self.replicas[i] for i in up] + [self.primary]
+
+    def mark_down(self, engine: EngineT, error: Exception) -> None:
+        """Skip a replica for ``retry_seconds`` after it failed to connect."""
+        index = self.replicas.index(engine)
+        with self._lock:
+            self._down_until[index] = time.monotonic() + self.retry_seconds
+        logger.warning(
+            "Read replica %s unavailable for %.0fs: %s", engine.url, self.retry_seconds, error
+        )
+
+    def connect(self: "ReadRouter[Engine]", primary: bool = False) -> Connection:
+        """Open a connection for a read, falling back past failing replicas to the primary."""
+        *replicas, fallback = self.candidates(primary)
+        for engine in replicas:
+            try:
+                return engine.connect()
+            except CONNECT_ERRORS as error:
+                self.mark_down(engine, error)
+        return fallback.connect()
+
+    async def connect_async(
+        self: "ReadRouter[AsyncEngine]", primary: bool = False
+    ) -> AsyncConnection:
+        """Async counterpart of :meth:`connect`."""
+        *replicas, fallback = self.candidates(primary)
+        for engine in replicas:
+            try:
+                return await engine.connect()
+            except CONNECT_ERRORS as error:
+                self.mark_down(engine, error)
+        return await fallback.connect()
+
+
+def _checked_out(engine: Engine | AsyncEngine) -> int:
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return checkedout() if checkedout else 0
+
+
+def reads_primary(request: Request) -> bool:
+    """
+    Whether the client wrote recently enough that its reads must see the primary.
+
+    The cookie is client controlled: a deadline further away than one
+    read-your-writes window was never set by :func:`mark_written`, and is
+    ignored rather than pinning the client to the primary indefinitely.
+    """
+    try:
+        until = float(request.cookies.get(READ_PRIMARY_COOKIE, "0"))
+    except ValueError:
+        return False
+    now = time.time()
+    return now < until <= now + READ_YOUR_WRITES_SECONDS + CLOCK_SKEW_SECONDS
+
+
+def mark_written(response: Response) -> None:
+    """Pin the client's reads to the primary for the read-your-writes window."""
+    if REPLICA_URLS and READ_YOUR_WRITES_SECONDS > 0:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}",
+            max_age=max(1, round(READ_YOUR_WRITES_SECONDS)),
+            httponly=True,
+            samesite="lax",
+        )
@@ -0,0 +1,61 @@
+"""Async variant of the cities router, served when ``DB_ASYNC`` is enabled."""
+
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_read_db
+from app.pagination import PageParams, ndjson_response, set_next_cursor, wants_ndjson
+from app.reference_cache import conditional_response
+from app.routers.cities import (
+    CityResponse,
+    all_cities_statement,
+    cities_cache,
+    cities_statement,
+    city_rows,
+    paginate_cities,
+)
+
+router = APIRouter(prefix="/cities", tags=["cities"])
+
+
+@router.get("/", response_model=list[CityResponse])
+async def get_cities(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Get all cities.
+
+    Args:
+        request: Incoming request, used to negotiate NDJSON streaming
+        response: Outgoing response, used to set the next-page cursor header
+        page: Keyset pagination parameters, keyed on (name, id)
+        db: Async database session
+
+    Returns:
+        List of cities in the system, ordered by name
+    """
+    if not page.enabled and not wants_ndjson(request):
+        payload = cities_cache.peek()
+        if payload is None:
+            version = cities_cache.version
+            cities = await db.scalars(all_cities_statement())
+            payload = cities_cache.put(city_rows(cities.all()), version)
+        return conditional_response(request, payload, cities_cache.cache_control)
+
+    statement = cities_statement(page)
+    if page.page_size is None:
+        cities = await db.stream_scalars(statement)
+        results = (CityResponse.model_validate(city) async for city in cities)
+        if wants_ndjson(request):
+            return ndjson_response(results)
+        return [result async for result in results]
+
+    cities, next_cursor = paginate_cities((await db.scalars(statement)).all(), page)
+    results = [CityResponse.model_validate(city) for city in cities]
+    if wants_ndjson(request):
+        return ndjson_response(results, next_cursor)
+    set_next_cursor(response, next_cursor)
+    return results
@@ -0,0 +1,186 @@
+"""Async variant of the contractors router, served when ``DB_ASYNC`` is enabled.
+
+Request handling matches :mod:`app.routers.contractors`; only statement
+execution differs, so the event loop is never blocked on the database, and
+scoring and index builds run in worker threads.
+"""
+
+from collections.abc import AsyncIterable
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.bulk_load import (
+    BulkLoad,
+    batched,
+    body_records,
+    insert_batch,
+    ndjson_lines,
+    validate_batch,
+)
+from app.constants import SearchSort, Specialty
+from app.database import get_async_db, get_async_read_db
+from app.metrics import Span
+from app.models import City, Contractor
+from app.pagination import NDJSON_MEDIA_TYPE, PageParams, json_response, wants_ndjson
+from app.reference_cache import conditional_response
+from app.replicas import mark_written, reads_primary
+from app.schemas import (
+    BatchSearchRequest,
+    BatchSearchResult,
+    BulkLoadResponse,
+    ContractorCreate,
+    ContractorResponse,
+)
+from app.search import (
+    MAX_LIMIT,
+    MAX_QUERY_LENGTH,
+    SPECIALTIES_CACHE_CONTROL,
+    SPECIALTIES_PAYLOAD,
+    batch_search,
+    contractor_search,
+    contractor_written,
+    contractors_bulk_written,
+    run_search_async,
+    search_response,
+)
+
+router = APIRouter()
+
+
+@router.get("/contractors", response_model=list[ContractorResponse])
+async def get_contractors(
+    request: Request,
+    city_id: int | None = Query(None, description="Filter by city ID"),
+    specialty: Specialty | None = None,
+    latitude: float | None = None,
+    longitude: float | None = None,
+    max_distance: float | None = Query(None, description="Maximum distance in km"),
+    limit: int | None = Query(
+        None, ge=1, le=MAX_LIMIT, description="Return at most this many (closest) contractors"
+    ),
+    fields: str | None = Query(
+        None, description="Comma-separated response fields to return (id is always included)"
+    ),
+    q: str | None = Query(
+        None, max_length=MAX_QUERY_LENGTH, description="Full-text search in name and description"
+    ),
+    sort: SearchSort | None = Query(
+        None, description="Order of q= results: relevance (default) or distance"
+    ),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+    primary_db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get contractors filtered by city, specialty and/or location.
+    Results are sorted by distance if lat/lon provided.
+    With a limit and a location, only the closest contractors are looked up.
+
+    Pages are keyed on (distance, id) for location searches and on id otherwise;
+    the cursor for the next page is returned in the X-Next-Cursor header.
+    Send ``Accept: application/x-ndjson`` to stream results one per line.
+    ``fields=name,specialty,price_range`` selects only those columns from the database.
+
+    ``q=`` matches every word against contractor names and descriptions, ignoring
+    case and accents, and ranks matches by relevance; with a location,
+    ``sort=distance`` orders them nearest first instead. Pages are keyed on
+    (sort key, id).
+    """
+    steps = contractor_search(
+        city_id,
+        specialty,
+        latitude,
+        longitude,
+        max_distance,
+        limit,
+        fields,
+        q,
+        sort,
+        page,
+        reads_primary(request),
+    )
+    results, next_cursor = await run_search_async(steps, db, primary_db)
+    if isinstance(results, AsyncIterable) and not wants_ndjson(request):
+        results = [result async for result in results]
+    return search_response(request, results, next_cursor)
+
+
+@router.get("/contractors/{contractor_id}", response_model=ContractorResponse)
+async def get_contractor(contractor_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Get a specific contractor by ID."""
+    contractor = await db.scalar(select(Contractor).where(Contractor.id == contractor_id))
+    if not contractor:
+        raise HTTPException(status_code=404, detail="Contractor not found")
+    return contractor
+
+
+@router.post("/contractors", response_model=ContractorResponse)
+async def create_contractor(
+    contractor: ContractorCreate, response: Response, db: AsyncSession = Depends(get_async_db)
+):
+    """Create a new contractor."""
+    db_contractor = Contractor(**contractor.model_dump())
+    db.add(db_contractor)
+    await db.commit()
+    await db.refresh(db_contractor)
+    contractor_written(db_contractor)
+    mark_written(response)
+    return db_contractor
+
+
+@router.post("/contractors/bulk", response_model=BulkLoadResponse)
+async def bulk_create_contractors(
+    request: Request, response: Response, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create contractors in bulk from a JSON array or an NDJSON body.
+
+    Rows are validated and inserted in batches; invalid rows are reported
+    by their 1-based position and do not stop the rest of the load.
+    """
+    if NDJSON_MEDIA_TYPE in request.headers.get("content-type", ""):
+        # Lines are loaded batch by batch as the body streams in
+        records = ndjson_lines(request.stream())
+    else:
+        try:
+            records = body_records(await request.body())
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    load = BulkLoad()
+    load.city_ids = set(await db.scalars(select(City.id)))
+    try:
+        async for chunk in batched(records):
+            # Validation is CPU-bound; only the insert needs the session
+            batch = await run_in_threadpool(validate_batch, chunk, load)
+            await db.run_sync(insert_batch, batch, load)
+    finally:
+        # Batches are committed as they go, even if the upload breaks off
+        contractors_bulk_written(load.written)
+    mark_written(response)
+    return load.result()
+
+
+@router.post("/contractors/nearest", response_model=list[BatchSearchResult])
+async def nearest_contractors(
+    batch: BatchSearchRequest, db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Find the closest contractors for many origins in one request.
+
+    Each origin has its own coordinates, optional specialty, optional
+    max_distance and ``k``. The candidates for all origins are loaded once
+    and scored together; results are returned in the order of the origins.
+    """
+    results, _ = await run_search_async(batch_search(batch.origins, batch.city_id), db)
+    with Span("serialize"):
+        return json_response(results)
+
+
+@router.get("/specialties")
+async def get_specialties(request: Request):
+    """Get list of available contractor specialties."""
+    return conditional_response(request, SPECIALTIES_PAYLOAD, SPECIALTIES_CACHE_CONTROL)
@@ -1,12 +1,24 @@
 """Cities router for the Contractor Finder API."""
 
 
-from fastapi import APIRouter, Depends
+from collections.abc import Iterable, Sequence
+
+from fastapi import APIRouter, Depends, Request, Response
 from pydantic import BaseModel
+from sqlalchemy import Select, and_, or_, select
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_read_db
 from app.models import City
+from app.pagination import (
+    STREAM_BATCH_SIZE,
+    PageParams,
+    encode_cursor,
+    ndjson_response,
+    set_next_cursor,
+    wants_ndjson,
+)
+from app.reference_cache import ReferenceCache, invalidate_on_commit
 
 router = APIRouter(prefix="/cities", tags=["cities"])
 
@@ -24,15 +36,86 @@ class CityResponse(BaseModel):
         from_attributes = True
 
 
+def city_rows(cities: Iterable[City]) -> list[dict]:
+    """Serialize cities into the cached reference payload rows."""
+    return [CityResponse.model_validate(city).model_dump() for city in cities]
+
+
+def all_cities_statement() -> Select:
+    """Build the statement loading every city, ordered by (name, id)."""
+    return select(City).order_by(City.name, City.id)
+
+
+def cities_statement(page: PageParams) -> Select:
+    """
+    Build the statement for a page of cities, ordered by (name, id).
+
+    When paginating, the statement fetches one extra row to detect a
+    following page; pass the rows to :func:`paginate_cities`.
+    """
+    statement = all_cities_statement()
+
+    after = page.after(str, int)
+    if after is not None:
+        name, city_id = after
+        statement = statement.where(
+            or_(City.name > name, and_(City.name == name, City.id > city_id))
+        )
+
+    if page.page_size is not None:
+        statement = statement.limit(page.page_size + 1)
+    return statement
+
+
+def paginate_cities(cities: Sequence[City], page: PageParams) -> tuple[Sequence[City], str | None]:
+    """Trim the extra row fetched by :func:`cities_statement` into a next-page cursor."""
+    if page.page_size is None or len(cities) <= page.page_size:
+        return cities, None
+
+    cities = cities[: page.page_size]
+    return cities, encode_cursor((cities[-1].name, cities[-1].id))
+
+
+# Other workers' writes are picked up after max_age; unchanged data keeps its ETag
+cities_cache = ReferenceCache(
+    lambda db: city_rows(db.scalars(all_cities_statement())), "public, max-age=60", max_age=300
+)
+invalidate_on_commit(City, cities_cache)
+
+
 @router.get("/", response_model=list[CityResponse])
-def get_cities(db: Session = Depends(get_db)) -> list[City]:
+def get_cities(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db),
+):
     """
     Get all cities.
 
     Args:
+        request: Incoming request, used to negotiate NDJSON streaming
+        response: Outgoing response, used to set the next-page cursor header
+        page: Keyset pagination parameters, keyed on (name, id)
         db: Database session
 
     Returns:
-        List of all cities in the system
+        List of cities in the system, ordered by name
     """
-    return db.query(City).order_by(City.name).all()
+    if not page.enabled and not wants_ndjson(request):
+        return cities_cache.response(request, db)
+
+    statement = cities_statement(page)
+    if page.page_size is not None:
+        cities, next_cursor = paginate_cities(db.scalars(statement).all(), page)
+    else:
+        cities = db.scalars(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+        next_cursor = None
+
+    results = (CityResponse.model_validate(city) for city in cities)
+
+    if wants_ndjson(request):
+        return ndjson_response(results, next_cursor)
+
+    set_next_cursor(response, next_cursor)
+    return list(results)
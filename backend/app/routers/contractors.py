@@ -1,94 +1,103 @@
-import math
-
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from app.constants import Specialty
-from app.database import get_db
+from app.bulk_load import (
+    BULK_BATCH_SIZE,
+    BulkLoad,
+    batched,
+    body_records,
+    load_contractors,
+    ndjson_lines,
+)
+from app.constants import SearchSort, Specialty
+from app.database import get_db, get_read_db
+from app.geo import calculate_distance  # noqa: F401 - re-exported
+from app.metrics import Span
 from app.models import Contractor
-from app.schemas import ContractorCreate, ContractorResponse
+from app.pagination import NDJSON_MEDIA_TYPE, PageParams, json_response
+from app.reference_cache import conditional_response
+from app.replicas import mark_written, reads_primary
+from app.schemas import (
+    BatchSearchRequest,
+    BatchSearchResult,
+    BulkLoadResponse,
+    ContractorCreate,
+    ContractorResponse,
+)
+from app.search import (
+    MAX_LIMIT,
+    MAX_QUERY_LENGTH,
+    SPECIALTIES_CACHE_CONTROL,
+    SPECIALTIES_PAYLOAD,
+    batch_search,
+    contractor_search,
+    contractor_written,
+    contractors_bulk_written,
+    run_search,
+    search_response,
+)
 
 router = APIRouter()
 
 
-def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Calculate distance between two coordinates using Haversine formula.
-    Returns distance in kilometers.
-    """
-    R = 6371  # Earth's radius in kilometers
-
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-
-    a = (
-        math.sin(dlat / 2) ** 2
-        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
-    )
-
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    distance = R * c
-
-    return round(distance, 2)
-
-
 @router.get("/contractors", response_model=list[ContractorResponse])
 def get_contractors(
+    request: Request,
     city_id: int | None = Query(None, description="Filter by city ID"),
     specialty: Specialty | None = None,
     latitude: float | None = None,
     longitude: float | None = None,
     max_distance: float | None = Query(None, description="Maximum distance in km"),
-    db: Session = Depends(get_db),
+    limit: int | None = Query(
+        None, ge=1, le=MAX_LIMIT, description="Return at most this many (closest) contractors"
+    ),
+    fields: str | None = Query(
+        None, description="Comma-separated response fields to return (id is always included)"
+    ),
+    q: str | None = Query(
+        None, max_length=MAX_QUERY_LENGTH, description="Full-text search in name and description"
+    ),
+    sort: SearchSort | None = Query(
+        None, description="Order of q= results: relevance (default) or distance"
+    ),
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
 ):
     """
     Get contractors filtered by city, specialty and/or location.
     Results are sorted by distance if lat/lon provided.
+    With a limit and a location, only the closest contractors are looked up.
+
+    Pages are keyed on (distance, id) for location searches and on id otherwise;
+    the cursor for the next page is returned in the X-Next-Cursor header.
+    Send ``Accept: application/x-ndjson`` to stream results one per line.
+    ``fields=name,specialty,price_range`` selects only those columns from the database.
+
+    ``q=`` matches every word against contractor names and descriptions, ignoring
+    case and accents, and ranks matches by relevance; with a location,
+    ``sort=distance`` orders them nearest first instead. Pages are keyed on
+    (sort key, id).
     """
-    query = db.query(Contractor)
-
-    if city_id:
-        query = query.filter(Contractor.city_id == city_id)
-
-    if specialty:
-        query = query.filter(Contractor.specialty == specialty)
-
-    contractors = query.all()
-
-    # Calculate distances if location provided
-    if latitude is not None and longitude is not None:
-        contractor_list = []
-        for contractor in contractors:
-            distance = calculate_distance(
-                latitude, longitude, contractor.latitude, contractor.longitude
-            )
-
-            # Filter by max distance if specified
-            if max_distance is None or distance <= max_distance:
-                contractor_dict = {
-                    "id": contractor.id,
-                    "name": contractor.name,
-                    "specialty": contractor.specialty,
-                    "location": contractor.location,
-                    "latitude": contractor.latitude,
-                    "longitude": contractor.longitude,
-                    "price_range": contractor.price_range,
-                    "phone": contractor.phone,
-                    "email": contractor.email,
-                    "description": contractor.description,
-                    "distance": distance,
-                }
-                contractor_list.append(ContractorResponse(**contractor_dict))
-
-        # Sort by distance
-        contractor_list.sort(key=lambda x: x.distance)
-        return contractor_list
-
-    return [ContractorResponse.model_validate(c) for c in contractors]
+    steps = contractor_search(
+        city_id,
+        specialty,
+        latitude,
+        longitude,
+        max_distance,
+        limit,
+        fields,
+        q,
+        sort,
+        page,
+        reads_primary(request),
+    )
+    return search_response(request, *run_search(steps, db, primary_db))
 
 
 @router.get("/contractors/{contractor_id}", response_model=ContractorResponse)
-def get_contractor(contractor_id: int, db: Session = Depends(get_db)):
+def get_contractor(contractor_id: int, db: Session = Depends(get_read_db)):
     """Get a specific contractor by ID."""
     contractor = db.query(Contractor).filter(Contractor.id == contractor_id).first()
     if not contractor:
@@ -97,16 +106,64 @@ def get_contractor(contractor_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/contractors", response_model=ContractorResponse)
-def create_contractor(contractor: ContractorCreate, db: Session = Depends(get_db)):
+def create_contractor(
+    contractor: ContractorCreate, response: Response, db: Session = Depends(get_db)
+):
     """Create a new contractor."""
     db_contractor = Contractor(**contractor.model_dump())
     db.add(db_contractor)
     db.commit()
     db.refresh(db_contractor)
+    contractor_written(db_contractor)
+    mark_written(response)
     return db_contractor
 
 
+@router.post("/contractors/bulk", response_model=BulkLoadResponse)
+async def bulk_create_contractors(
+    request: Request, response: Response, db: Session = Depends(get_db)
+):
+    """
+    Create contractors in bulk from a JSON array or an NDJSON body.
+
+    Rows are validated and inserted in batches; invalid rows are reported
+    by their 1-based position and do not stop the rest of the load.
+    """
+    if NDJSON_MEDIA_TYPE in request.headers.get("content-type", ""):
+        # Lines are loaded batch by batch as the body streams in
+        records = ndjson_lines(request.stream())
+    else:
+        try:
+            records = body_records(await request.body())
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    load = BulkLoad()
+    try:
+        async for batch in batched(records):
+            await run_in_threadpool(load_contractors, db, batch, BULK_BATCH_SIZE, load)
+    finally:
+        # Batches are committed as they go, even if the upload breaks off
+        contractors_bulk_written(load.written)
+    mark_written(response)
+    return load.result()
+
+
+@router.post("/contractors/nearest", response_model=list[BatchSearchResult])
+def nearest_contractors(batch: BatchSearchRequest, db: Session = Depends(get_read_db)):
+    """
+    Find the closest contractors for many origins in one request.
+
+    Each origin has its own coordinates, optional specialty, optional
+    max_distance and ``k``. The candidates for all origins are loaded once
+    and scored together; results are returned in the order of the origins.
+    """
+    results, _ = run_search(batch_search(batch.origins, batch.city_id), db)
+    with Span("serialize"):
+        return json_response(results)
+
+
 @router.get("/specialties")
-def get_specialties():
+def get_specialties(request: Request):
     """Get list of available contractor specialties."""
-    return {"specialties": [e.value for e in Specialty]}
+    return conditional_response(request, SPECIALTIES_PAYLOAD, SPECIALTIES_CACHE_CONTROL)
@@ -1,7 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
-from app.constants import Specialty
-from app.models import PriceRange
+from app.constants import PriceRange, Specialty
+from app.search import MAX_BATCH_ORIGINS, MAX_LIMIT
 
 
 class ContractorBase(BaseModel):
@@ -18,7 +18,12 @@ class ContractorBase(BaseModel):
 
 
 class ContractorCreate(ContractorBase):
-    pass
+    # Lengths of the contractors columns, so oversized values fail validation, not the insert
+    name: str = Field(max_length=200)
+    location: str = Field(max_length=200)
+    phone: str | None = Field(None, max_length=25)
+    email: EmailStr | None = Field(None, max_length=75)
+    description: str | None = Field(None, max_length=500)
 
 
 class ContractorResponse(ContractorBase):
@@ -27,3 +32,31 @@ class ContractorResponse(ContractorBase):
 
     class Config:
         from_attributes = True
+
+
+class BulkRowError(BaseModel):
+    row: int
+    errors: list[str]
+
+
+class BulkLoadResponse(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[BulkRowError]
+
+
+class SearchOrigin(BaseModel):
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    specialty: Specialty | None = None
+    max_distance: float | None = Field(None, gt=0, description="Maximum distance in km")
+    k: int = Field(10, ge=1, le=MAX_LIMIT, description="Number of closest contractors")
+
+
+class BatchSearchRequest(BaseModel):
+    city_id: int | None = None
+    origins: list[SearchOrigin] = Field(min_length=1, max_length=MAX_BATCH_ORIGINS)
+
+
+class BatchSearchResult(BaseModel):
+    contractors: list[ContractorResponse]
@@ -0,0 +1,961 @@
+"""Contractor search logic shared by the sync and async API routes.
+
+The routes only differ in how they execute statements; everything else
+(statement building, scoring, pagination, response building) lives here.
+Each endpoint's search is a generator yielding :class:`Query`,
+:class:`Stream` and :class:`Compute` steps, run by :func:`run_search` on a
+sync session or by :func:`run_search_async` on an async one.
+Searches read plain column tuples and return response rows as dicts that
+are serialized straight to JSON, skipping ORM objects and model validation.
+"""
+
+import heapq
+import math
+import os
+from collections.abc import AsyncIterable, Callable, Generator, Iterable, Sequence
+from contextlib import nullcontext
+from dataclasses import dataclass, make_dataclass
+from functools import cache, partial
+from typing import Any
+
+import numpy as np
+from fastapi import HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Row, Select, and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.cache import search_cache
+from app.constants import PriceRange, SearchSort, Specialty
+from app.geo import (
+    DISTANCE_DECIMALS,
+    EARTH_RADIUS_KM,
+    ROUNDING_SLACK_KM,
+    bounding_box,
+    geohash_cover,
+    haversine_many,
+    nearest_many,
+    rank_by_distance,
+    rank_by_unit_vectors,
+    to_unit_vector,
+)
+from app.metrics import Span
+from app.models import Contractor
+from app.pagination import (
+    STREAM_BATCH_SIZE,
+    PageParams,
+    encode_cursor,
+    json_response,
+    ndjson_response,
+    wants_ndjson,
+)
+from app.parallel_rank import rank_parallel, use_parallel
+from app.reference_cache import ReferencePayload, serialize
+from app.snapshot import SnapshotState, contractor_snapshot
+from app.spatial_tree import SPECIALTY_CODES, contractor_tree
+from app.spatial_tree import load_statement as tree_load_statement
+from app.text_index import contractor_text_index, tokenize
+from app.text_index import load_statement as text_load_statement
+
+MAX_LIMIT = 500
+MAX_BATCH_ORIGINS = 1000
+
+# Origin x candidate distances computed at once by a batch search (8 bytes each)
+BATCH_SEARCH_MATRIX_CELLS = int(os.getenv("BATCH_SEARCH_MATRIX_CELLS", "4000000"))
+
+# Ids per IN list when loading rows for many results
+BY_IDS_CHUNK_SIZE = 1000
+
+# The specialty list only changes with a deploy, so it is serialized once at import
+SPECIALTIES_PAYLOAD = ReferencePayload(serialize({"specialties": [e.value for e in Specialty]}))
+SPECIALTIES_CACHE_CONTROL = "public, max-age=86400"
+
+# Absorbs floating-point differences between the database and Python dot products
+DOT_TOLERANCE = 1e-12
+
+UNIT_VECTOR_COLUMNS = (Contractor.unit_x, Contractor.unit_y, Contractor.unit_z)
+
+MAX_QUERY_LENGTH = 200
+# Relevance scores are rounded so they survive the page cursor and tie on id
+SCORE_DECIMALS = 6
+
+
+def nearby_filter(latitude: float, longitude: float, max_distance: float):
+    """
+    Build the SQL prefilter for contractors possibly within ``max_distance``.
+
+    Combines a lat/lon bounding box (served by an index) and the geohash
+    cells covering the search circle with a distance check on the stored
+    unit vectors: a point is within the radius when its dot product with the
+    origin is at least the cosine of the radius angle. The database thus
+    returns only rows inside the circle (plus rounding slack); the exact
+    cutoff still happens in Python on the rounded distance.
+    """
+    radius = max_distance + ROUNDING_SLACK_KM
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius)
+    x, y, z = to_unit_vector(latitude, longitude)
+
+    clauses = [Contractor.latitude.between(min_lat, max_lat)]
+    if min_lon is not None and max_lon is not None:
+        clauses.append(Contractor.longitude.between(min_lon, max_lon))
+
+    cells = geohash_cover(latitude, longitude, radius)
+    if cells:
+        clauses.append(or_(*[Contractor.geohash.like(f"{cell}%") for cell in cells]))
+
+    dot = Contractor.unit_x * x + Contractor.unit_y * y + Contractor.unit_z * z
+    min_dot = math.cos(min(radius / EARTH_RADIUS_KM, math.pi)) - DOT_TOLERANCE
+    # Rows not backfilled yet are left to the Python check
+    clauses.append(or_(Contractor.unit_x.is_(None), dot >= min_dot))
+
+    return and_(*clauses)
+
+
+# Columns of a contractor search result, in response field order
+RESULT_COLUMNS = (
+    Contractor.id,
+    Contractor.name,
+    Contractor.specialty,
+    Contractor.location,
+    Contractor.latitude,
+    Contractor.longitude,
+    Contractor.price_range,
+    Contractor.phone,
+    Contractor.email,
+    Contractor.description,
+    Contractor.city_id,
+)
+RESULT_FIELDS = tuple(column.key for column in RESULT_COLUMNS)
+RESPONSE_FIELDS = (*RESULT_FIELDS, "distance")
+
+
+def parse_fields(fields: str | None, location: bool) -> tuple[str, ...] | None:
+    """
+    Parse a ``fields=`` projection into response fields, in response order.
+
+    ``id`` is always included since pages are keyed on it, and so is
+    ``distance`` for location searches.
+
+    Returns:
+        The projected fields, or ``None`` when every field is requested
+
+    Raises:
+        ValueError: If a requested field does not exist
+    """
+    if not fields:
+        return None
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(RESPONSE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    requested.add("id")
+    if location:
+        requested.add("distance")
+    projected = tuple(field for field in RESPONSE_FIELDS if field in requested)
+    return None if projected == RESPONSE_FIELDS else projected
+
+
+def result_columns(fields: tuple[str, ...] | None) -> tuple:
+    """Columns to select for a projection from :func:`parse_fields`."""
+    if fields is None:
+        return RESULT_COLUMNS
+    return tuple(column for column in RESULT_COLUMNS if column.key in fields)
+
+
+def filtered_statement(
+    city_id: int | None, specialty: Specialty | None, columns: Sequence = RESULT_COLUMNS
+) -> Select:
+    """
+    Build the contractors statement for the city and specialty filters.
+
+    Only the response columns are selected, so rows come back as plain
+    tuples without ORM objects or identity-map bookkeeping.
+    """
+    statement = select(*columns)
+
+    if city_id:
+        statement = statement.where(Contractor.city_id == city_id)
+
+    if specialty:
+        statement = statement.where(Contractor.specialty == specialty)
+
+    return statement
+
+
+def by_ids_statement(ids: Sequence[int], columns: Sequence = RESULT_COLUMNS) -> Select:
+    """Build the statement loading the contractors picked by the spatial tree."""
+    return select(*columns).where(Contractor.id.in_(ids))
+
+
+def by_ids_statements(ids: Sequence[int], columns: Sequence = RESULT_COLUMNS) -> list[Select]:
+    """Split :func:`by_ids_statement` into statements with bounded IN lists."""
+    return [
+        by_ids_statement(ids[start : start + BY_IDS_CHUNK_SIZE], columns)
+        for start in range(0, len(ids), BY_IDS_CHUNK_SIZE)
+    ]
+
+
+def order_nearest(nearest: list[tuple[float, int]], rows: Iterable[Row]) -> list[tuple[float, Row]]:
+    """Pair the spatial tree's (distance, id) results with their loaded rows."""
+    by_id = {row.id: row for row in rows}
+    return [
+        (distance, by_id[contractor_id])
+        for distance, contractor_id in nearest
+        if contractor_id in by_id
+    ]
+
+
+@dataclass(slots=True)
+class ContractorResult:
+    """
+    Search result row with the fields of :class:`ContractorResponse`.
+
+    Rows come straight from the database, so they are not re-validated
+    against the response model. Slots keep each row several times smaller
+    than a dict, and orjson serializes slotted dataclasses natively.
+    """
+
+    id: int
+    name: str
+    specialty: Specialty
+    location: str
+    latitude: float
+    longitude: float
+    price_range: PriceRange
+    phone: str | None
+    email: str | None
+    description: str | None
+    city_id: int
+    distance: float | None = None
+
+
+def _projected_result(fields: tuple[str, ...], values: tuple) -> Any:
+    return projected_result_type(fields)(*values)
+
+
+@cache
+def projected_result_type(fields: tuple[str, ...]) -> type:
+    """
+    Slotted result row type holding only ``fields``, for ``fields=`` projections.
+
+    Instances pickle as their field values, so they can be stored in the
+    Redis search cache and rebuilt by any worker.
+    """
+    row_type = make_dataclass("ProjectedContractorResult", fields, slots=True)
+    row_type.__reduce__ = lambda row: (
+        _projected_result,
+        (fields, tuple(getattr(row, field) for field in fields)),
+    )
+    return row_type
+
+
+def to_result(
+    row: Row, distance: float | None = None, fields: tuple[str, ...] | None = None
+) -> Any:
+    """
+    Build the response row for a contractor selected with :func:`result_columns`.
+
+    Returns:
+        A :class:`ContractorResult`, or a projected row holding only ``fields``
+    """
+    # Trailing non-response columns (see LocationSearch.radius_statement) are dropped
+    if fields is None:
+        return ContractorResult(*row[: len(RESULT_FIELDS)], distance)
+
+    row_type = projected_result_type(fields)
+    if fields[-1] == "distance":
+        return row_type(*row[: len(fields) - 1], distance)
+    return row_type(*row[: len(fields)])
+
+
+class LocationSearch:
+    """Normalized parameters of a location search, including its cache key."""
+
+    def __init__(
+        self,
+        latitude: float,
+        longitude: float,
+        max_distance: float | None,
+        limit: int | None,
+        city_id: int | None,
+        specialty: Specialty | None,
+        fields: tuple[str, ...] | None = None,
+        primary: bool = False,
+    ) -> None:
+        """
+        Args:
+            primary: Whether the search reads from the primary (read-your-writes);
+                replica results can lag, so they are cached separately
+        """
+        self.latitude = latitude
+        self.longitude = longitude
+        self.max_distance = max_distance
+        self.limit = limit
+        self.city_id = city_id or None
+        self.specialty = specialty
+        self.fields = fields
+        self.columns = result_columns(fields)
+        self.primary = primary
+
+    def snapped(self) -> "LocationSearch":
+        """
+        This search with its origin snapped to the cache grid, for cached searches.
+
+        Every search in a grid cell shares one cache entry, so the entry is
+        computed from the snapped origin: distances and the ``max_distance``
+        cutoff then do not depend on which search filled it.
+        """
+        return LocationSearch(
+            search_cache.quantize(self.latitude),
+            search_cache.quantize(self.longitude),
+            self.max_distance,
+            self.limit,
+            self.city_id,
+            self.specialty,
+            self.fields,
+            self.primary,
+        )
+
+    @property
+    def cache_key(self) -> tuple:
+        """Key identifying this search in the result cache; see :meth:`snapped`."""
+        return (
+            "contractors",
+            self.primary,
+            self.city_id,
+            self.specialty.value if self.specialty else None,
+            search_cache.quantize(self.latitude),
+            search_cache.quantize(self.longitude),
+            self.max_distance,
+            self.limit,
+            self.fields,
+        )
+
+    def cached(self) -> list[Any] | None:
+        """Return the cached result for this search, if any."""
+        return search_cache.get(self.cache_key)
+
+    def nearest(self) -> list[tuple[float, int]]:
+        """Answer a top-k search from the (already loaded) spatial tree."""
+        with Span("tree"):
+            return contractor_tree.nearest(
+                self.latitude,
+                self.longitude,
+                self.limit,
+                self.max_distance,
+                self.city_id,
+                self.specialty,
+            )
+
+    def from_snapshot(self, state: SnapshotState, newer: Sequence[Row]) -> list[tuple[float, int]]:
+        """
+        Rank matching contractors from a mapped snapshot.
+
+        Args:
+            state: The snapshot, from :meth:`ContractorSnapshot.current`
+            newer: Rows written after the snapshot was built, loaded with
+                :meth:`newer_statement`; they are ranked and merged in
+
+        Returns:
+            List of (distance, id), nearest first and ties in id order
+        """
+        with Span("snapshot"):
+            nearest = contractor_snapshot.search(
+                self.latitude,
+                self.longitude,
+                self.max_distance,
+                self.limit,
+                self.city_id,
+                self.specialty,
+                state,
+            )
+        if not newer:
+            return nearest
+        # Both runs are (distance, id) ordered, and every newer id is above the snapshot's
+        ranked = [(distance, row.id) for distance, row in self.rank(newer)]
+        return list(heapq.merge(nearest, ranked))[: self.limit]
+
+    def newer_statement(self, state: SnapshotState) -> Select:
+        """Build the statement loading the candidates written after ``state`` was built."""
+        return self.radius_statement().where(Contractor.id > state.max_id)
+
+    def radius_statement(self) -> Select:
+        """
+        Build the statement loading every candidate for a full search, in id order.
+
+        Rows carry the unit-vector columns (and the coordinates, when they are
+        projected out) after the response columns, for :meth:`rank`.
+        """
+        fields = self.fields or RESULT_FIELDS
+        extra = [
+            column
+            for column in (Contractor.latitude, Contractor.longitude)
+            if column.key not in fields
+        ]
+        statement = filtered_statement(self.city_id, self.specialty, self.columns).add_columns(
+            *UNIT_VECTOR_COLUMNS, *extra
+        )
+        if self.max_distance is not None:
+            statement = statement.where(
+                nearby_filter(self.latitude, self.longitude, self.max_distance)
+            )
+        return statement.order_by(Contractor.id)
+
+    def rank(self, rows: Sequence[Row]) -> list[tuple[float, Row]]:
+        """Score the candidates loaded with :meth:`radius_statement`, ties kept in id order."""
+        with Span("rank"):
+            if all(row.unit_x is not None for row in rows):
+                unit_vectors = [(row.unit_x, row.unit_y, row.unit_z) for row in rows]
+                score = rank_parallel if use_parallel(len(rows)) else rank_by_unit_vectors
+                indices, distances = score(
+                    self.latitude, self.longitude, unit_vectors, self.max_distance
+                )
+            else:
+                indices, distances = rank_by_distance(
+                    self.latitude,
+                    self.longitude,
+                    [row.latitude for row in rows],
+                    [row.longitude for row in rows],
+                    self.max_distance,
+                )
+        return [(distance, rows[index]) for index, distance in zip(indices, distances, strict=True)]
+
+    def results(self, nearest: list[tuple[float, int]], rows: Iterable[Row]) -> list[Any]:
+        """Build the response rows for (distance, id) results, from their loaded rows."""
+        with Span("build"):
+            return [
+                to_result(row, distance, self.fields)
+                for distance, row in order_nearest(nearest, rows)
+            ]
+
+    def generations(self) -> dict[str, int]:
+        """Read the cache generations for this search; call it before querying."""
+        return search_cache.generations(self.city_id, self.specialty)
+
+    def store(self, ranked: list[tuple[float, Row]], generations: dict[str, int]) -> list[Any]:
+        """
+        Build the response rows for ranked contractors and cache them.
+
+        Args:
+            generations: From :meth:`generations`, read before the rows were
+                loaded; the rows are not cached if a write landed in between
+        """
+        with Span("build"):
+            results = [to_result(row, distance, self.fields) for distance, row in ranked]
+        search_cache.set(self.cache_key, results, self.city_id, self.specialty, generations)
+        return results
+
+
+class TextSearch:
+    """A ``q=`` full-text search, optionally around a location."""
+
+    def __init__(
+        self,
+        query: str,
+        latitude: float | None,
+        longitude: float | None,
+        max_distance: float | None,
+        limit: int | None,
+        city_id: int | None,
+        specialty: Specialty | None,
+        sort: SearchSort | None = None,
+        fields: tuple[str, ...] | None = None,
+    ) -> None:
+        """
+        Raises:
+            ValueError: When the query has no words, or a distance sort has no location
+        """
+        if not tokenize(query):
+            raise ValueError("q must contain at least one letter or digit")
+        self.location = latitude is not None and longitude is not None
+        self.sort = sort or SearchSort.RELEVANCE
+        if self.sort is SearchSort.DISTANCE and not self.location:
+            raise ValueError("sort=distance requires latitude and longitude")
+
+        self.query = query
+        # Text searches are never cached, so distances use the exact origin
+        self.latitude = latitude if self.location else None
+        self.longitude = longitude if self.location else None
+        self.max_distance = max_distance if self.location else None
+        self.limit = limit
+        self.city_id = city_id or None
+        self.specialty = specialty
+        self.fields = fields
+        self.columns = result_columns(fields)
+
+    def rank(self) -> tuple[list[tuple[float, int]], dict[int, float]]:
+        """
+        Rank the matches from the (already loaded) text index.
+
+        Returns:
+            Tuple of ((sort key, id) pairs in result order, for
+            :func:`paginate_nearest`, and distances by id). The key is the
+            negated relevance score, or the distance for ``sort=distance``;
+            distances are only computed for searches with a location.
+        """
+        with Span("text"):
+            matches = contractor_text_index.search(self.query, self.city_id, self.specialty)
+            ids = matches.ids
+            keys = -np.round(matches.scores, SCORE_DECIMALS)
+            distances = None
+            if self.location:
+                distances = np.round(
+                    haversine_many(
+                        self.latitude, self.longitude, matches.latitudes, matches.longitudes
+                    ),
+                    DISTANCE_DECIMALS,
+                )
+                if self.max_distance is not None:
+                    inside = distances <= self.max_distance
+                    ids, keys, distances = ids[inside], keys[inside], distances[inside]
+                if self.sort is SearchSort.DISTANCE:
+                    keys = distances
+
+            order = np.lexsort((ids, keys))[: self.limit]
+            ids = ids[order].tolist()
+            ranked = list(zip(keys[order].tolist(), ids, strict=True))
+            if distances is None:
+                return ranked, {}
+            return ranked, dict(zip(ids, distances[order].tolist(), strict=True))
+
+    def results(
+        self, ranked: list[tuple[float, int]], distances: dict[int, float], rows: Iterable[Row]
+    ) -> list[Any]:
+        """Build the response rows for a page of ranked ids from their loaded rows."""
+        by_id = {row.id: row for row in rows}
+        return [
+            to_result(by_id[contractor_id], distances.get(contractor_id), self.fields)
+            for _, contractor_id in ranked
+            if contractor_id in by_id
+        ]
+
+
+class BatchSearch:
+    """Nearest-contractor searches for many origins answered from one candidate set."""
+
+    def __init__(self, origins: Sequence[Any], city_id: int | None) -> None:
+        """
+        Args:
+            origins: Objects with ``latitude``, ``longitude``, ``specialty``,
+                ``max_distance`` and ``k`` attributes
+            city_id: Optional city filter shared by every origin
+        """
+        self.origins = origins
+        self.city_id = city_id or None
+
+    def statement(self) -> Select:
+        """
+        Build the statement loading the candidates of every origin at once, in id order.
+
+        The candidates are restricted to the requested specialties and, when
+        every origin has a radius, to the bounding box enclosing all of them.
+        """
+        statement = select(
+            Contractor.id,
+            Contractor.specialty,
+            Contractor.latitude,
+            Contractor.longitude,
+            *UNIT_VECTOR_COLUMNS,
+        )
+        if self.city_id:
+            statement = statement.where(Contractor.city_id == self.city_id)
+
+        specialties = {origin.specialty for origin in self.origins}
+        if None not in specialties:
+            statement = statement.where(Contractor.specialty.in_(specialties))
+
+        if all(origin.max_distance is not None for origin in self.origins):
+            boxes = [
+                bounding_box(
+                    origin.latitude, origin.longitude, origin.max_distance + ROUNDING_SLACK_KM
+                )
+                for origin in self.origins
+            ]
+            statement = statement.where(
+                Contractor.latitude.between(
+                    min(box[0] for box in boxes), max(box[1] for box in boxes)
+                )
+            )
+            if all(box[2] is not None for box in boxes):
+                statement = statement.where(
+                    Contractor.longitude.between(
+                        min(box[2] for box in boxes), max(box[3] for box in boxes)
+                    )
+                )
+        return statement.order_by(Contractor.id)
+
+    def rank(self, rows: Sequence[Row]) -> list[list[tuple[float, int]]]:
+        """
+        Score the candidates loaded with :meth:`statement` for every origin.
+
+        Origins are grouped by specialty, so each group scores only its own
+        candidates in a single chunked distance matrix.
+
+        Returns:
+            Per origin, in request order, a list of (rounded distance in km,
+            contractor id), nearest first
+        """
+        with Span("rank"):
+            ids = np.array([row.id for row in rows], dtype=np.int64)
+            codes = np.array(
+                [SPECIALTY_CODES[Specialty(row.specialty)] for row in rows], dtype=np.int16
+            )
+            unit_vectors = np.array(
+                [
+                    (row.unit_x, row.unit_y, row.unit_z)
+                    if row.unit_x is not None
+                    else to_unit_vector(row.latitude, row.longitude)
+                    for row in rows
+                ],
+                dtype=np.float64,
+            ).reshape(-1, 3)
+
+            groups: dict[Specialty | None, list[int]] = {}
+            for index, origin in enumerate(self.origins):
+                groups.setdefault(origin.specialty, []).append(index)
+
+            results: list[list[tuple[float, int]]] = [[] for _ in self.origins]
+            for specialty, members in groups.items():
+                if specialty is None:
+                    candidates = np.arange(len(ids))
+                else:
+                    candidates = np.flatnonzero(codes == SPECIALTY_CODES[specialty])
+                origins = [self.origins[index] for index in members]
+                ranked = nearest_many(
+                    [to_unit_vector(origin.latitude, origin.longitude) for origin in origins],
+                    unit_vectors[candidates],
+                    [origin.k for origin in origins],
+                    [origin.max_distance for origin in origins],
+                    BATCH_SEARCH_MATRIX_CELLS,
+                )
+                for index, (order, distances) in zip(members, ranked, strict=True):
+                    contractor_ids = ids[candidates[order]].tolist()
+                    results[index] = list(zip(distances, contractor_ids, strict=True))
+        return results
+
+
+def batch_results(
+    nearest: list[list[tuple[float, int]]], rows: Iterable[Row]
+) -> list[dict[str, Any]]:
+    """Build the batch search response from :meth:`BatchSearch.rank` and the loaded rows."""
+    by_id = {row.id: row for row in rows}
+    return [
+        {
+            "contractors": [
+                to_result(by_id[contractor_id], distance)
+                for distance, contractor_id in items
+                if contractor_id in by_id
+            ]
+        }
+        for items in nearest
+    ]
+
+
+def paginate_ranked(results: list[Any], page: PageParams) -> tuple[list[Any], str | None]:
+    """Apply (distance, id) keyset pagination to location search results."""
+    after = page.after(float, int)
+    if after is not None:
+        results = [result for result in results if (result.distance, result.id) > after]
+
+    if page.page_size is None or len(results) <= page.page_size:
+        return results, None
+
+    results = results[: page.page_size]
+    return results, encode_cursor((results[-1].distance, results[-1].id))
+
+
+def paginate_nearest(
+    nearest: list[tuple[float, int]], page: PageParams
+) -> tuple[list[tuple[float, int]], str | None]:
+    """Apply (distance, id) keyset pagination to ranked ids, before any row is loaded."""
+    after = page.after(float, int)
+    if after is not None:
+        nearest = [item for item in nearest if item > after]
+
+    if page.page_size is None or len(nearest) <= page.page_size:
+        return nearest, None
+
+    nearest = nearest[: page.page_size]
+    return nearest, encode_cursor(nearest[-1])
+
+
+def listing_statement(
+    city_id: int | None,
+    specialty: Specialty | None,
+    limit: int | None,
+    page: PageParams,
+    columns: Sequence = RESULT_COLUMNS,
+) -> tuple[Select, int | None]:
+    """
+    Build the statement for a listing without a location.
+
+    Returns:
+        Tuple of (statement, page size). When the size is not ``None`` the
+        statement fetches one extra row to detect a following page; pass the
+        rows to :func:`paginate_listing`.
+    """
+    statement = filtered_statement(city_id, specialty, columns)
+
+    after = page.after(int)
+    if after is not None:
+        statement = statement.where(Contractor.id > after[0])
+
+    if page.enabled or limit is not None:
+        statement = statement.order_by(Contractor.id)
+
+    size = min((n for n in (limit, page.page_size) if n is not None), default=None)
+    if size is not None:
+        statement = statement.limit(size + 1)
+    return statement, size
+
+
+def paginate_listing(
+    rows: Sequence[Row], size: int, page: PageParams
+) -> tuple[Sequence[Row], str | None]:
+    """Trim the extra row fetched by :func:`listing_statement` into a next-page cursor."""
+    if len(rows) <= size:
+        return rows, None
+
+    rows = rows[:size]
+    next_cursor = encode_cursor((rows[-1].id,)) if page.page_size is not None else None
+    return rows, next_cursor
+
+
+def contractor_written(contractor: Contractor) -> None:
+    """Update in-process search structures after a contractor is committed."""
+    search_cache.invalidate_contractor(contractor.city_id, contractor.specialty)
+    contractor_tree.insert(
+        contractor.id,
+        contractor.city_id,
+        contractor.specialty,
+        contractor.latitude,
+        contractor.longitude,
+    )
+    contractor_text_index.insert(
+        contractor.id,
+        contractor.city_id,
+        contractor.specialty,
+        contractor.latitude,
+        contractor.longitude,
+        contractor.name,
+        contractor.description,
+    )
+
+
+def contractors_bulk_written(written: Iterable[tuple[int, Specialty]]) -> None:
+    """Update in-process search structures after a bulk load of (city, specialty) rows."""
+    written = set(written)
+    for city_id, specialty in written:
+        search_cache.invalidate_contractor(city_id, specialty)
+    if written:
+        # Bulk inserts do not return ids; the indexes are reloaded on the next search
+        contractor_tree.reset()
+        contractor_text_index.reset()
+
+
+class Query:
+    """Search step: execute statements and send back all their rows, in order."""
+
+    __slots__ = ("statements", "timed", "primary")
+
+    def __init__(self, *statements: Select, timed: bool = True, primary: bool = False) -> None:
+        self.statements = statements
+        # Index loads are not part of the search's own query phase
+        self.timed = timed
+        # Index loads read the primary: a lagging replica would miss inserts already indexed
+        self.primary = primary
+
+
+class Stream:
+    """Search step: read a statement through a server-side cursor, mapping each row."""
+
+    __slots__ = ("statement", "transform")
+
+    def __init__(self, statement: Select, transform: Callable[[Row], Any]) -> None:
+        self.statement = statement
+        self.transform = transform
+
+
+class Compute:
+    """Search step: call ``function(*args)`` and send back its result."""
+
+    __slots__ = ("function", "args")
+
+    def __init__(self, function: Callable[..., Any], *args: Any) -> None:
+        self.function = function
+        self.args = args
+
+
+# A search yields Query/Stream/Compute steps and returns (results, next page cursor)
+SearchSteps = Generator[Query | Stream | Compute, Any, tuple[Iterable[Any], str | None]]
+
+
+def run_search(
+    steps: SearchSteps, db: Session, primary_db: Session | None = None
+) -> tuple[Iterable[Any], str | None]:
+    """
+    Run a search's steps on a sync session, in the calling (threadpool) thread.
+
+    Args:
+        steps: The search, e.g. from :func:`contractor_search`
+        db: Session for the search's own queries, possibly on a replica
+        primary_db: Session on the primary for index loads; defaults to ``db``
+
+    Returns:
+        Tuple of (results, next page cursor); streamed results are an iterator
+    """
+    result = None
+    while True:
+        try:
+            step = steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+        if isinstance(step, Compute):
+            result = step.function(*step.args)
+        elif isinstance(step, Stream):
+            rows = db.execute(step.statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+            result = map(step.transform, rows)
+        else:
+            session = primary_db if step.primary and primary_db is not None else db
+            with Span("query") if step.timed else nullcontext():
+                result = [
+                    row for statement in step.statements for row in session.execute(statement)
+                ]
+
+
+async def run_search_async(
+    steps: SearchSteps, db: AsyncSession, primary_db: AsyncSession | None = None
+) -> tuple[Iterable[Any] | AsyncIterable[Any], str | None]:
+    """
+    Run a search's steps on async sessions, like :func:`run_search`.
+
+    Compute steps (scoring, index builds) run in the threadpool, so CPU-bound
+    work never stalls the event loop.
+
+    Returns:
+        Tuple of (results, next page cursor); streamed results are an async iterator
+    """
+    result = None
+    while True:
+        try:
+            step = steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+        if isinstance(step, Compute):
+            result = await run_in_threadpool(step.function, *step.args)
+        elif isinstance(step, Stream):
+            rows = await db.stream(step.statement)
+            result = (step.transform(row) async for row in rows)
+        else:
+            session = primary_db if step.primary and primary_db is not None else db
+            with Span("query") if step.timed else nullcontext():
+                result = [
+                    row for statement in step.statements for row in await session.execute(statement)
+                ]
+
+
+def contractor_search(
+    city_id: int | None,
+    specialty: Specialty | None,
+    latitude: float | None,
+    longitude: float | None,
+    max_distance: float | None,
+    limit: int | None,
+    fields: str | None,
+    q: str | None,
+    sort: SearchSort | None,
+    page: PageParams,
+    primary: bool = False,
+) -> SearchSteps:
+    """
+    Steps of ``GET /api/contractors``; run them with :func:`run_search` or
+    :func:`run_search_async`. ``primary`` tells whether the session reads
+    from the primary (see :func:`app.replicas.reads_primary`).
+
+    Raises:
+        HTTPException: 400 for an invalid field list or text query
+    """
+    location = latitude is not None and longitude is not None
+    try:
+        projection = parse_fields(fields, location)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if q is not None:
+        try:
+            search = TextSearch(
+                q, latitude, longitude, max_distance, limit, city_id, specialty, sort, projection
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        if contractor_text_index.stale:
+            rows = yield Query(text_load_statement(), timed=False, primary=True)
+            yield Compute(contractor_text_index.build, rows)
+        ranked, distances = yield Compute(search.rank)
+        ranked, next_cursor = paginate_nearest(ranked, page)
+        # Without page_size or limit every match is loaded; keep each IN list bounded
+        rows = yield Query(*by_ids_statements([cid for _, cid in ranked], search.columns))
+        return search.results(ranked, distances, rows), next_cursor
+
+    if location:
+        search = LocationSearch(
+            latitude, longitude, max_distance, limit, city_id, specialty, projection, primary
+        )
+        state = contractor_snapshot.current()
+        if state is not None:
+            rows = yield Query(search.newer_statement(state))
+            nearest = yield Compute(search.from_snapshot, state, rows)
+            # Only the rows of the requested page are loaded, through bounded IN lists
+            nearest, next_cursor = paginate_nearest(nearest, page)
+            rows = yield Query(*by_ids_statements([cid for _, cid in nearest], search.columns))
+            results = yield Compute(search.results, nearest, rows)
+            return results, next_cursor
+
+        search = search.snapped()
+        generations = search.generations()
+        results = search.cached()
+        if results is None:
+            if limit is not None:
+                if contractor_tree.stale:
+                    rows = yield Query(tree_load_statement(), timed=False, primary=True)
+                    yield Compute(contractor_tree.build, rows)
+                nearest = yield Compute(search.nearest)
+                rows = yield Query(by_ids_statement([cid for _, cid in nearest], search.columns))
+                ranked = yield Compute(order_nearest, nearest, rows)
+            else:
+                rows = yield Query(search.radius_statement())
+                ranked = yield Compute(search.rank, rows)
+            results = yield Compute(search.store, ranked, generations)
+        return (yield Compute(paginate_ranked, results, page))
+
+    statement, size = listing_statement(city_id, specialty, limit, page, result_columns(projection))
+    if size is None:
+        # Unbounded listings are read through a server-side cursor
+        results = yield Stream(statement, partial(to_result, distance=None, fields=projection))
+        return results, None
+    rows = yield Query(statement)
+    rows, next_cursor = paginate_listing(rows, size, page)
+    return [to_result(row, None, projection) for row in rows], next_cursor
+
+
+def batch_search(origins: Sequence[Any], city_id: int | None) -> SearchSteps:
+    """Steps of ``POST /api/contractors/nearest``; the results are not paginated."""
+    search = BatchSearch(origins, city_id)
+    rows = yield Query(search.statement())
+    nearest = yield Compute(search.rank, rows)
+
+    ids = sorted({contractor_id for items in nearest for _, contractor_id in items})
+    rows = yield Query(*by_ids_statements(ids))
+    return batch_results(nearest, rows), None
+
+
+def search_response(
+    request: Request, results: Iterable[Any] | AsyncIterable[Any], next_cursor: str | None
+) -> Response:
+    """Serialize search results as JSON, or as an NDJSON stream when the client asked for one."""
+    if wants_ndjson(request):
+        return ndjson_response(results, next_cursor)
+    with Span("serialize"):
+        return json_response(results, next_cursor)
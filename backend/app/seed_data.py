@@ -1,10 +1,11 @@
-from app.constants import Specialty
-from app.database import SessionLocal
-from app.models import City, Contractor, PriceRange
+from app.constants import PriceRange, Specialty
+from app.database import SessionLocal, get_engine
+from app.models import City, Contractor
 
 
 def seed_database():
     """Seed the database with sample contractor and city data."""
+    get_engine()
     db = SessionLocal()
 
     # Check if data already exists
@@ -0,0 +1,363 @@
+"""Memory-mapped columnar snapshot of contractor coordinates.
+
+A snapshot is a directory of typed ``.npy`` column files (ids, city ids,
+specialty codes, float32 lat/lon and float64 unit vectors) plus a
+``manifest.json``, built from the database by::
+
+    python -m app.snapshot build --dir /var/lib/contractors
+
+Every uvicorn worker memory-maps the same files read-only, so they all share
+one page-cache copy instead of each loading the table into Python objects.
+Location searches are answered from the columns, and only the contractors
+on the requested page are then fetched from the database by id. Rows with
+an id above the snapshot's ``max_id`` were written after the build; they
+are read from the database on each search and merged into the ranking.
+
+Snapshots are versioned: each build writes a new ``v<version>`` directory
+and atomically repoints the ``current`` symlink at it. Workers notice the
+new target within ``CONTRACTOR_SNAPSHOT_CHECK_SECONDS`` and remap; searches
+already running keep using the arrays they started with. Older versions
+beyond ``--keep`` are deleted, which is safe because open maps stay valid
+after their files are unlinked.
+
+Updates and deletes of existing rows are only as fresh as the last build,
+and the merged new rows grow until the next one; rebuild the snapshot on a
+schedule (e.g. ``make snapshot`` from cron) and after bulk loads.
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.constants import Specialty
+from app.database import SessionLocal, get_engine
+from app.geo import (
+    DISTANCE_DECIMALS,
+    ROUNDING_SLACK_KM,
+    bounding_box,
+    nearest_indices,
+    to_unit_vector,
+    unit_vector_distances,
+)
+from app.models import Contractor
+from app.spatial_tree import SPECIALTY_CODES
+
+SNAPSHOT_DIR = os.getenv("CONTRACTOR_SNAPSHOT_DIR")
+SNAPSHOT_CHECK_SECONDS = float(os.getenv("CONTRACTOR_SNAPSHOT_CHECK_SECONDS", "5"))
+SNAPSHOT_KEEP = 2
+
+# Bumped whenever the column layout changes; older snapshots are then ignored
+FORMAT_VERSION = 1
+
+CURRENT_LINK = "current"
+MANIFEST = "manifest.json"
+COLUMNS = {
+    "ids": np.int64,
+    "city_ids": np.int32,
+    "specialties": np.int16,
+    "latitudes": np.float32,
+    "longitudes": np.float32,
+    "unit_vectors": np.float64,
+}
+
+# float32 coordinates are only used for the bounding-box prefilter, widened by their precision
+FLOAT32_SLACK_DEGREES = 1e-4
+
+BUILD_BATCH_SIZE = 50_000
+
+
+class SnapshotState:
+    """One mapped snapshot version; immutable once opened."""
+
+    __slots__ = ("path", "manifest", *COLUMNS)
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.manifest = json.loads((path / MANIFEST).read_text())
+        if self.manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format in {path}")
+        for name in COLUMNS:
+            setattr(self, name, np.load(path / f"{name}.npy", mmap_mode="r"))
+
+    @property
+    def version(self) -> int:
+        return self.manifest["version"]
+
+    @property
+    def max_id(self) -> int:
+        """Largest contractor id in the snapshot; rows above it were written after the build."""
+        return self.manifest["max_id"] or 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class ContractorSnapshot:
+    """Thread-safe handle on the current snapshot in a directory."""
+
+    def __init__(self, directory: str | Path | None) -> None:
+        self.directory = Path(directory) if directory else None
+        self._lock = threading.Lock()
+        self._state: SnapshotState | None = None
+        self._target: str | None = None
+        self._checked_at = -math.inf
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a snapshot directory is configured."""
+        return self.directory is not None
+
+    def current(self) -> SnapshotState | None:
+        """
+        Return the mapped current snapshot, remapping it if ``current`` moved.
+
+        The symlink is checked at most every ``CONTRACTOR_SNAPSHOT_CHECK_SECONDS``.
+        Returns ``None`` when no usable snapshot has been built yet.
+        """
+        if self.directory is None:
+            return None
+        if time.monotonic() - self._checked_at < SNAPSHOT_CHECK_SECONDS:
+            return self._state
+
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                target = os.readlink(self.directory / CURRENT_LINK)
+            except OSError:
+                self._state, self._target = None, None
+                return None
+            if target != self._target:
+                try:
+                    self._state = SnapshotState(self.directory / target)
+                except (OSError, ValueError, KeyError):
+                    self._state = None
+                self._target = target
+            return self._state
+
+    def refresh(self) -> SnapshotState | None:
+        """Check the ``current`` symlink now, regardless of the check interval."""
+        self._checked_at = -math.inf
+        return self.current()
+
+    def search(
+        self,
+        latitude: float,
+        longitude: float,
+        max_distance: float | None = None,
+        limit: int | None = None,
+        city_id: int | None = None,
+        specialty: Specialty | None = None,
+        state: SnapshotState | None = None,
+    ) -> list[tuple[float, int]] | None:
+        """
+        Rank the contractors matching a location search.
+
+        Args:
+            latitude: Origin latitude
+            longitude: Origin longitude
+            max_distance: Optional maximum distance in km
+            limit: Optional number of nearest contractors to keep
+            city_id: Optional city filter
+            specialty: Optional specialty filter
+            state: Snapshot to search, as returned by :meth:`current`;
+                defaults to the current one
+
+        Returns:
+            List of (rounded distance in km, contractor id), nearest first and
+            ties in id order, or ``None`` when no snapshot is available
+        """
+        state = state or self.current()
+        if state is None:
+            return None
+
+        mask = None
+        if city_id:
+            mask = state.city_ids == city_id
+        if specialty:
+            matches = state.specialties == SPECIALTY_CODES[Specialty(specialty)]
+            mask = matches if mask is None else mask & matches
+        if max_distance is not None:
+            min_lat, max_lat, min_lon, max_lon = bounding_box(
+                latitude, longitude, max_distance + ROUNDING_SLACK_KM
+            )
+            inside = (state.latitudes >= min_lat - FLOAT32_SLACK_DEGREES) & (
+                state.latitudes <= max_lat + FLOAT32_SLACK_DEGREES
+            )
+            if min_lon is not None and max_lon is not None:
+                inside &= (state.longitudes >= min_lon - FLOAT32_SLACK_DEGREES) & (
+                    state.longitudes <= max_lon + FLOAT32_SLACK_DEGREES
+                )
+            mask = inside if mask is None else mask & inside
+
+        candidates = np.arange(len(state)) if mask is None else np.flatnonzero(mask)
+        distances = np.round(
+            unit_vector_distances(
+                to_unit_vector(latitude, longitude), state.unit_vectors[candidates]
+            ),
+            DISTANCE_DECIMALS,
+        )
+        # Rows are stored in id order, so index order is id order for ties
+        order = nearest_indices(distances, max_distance, limit)
+        return list(
+            zip(distances[order].tolist(), state.ids[candidates[order]].tolist(), strict=True)
+        )
+
+
+def _columns(db: Session, batch_size: int) -> dict[str, np.ndarray]:
+    """Read the snapshot columns from the contractors table, in id order."""
+    statement = (
+        select(
+            Contractor.id,
+            Contractor.city_id,
+            Contractor.specialty,
+            Contractor.latitude,
+            Contractor.longitude,
+            Contractor.unit_x,
+            Contractor.unit_y,
+            Contractor.unit_z,
+        )
+        .order_by(Contractor.id)
+        .execution_options(yield_per=batch_size)
+    )
+    chunks: dict[str, list[np.ndarray]] = {name: [] for name in COLUMNS}
+    for partition in db.execute(statement).partitions():
+        chunks["ids"].append(np.array([row.id for row in partition], dtype=np.int64))
+        chunks["city_ids"].append(np.array([row.city_id for row in partition], dtype=np.int32))
+        chunks["specialties"].append(
+            np.array([SPECIALTY_CODES[Specialty(row.specialty)] for row in partition], np.int16)
+        )
+        chunks["latitudes"].append(np.array([row.latitude for row in partition], np.float32))
+        chunks["longitudes"].append(np.array([row.longitude for row in partition], np.float32))
+        # Rows written before the unit-vector backfill get them computed here
+        chunks["unit_vectors"].append(
+            np.array(
+                [
+                    (row.unit_x, row.unit_y, row.unit_z)
+                    if row.unit_x is not None
+                    else to_unit_vector(row.latitude, row.longitude)
+                    for row in partition
+                ],
+                dtype=np.float64,
+            ).reshape(-1, 3)
+        )
+
+    if not chunks["ids"]:
+        return {
+            name: np.empty((0, 3) if name == "unit_vectors" else 0, dtype)
+            for name, dtype in COLUMNS.items()
+        }
+    return {name: np.concatenate(parts) for name, parts in chunks.items()}
+
+
+def _latest_version(directory: Path) -> int:
+    versions = [int(path.name[1:]) for path in directory.glob("v*") if path.name[1:].isdigit()]
+    return max(versions, default=0)
+
+
+def build_snapshot(
+    db: Session,
+    directory: str | Path,
+    keep: int = SNAPSHOT_KEEP,
+    batch_size: int = BUILD_BATCH_SIZE,
+) -> Path:
+    """
+    Build a new snapshot version and make it current.
+
+    The version is written to a temporary directory, renamed into place and
+    published by atomically replacing the ``current`` symlink, so readers
+    see either the previous version or the complete new one.
+
+    Args:
+        db: Session to read contractors with
+        directory: Snapshot directory
+        keep: Number of versions to keep, including the new one
+        batch_size: Rows fetched per round trip
+
+    Returns:
+        Path of the new version directory
+
+    Raises:
+        ValueError: When ``keep`` is below 1, which would delete the new version
+    """
+    if keep < 1:
+        raise ValueError("keep must be at least 1")
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    version = _latest_version(directory) + 1
+    name = f"v{version:06d}"
+    staging = directory / f".{name}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir()
+
+    columns = _columns(db, batch_size)
+    for column, values in columns.items():
+        with open(staging / f"{column}.npy", "wb") as file:
+            np.save(file, values)
+            file.flush()
+            os.fsync(file.fileno())
+    manifest = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "count": len(columns["ids"]),
+        "max_id": int(columns["ids"][-1]) if len(columns["ids"]) else None,
+        "built_at": datetime.now(UTC).isoformat(timespec="seconds"),
+    }
+    (staging / MANIFEST).write_text(json.dumps(manifest, indent=2) + "\n")
+
+    final = directory / name
+    staging.rename(final)
+    link = directory / f".{CURRENT_LINK}.tmp"
+    link.unlink(missing_ok=True)
+    link.symlink_to(name)
+    os.replace(link, directory / CURRENT_LINK)
+
+    for old in sorted(directory.glob("v*"))[:-keep]:
+        if old.name[1:].isdigit():
+            shutil.rmtree(old, ignore_errors=True)
+    return final
+
+
+contractor_snapshot = ContractorSnapshot(SNAPSHOT_DIR)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or inspect the contractor snapshot.")
+    parser.add_argument("command", choices=("build", "info"))
+    parser.add_argument("--dir", type=Path, default=SNAPSHOT_DIR, required=not SNAPSHOT_DIR)
+    parser.add_argument("--keep", type=int, default=SNAPSHOT_KEEP)
+    parser.add_argument("--batch-size", type=int, default=BUILD_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    if args.keep < 1:
+        parser.error("--keep must be at least 1")
+
+    if args.command == "build":
+        start = time.perf_counter()
+        get_engine()
+        db = SessionLocal()
+        try:
+            path = build_snapshot(db, args.dir, args.keep, args.batch_size)
+        finally:
+            db.close()
+        print(f"Built {path} in {time.perf_counter() - start:.1f}s")
+
+    state = ContractorSnapshot(args.dir).refresh()
+    if state is None:
+        print(f"No snapshot in {args.dir}", file=sys.stderr)
+        return 1
+    print(json.dumps(state.manifest, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""In-memory k-nearest-neighbour index over contractor coordinates.
+
+Contractors are stored as points on the unit sphere in a KD-tree. The chord
+length between two unit vectors grows monotonically with the great-circle
+distance, so nearest-by-chord is nearest-by-Haversine and the tree can prune
+whole subtrees with cheap Euclidean box bounds.
+"""
+
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections.abc import Iterable
+
+import numpy as np
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from app.constants import Specialty
+from app.geo import ROUNDING_SLACK_KM, calculate_distance, chord_length, to_unit_vector
+from app.models import Contractor
+
+LEAF_SIZE = 32
+
+# Pending inserts are scanned linearly until they are folded into the tree
+MIN_REBUILD_PENDING = 256
+REBUILD_RATIO = 0.1
+
+# Reload from the database periodically to pick up other workers' writes
+TREE_TTL_SECONDS = float(os.getenv("CONTRACTOR_TREE_TTL", "300"))
+
+SPECIALTY_CODES = {specialty: code for code, specialty in enumerate(Specialty)}
+
+# (id, city_id, specialty code, latitude, longitude)
+_Row = tuple[int, int, int, float, float]
+
+
+class _Node:
+    """KD-tree node covering the points in ``[start, end)`` of the tree arrays."""
+
+    __slots__ = ("start", "end", "lo", "hi", "left", "right")
+
+    def __init__(self, start: int, end: int, lo: np.ndarray, hi: np.ndarray) -> None:
+        self.start = start
+        self.end = end
+        self.lo = lo
+        self.hi = hi
+        self.left: _Node | None = None
+        self.right: _Node | None = None
+
+    def box_distance(self, point: np.ndarray) -> float:
+        """Squared distance from ``point`` to this node's bounding box."""
+        gap = np.maximum(np.maximum(self.lo - point, point - self.hi), 0.0)
+        return float(gap @ gap)
+
+
+class _TreeState:
+    """Immutable snapshot of a built tree; queries never see partial rebuilds."""
+
+    __slots__ = (
+        "ids",
+        "city_ids",
+        "specialties",
+        "latitudes",
+        "longitudes",
+        "xyz",
+        "root",
+        "sorted_ids",
+    )
+
+    def __init__(self, rows: list[_Row]) -> None:
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.city_ids = np.array([row[1] for row in rows], dtype=np.int64)
+        self.specialties = np.array([row[2] for row in rows], dtype=np.int16)
+        self.latitudes = np.array([row[3] for row in rows], dtype=np.float64)
+        self.longitudes = np.array([row[4] for row in rows], dtype=np.float64)
+
+        lat = np.radians(self.latitudes)
+        lon = np.radians(self.longitudes)
+        self.xyz = np.column_stack(
+            (np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat))
+        )
+
+        self.root = self._build(0, len(rows)) if rows else None
+        self.sorted_ids = np.sort(self.ids)
+
+    def _build(self, start: int, end: int) -> _Node:
+        points = self.xyz[start:end]
+        node = _Node(start, end, points.min(axis=0), points.max(axis=0))
+        if end - start <= LEAF_SIZE:
+            return node
+
+        axis = int(np.argmax(node.hi - node.lo))
+        mid = (start + end) // 2
+        order = np.argpartition(points[:, axis], mid - start) + start
+        for array in (self.ids, self.city_ids, self.specialties, self.latitudes, self.longitudes):
+            array[start:end] = array[order]
+        self.xyz[start:end] = self.xyz[order]
+
+        node.left = self._build(start, mid)
+        node.right = self._build(mid, end)
+        return node
+
+    def contains(self, ids: list[int]) -> list[bool]:
+        """Whether each of ``ids`` is stored in this tree."""
+        if not len(self.sorted_ids):
+            return [False] * len(ids)
+        wanted = np.array(ids, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.sorted_ids, wanted), len(self.sorted_ids) - 1)
+        return (self.sorted_ids[positions] == wanted).tolist()
+
+    def rows(self) -> list[_Row]:
+        """Return the stored points in loader row format."""
+        return list(
+            zip(
+                self.ids.tolist(),
+                self.city_ids.tolist(),
+                self.specialties.tolist(),
+                self.latitudes.tolist(),
+                self.longitudes.tolist(),
+                strict=True,
+            )
+        )
+
+
+class ContractorTree:
+    """Thread-safe KD-tree answering top-k nearest contractor queries."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Built tree plus inserts not yet folded into it, swapped as one unit
+        self._snapshot: tuple[_TreeState | None, tuple[_Row, ...]] = (None, ())
+        self._loaded_at = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the tree has been built."""
+        return self._snapshot[0] is not None
+
+    def __len__(self) -> int:
+        state, pending = self._snapshot
+        return (len(state.ids) if state else 0) + len(pending)
+
+    def build(self, rows: Iterable[tuple[int, int, Specialty, float, float]]) -> None:
+        """
+        Replace the tree contents.
+
+        Pending inserts missing from the loaded rows were committed after the
+        rows were read, so they are kept. Ids are not compared against the
+        highest loaded id: concurrent transactions can commit out of id
+        order, so a later commit may carry a lower id.
+
+        Args:
+            rows: Tuples of (id, city_id, specialty, latitude, longitude), read
+                from the primary
+        """
+        state = _TreeState([self._encode(*row) for row in rows])
+        with self._lock:
+            pending = self._snapshot[1]
+            loaded = state.contains([row[0] for row in pending])
+            pending = tuple(row for row, known in zip(pending, loaded, strict=True) if not known)
+            self._snapshot = (state, pending)
+            self._loaded_at = time.monotonic()
+
+    @property
+    def stale(self) -> bool:
+        """Whether the tree must be (re)built before it can answer queries."""
+        return self._snapshot[0] is None or time.monotonic() - self._loaded_at > TREE_TTL_SECONDS
+
+    def load(self, db: Session) -> None:
+        """Build the tree from the contractors table, with a session on the primary."""
+        self.build(db.execute(load_statement()).all())
+
+    def ensure_loaded(self, db: Session) -> None:
+        """Build the tree on first use, and rebuild it once it is older than the TTL."""
+        if self.stale:
+            self.load(db)
+
+    def insert(
+        self,
+        contractor_id: int,
+        city_id: int,
+        specialty: Specialty,
+        latitude: float,
+        longitude: float,
+    ) -> None:
+        """
+        Add a newly committed contractor.
+
+        The point is searchable immediately; the tree itself is only rebuilt
+        once enough inserts have accumulated to make the linear scan of
+        pending points noticeable. A contractor the last build already read
+        is skipped, so no id is ever stored twice.
+        """
+        row = self._encode(contractor_id, city_id, specialty, latitude, longitude)
+        with self._lock:
+            state, pending = self._snapshot
+            if state is None or state.contains([contractor_id])[0]:
+                return
+            if any(known[0] == contractor_id for known in pending):
+                return
+            pending = (*pending, row)
+            if len(pending) >= max(MIN_REBUILD_PENDING, REBUILD_RATIO * len(state.ids)):
+                state, pending = _TreeState(state.rows() + list(pending)), ()
+            self._snapshot = (state, pending)
+
+    def reset(self) -> None:
+        """Drop the tree so the next query reloads it."""
+        with self._lock:
+            self._snapshot = (None, ())
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int,
+        max_distance: float | None = None,
+        city_id: int | None = None,
+        specialty: Specialty | None = None,
+    ) -> list[tuple[float, int]]:
+        """
+        Find the ``k`` contractors closest to a coordinate.
+
+        Candidates are collected in a bounded max-heap while the tree is walked
+        best-first, so no full sort of the matching set is ever needed.
+
+        Args:
+            latitude: Origin latitude
+            longitude: Origin longitude
+            k: Maximum number of results
+            max_distance: Optional maximum distance in km
+            city_id: Optional city filter
+            specialty: Optional specialty filter
+
+        Returns:
+            List of (rounded distance in km, contractor id), nearest first
+        """
+        state, pending = self._snapshot
+        point = np.array(to_unit_vector(latitude, longitude))
+        bound = math.inf
+        if max_distance is not None:
+            bound = chord_length(max_distance + ROUNDING_SLACK_KM) ** 2
+        code = SPECIALTY_CODES[specialty] if specialty else None
+
+        # Max-heap of the best candidates so far: (-squared chord, id, lat, lon)
+        best: list[tuple[float, int, float, float]] = []
+
+        def offer(chord2: float, contractor_id: int, lat: float, lon: float) -> None:
+            if len(best) < k:
+                heapq.heappush(best, (-chord2, contractor_id, lat, lon))
+            elif chord2 < -best[0][0]:
+                heapq.heapreplace(best, (-chord2, contractor_id, lat, lon))
+
+        def limit() -> float:
+            return min(bound, -best[0][0]) if len(best) == k else bound
+
+        for row_id, row_city, row_code, lat, lon in pending:
+            if (city_id is None or row_city == city_id) and (code is None or row_code == code):
+                gap = point - to_unit_vector(lat, lon)
+                chord2 = float(gap @ gap)
+                if chord2 <= bound:
+                    offer(chord2, row_id, lat, lon)
+
+        if state is not None and state.root is not None:
+            counter = itertools.count()
+            frontier = [(0.0, next(counter), state.root)]
+            while frontier:
+                box2, _, node = heapq.heappop(frontier)
+                if box2 > limit():
+                    break
+
+                if node.left is None or node.right is None:
+                    window = slice(node.start, node.end)
+                    gaps = state.xyz[window] - point
+                    chord2s = np.einsum("ij,ij->i", gaps, gaps)
+                    mask = chord2s <= limit()
+                    if city_id is not None:
+                        mask &= state.city_ids[window] == city_id
+                    if code is not None:
+                        mask &= state.specialties[window] == code
+                    for offset in np.flatnonzero(mask).tolist():
+                        index = node.start + offset
+                        offer(
+                            float(chord2s[offset]),
+                            int(state.ids[index]),
+                            float(state.latitudes[index]),
+                            float(state.longitudes[index]),
+                        )
+                    continue
+
+                for child in (node.left, node.right):
+                    child_box2 = child.box_distance(point)
+                    if child_box2 <= limit():
+                        heapq.heappush(frontier, (child_box2, next(counter), child))
+
+        results = []
+        for _, contractor_id, lat, lon in best:
+            distance = calculate_distance(latitude, longitude, lat, lon)
+            if max_distance is None or distance <= max_distance:
+                results.append((distance, contractor_id))
+        results.sort()
+        return results
+
+    @staticmethod
+    def _encode(
+        contractor_id: int, city_id: int, specialty: Specialty, latitude: float, longitude: float
+    ) -> _Row:
+        return contractor_id, city_id, SPECIALTY_CODES[Specialty(specialty)], latitude, longitude
+
+
+def load_statement() -> Select:
+    """Statement selecting the tree's columns from the contractors table."""
+    return select(
+        Contractor.id,
+        Contractor.city_id,
+        Contractor.specialty,
+        Contractor.latitude,
+        Contractor.longitude,
+    )
+
+
+contractor_tree = ContractorTree()
@@ -0,0 +1,173 @@
+"""Structured, sampled SQL logging.
+
+Replaces the engine-level ``echo=True``, which wrote every statement and
+parameter set synchronously to stdout. ``SQL_LOG_MODE`` selects what is
+logged:
+
+- ``off`` (default): nothing, and no engine listeners are installed
+- ``sampled``: a random ``SQL_LOG_SAMPLE_RATE`` fraction of statements
+- ``slow``: statements slower than ``SQL_LOG_SLOW_MS`` milliseconds
+- ``all``: every statement (development only)
+
+Records carry a statement fingerprint (literals and parameters stripped),
+the duration and the row count, never parameter values. They are put on an
+in-memory queue; a background listener thread formats them as JSON lines
+and writes them out, so the request path never blocks on log I/O.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import re
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SQL_LOG_MODES = ("off", "sampled", "slow", "all")
+
+logger = logging.getLogger("app.sql")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))+\s*\)")
+_PLACEHOLDER = re.compile(r"%s|:\w+|\?")
+_WHITESPACE = re.compile(r"\s+")
+
+_FIELDS = ("fingerprint", "fingerprint_id", "duration_ms", "rows", "operation", "executemany")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a statement so executions of the same query group together.
+
+    Literals and bound parameters become ``?``, and ``IN`` lists of any
+    length collapse to ``(...)``.
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as one JSON object per line, including SQL fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in _FIELDS:
+            if hasattr(record, field):
+                payload[field] = getattr(record, field)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class SqlLogger:
+    """Engine listeners deciding which statements to log, and the queued output."""
+
+    def __init__(
+        self,
+        mode: str,
+        sample_rate: float = 0.01,
+        slow_ms: float = 200.0,
+        handler: logging.Handler | None = None,
+    ) -> None:
+        if mode not in SQL_LOG_MODES:
+            raise ValueError(f"SQL_LOG_MODE must be one of {', '.join(SQL_LOG_MODES)}")
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.handler = handler or logging.StreamHandler()
+        self.handler.setFormatter(JsonFormatter())
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.listener: QueueListener | None = None
+        self._queue_handler = QueueHandler(self.queue)
+
+    def should_log(self, duration_ms: float) -> bool:
+        """Apply the configured mode to a finished statement."""
+        if self.mode == "all":
+            return True
+        if self.mode == "slow":
+            return duration_ms >= self.slow_ms
+        if self.mode == "sampled":
+            return random.random() < self.sample_rate
+        return False
+
+    def install(self) -> None:
+        """Start the background writer and listen to every engine."""
+        if self.mode == "off" or self.listener is not None:
+            return
+        logger.addHandler(self._queue_handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        self.listener = QueueListener(self.queue, self.handler)
+        self.listener.start()
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(Engine, "handle_error", self._handle_error)
+
+    def uninstall(self) -> None:
+        """Stop listening and flush queued records."""
+        if self.listener is None:
+            return
+        event.remove(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", self._after_cursor_execute)
+        event.remove(Engine, "handle_error", self._handle_error)
+        self.listener.stop()
+        self.listener = None
+        logger.removeHandler(self._queue_handler)
+
+    def _before_cursor_execute(self, conn, _cursor, _statement, _parameters, _context, _many):
+        conn.info.setdefault("sql_log_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, _parameters, _context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["sql_log_start"].pop()) * 1000
+        if not self.should_log(duration_ms):
+            return
+
+        normalized = fingerprint(statement)
+        rows = cursor.rowcount if cursor.rowcount >= 0 else None
+        logger.info(
+            "slow query" if self.mode == "slow" else "query",
+            extra={
+                "fingerprint": normalized,
+                "fingerprint_id": hashlib.sha1(normalized.encode()).hexdigest()[:12],
+                "duration_ms": round(duration_ms, 3),
+                "rows": rows,
+                "operation": normalized.split(" ", 1)[0].upper(),
+                "executemany": executemany,
+            },
+        )
+
+    def _handle_error(self, context) -> None:
+        starts = context.connection.info.get("sql_log_start") if context.connection else None
+        if starts:
+            starts.pop()
+
+
+def create_sql_logger() -> SqlLogger:
+    """Build the SQL logger from environment settings."""
+    return SqlLogger(
+        os.getenv("SQL_LOG_MODE", "off").lower(),
+        float(os.getenv("SQL_LOG_SAMPLE_RATE", "0.01")),
+        float(os.getenv("SQL_LOG_SLOW_MS", "200")),
+    )
+
+
+sql_logger = create_sql_logger()
+
+
+def install_sql_logging() -> None:
+    """Enable the configured SQL logging mode; queued records are flushed at exit."""
+    sql_logger.install()
+    atexit.register(sql_logger.uninstall)
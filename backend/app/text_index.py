@@ -0,0 +1,521 @@
+"""In-memory inverted index for full-text search over contractor names and descriptions.
+
+Text is accent-folded and case-folded before it is tokenized, so "Plomería
+São Paulo" is found by "plomeria sao paulo" and vice versa; tokens such as
+"24/7" are kept whole. Every query word must match (the last one also as a
+prefix, for type-ahead), and matches are ranked with BM25, counting words in
+the name ``NAME_WEIGHT`` times as much as words in the description.
+
+Like the spatial tree, the index is built from the database on first use,
+rebuilt after ``CONTRACTOR_TEXT_INDEX_TTL`` seconds to pick up other
+workers' writes, and takes new contractors immediately through
+:meth:`ContractorTextIndex.insert`.
+"""
+
+import bisect
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from collections.abc import Iterable
+
+import numpy as np
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from app.constants import Specialty
+from app.models import Contractor
+from app.spatial_tree import SPECIALTY_CODES
+
+TEXT_INDEX_TTL_SECONDS = float(os.getenv("CONTRACTOR_TEXT_INDEX_TTL", "300"))
+
+# BM25 parameters; the name field counts as this many occurrences of each of its words
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_WEIGHT = 3.0
+
+# Prefixes shorter than this would expand to too much of the vocabulary
+MIN_PREFIX_LENGTH = 2
+
+# Recent inserts are merged into the main posting arrays once there are this many
+MIN_MERGE_PENDING = 256
+MERGE_RATIO = 0.1
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:/[^\W_]+)*")
+
+# (id, city_id, specialty code, latitude, longitude, weighted term frequencies, length)
+_Document = tuple[int, int, int, float, float, dict[str, float], float]
+
+# Per-document columns: (name, dtype, index into _Document)
+_COLUMNS = (
+    ("ids", np.int64, 0),
+    ("city_ids", np.int64, 1),
+    ("specialties", np.int16, 2),
+    ("latitudes", np.float64, 3),
+    ("longitudes", np.float64, 4),
+    ("lengths", np.float32, 6),
+)
+
+
+def fold(text: str) -> str:
+    """Strip accents and case from ``text`` ("Peña" -> "pena", "Construção" -> "construcao")."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Split folded text into index tokens."""
+    return TOKEN_PATTERN.findall(fold(text)) if text else []
+
+
+def _document(
+    contractor_id: int,
+    city_id: int,
+    specialty: Specialty,
+    latitude: float,
+    longitude: float,
+    name: str | None,
+    description: str | None,
+) -> _Document:
+    frequencies: Counter[str] = Counter()
+    for token in tokenize(name):
+        frequencies[token] += NAME_WEIGHT
+    frequencies.update(tokenize(description))
+    return (
+        contractor_id,
+        city_id,
+        SPECIALTY_CODES[Specialty(specialty)],
+        latitude,
+        longitude,
+        dict(frequencies),
+        float(sum(frequencies.values())),
+    )
+
+
+class TextMatches:
+    """Contractors matching a query, as aligned arrays in no particular order."""
+
+    __slots__ = ("ids", "scores", "latitudes", "longitudes")
+
+    def __init__(
+        self, ids: np.ndarray, scores: np.ndarray, latitudes: np.ndarray, longitudes: np.ndarray
+    ) -> None:
+        self.ids = ids
+        self.scores = scores
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def empty(cls) -> "TextMatches":
+        return cls(np.empty(0, np.int64), np.empty(0), np.empty(0), np.empty(0))
+
+    @classmethod
+    def concatenate(cls, parts: list["TextMatches"]) -> "TextMatches":
+        if len(parts) == 1:
+            return parts[0]
+        return cls(
+            *(np.concatenate([getattr(part, name) for part in parts]) for name in cls.__slots__)
+        )
+
+
+class _Postings:
+    """Posting lookups and scoring shared by the built index and recent inserts."""
+
+    __slots__ = ()
+
+    ids: np.ndarray
+    city_ids: np.ndarray
+    specialties: np.ndarray
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    lengths: np.ndarray
+
+    def posting(self, token: str) -> tuple[np.ndarray, np.ndarray] | None:
+        """Sorted positions of the documents containing ``token``, and its frequencies."""
+        raise NotImplementedError
+
+    def match(
+        self,
+        expansions: list[list[str]],
+        stats: "_CorpusStats",
+        city_id: int | None,
+        code: int | None,
+    ) -> TextMatches:
+        """Score the documents containing a token of every expansion, then filter them."""
+        positions: np.ndarray | None = None
+        scores = np.empty(0)
+        for tokens in expansions:
+            present = [
+                (token, posting) for token in tokens if (posting := self.posting(token)) is not None
+            ]
+            if not present:
+                positions = np.empty(0, np.int32)
+                break
+            term_positions = np.concatenate([posting[0] for _, posting in present])
+            term_scores = np.concatenate(
+                [
+                    stats.weight(token, posting[1], self.lengths[posting[0]])
+                    for token, posting in present
+                ]
+            )
+            # One score per document for this word, summed over its prefix expansions
+            unique, inverse = np.unique(term_positions, return_inverse=True)
+            summed = np.bincount(inverse, weights=term_scores)
+            if positions is None:
+                positions, scores = unique, summed
+                continue
+            # Keep only documents matching every word so far
+            index = np.minimum(np.searchsorted(unique, positions), len(unique) - 1)
+            hit = unique[index] == positions
+            positions, scores = positions[hit], scores[hit] + summed[index[hit]]
+
+        if positions is None or len(positions) == 0:
+            return TextMatches.empty()
+        mask = np.ones(len(positions), dtype=bool)
+        if city_id is not None:
+            mask &= self.city_ids[positions] == city_id
+        if code is not None:
+            mask &= self.specialties[positions] == code
+        positions = positions[mask]
+        return TextMatches(
+            self.ids[positions], scores[mask], self.latitudes[positions], self.longitudes[positions]
+        )
+
+
+class _IndexState(_Postings):
+    """Immutable posting arrays; documents are addressed by position."""
+
+    __slots__ = (
+        "ids",
+        "city_ids",
+        "specialties",
+        "latitudes",
+        "longitudes",
+        "lengths",
+        "postings",
+        "vocabulary",
+        "sorted_ids",
+    )
+
+    def __init__(self, documents: list[_Document], base: "_IndexState | None" = None) -> None:
+        offset = len(base.ids) if base else 0
+
+        for name, dtype, index in _COLUMNS:
+            values = np.array([document[index] for document in documents], dtype=dtype)
+            if base is not None:
+                values = np.concatenate((getattr(base, name), values))
+            setattr(self, name, values)
+        self.sorted_ids = np.sort(self.ids)
+
+        grouped: dict[str, tuple[list[int], list[float]]] = {}
+        for position, document in enumerate(documents, offset):
+            for token, frequency in document[5].items():
+                positions, frequencies = grouped.setdefault(token, ([], []))
+                positions.append(position)
+                frequencies.append(frequency)
+
+        # Merging appends positions past the base, so every posting stays sorted
+        self.postings: dict[str, tuple[np.ndarray, np.ndarray]] = (
+            dict(base.postings) if base else {}
+        )
+        for token, (positions, frequencies) in grouped.items():
+            new = (np.array(positions, dtype=np.int32), np.array(frequencies, dtype=np.float32))
+            previous = self.postings.get(token)
+            if previous is not None:
+                new = (np.concatenate((previous[0], new[0])), np.concatenate((previous[1], new[1])))
+            self.postings[token] = new
+        self.vocabulary = sorted(self.postings)
+
+    def expand(self, term: str, prefix: bool) -> list[str]:
+        """Vocabulary tokens matching ``term``, or starting with it when ``prefix`` is set."""
+        if not prefix or len(term) < MIN_PREFIX_LENGTH:
+            return [term] if term in self.postings else []
+        start = bisect.bisect_left(self.vocabulary, term)
+        end = bisect.bisect_left(self.vocabulary, term + "\U0010ffff", start)
+        return self.vocabulary[start:end]
+
+    def document_frequency(self, token: str) -> int:
+        posting = self.postings.get(token)
+        return 0 if posting is None else len(posting[0])
+
+    def posting(self, token: str) -> tuple[np.ndarray, np.ndarray] | None:
+        return self.postings.get(token)
+
+    def contains(self, ids: list[int]) -> list[bool]:
+        """Whether each of ``ids`` is stored in this index."""
+        if not len(self.sorted_ids):
+            return [False] * len(ids)
+        wanted = np.array(ids, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.sorted_ids, wanted), len(self.sorted_ids) - 1)
+        return (self.sorted_ids[positions] == wanted).tolist()
+
+
+class _RecentIndex:
+    """
+    Append-only index of recent inserts.
+
+    Columns grow by doubling and postings are plain lists, so an insert only
+    costs time in its own tokens instead of copying everything already
+    stored. Queries read it through a :class:`_RecentView` limited to the
+    documents present when their snapshot was taken; later appends only ever
+    write past that count.
+    """
+
+    def __init__(self, documents: Iterable[_Document] = ()) -> None:
+        # Guards the sorted vocabulary, which queries bisect while inserts grow it
+        self._lock = threading.Lock()
+        self.documents: list[_Document] = []
+        self.contractor_ids: set[int] = set()
+        self.postings: dict[str, tuple[list[int], list[float]]] = {}
+        self.vocabulary: list[str] = []
+        for name, dtype, _ in _COLUMNS:
+            setattr(self, name, np.empty(16, dtype=dtype))
+        for document in documents:
+            self.append(document)
+
+    def append(self, document: _Document) -> None:
+        """Add a document; callers serialize appends."""
+        position = len(self.documents)
+        for name, _, index in _COLUMNS:
+            column = getattr(self, name)
+            if position == len(column):
+                grown = np.empty(2 * len(column), dtype=column.dtype)
+                grown[:position] = column
+                setattr(self, name, grown)
+                column = grown
+            column[position] = document[index]
+
+        for token, frequency in document[5].items():
+            posting = self.postings.get(token)
+            if posting is None:
+                with self._lock:
+                    bisect.insort(self.vocabulary, token)
+                posting = self.postings[token] = ([], [])
+            posting[0].append(position)
+            posting[1].append(frequency)
+
+        self.documents.append(document)
+        self.contractor_ids.add(document[0])
+
+    def expand(self, term: str, prefix: bool) -> list[str]:
+        """Vocabulary tokens matching ``term``, or starting with it when ``prefix`` is set."""
+        if not prefix or len(term) < MIN_PREFIX_LENGTH:
+            return [term] if term in self.postings else []
+        with self._lock:
+            start = bisect.bisect_left(self.vocabulary, term)
+            end = bisect.bisect_left(self.vocabulary, term + "\U0010ffff", start)
+            return self.vocabulary[start:end]
+
+
+class _RecentView(_Postings):
+    """The first ``count`` documents of a recent index, as seen by one query."""
+
+    __slots__ = (
+        "index",
+        "count",
+        "ids",
+        "city_ids",
+        "specialties",
+        "latitudes",
+        "longitudes",
+        "lengths",
+    )
+
+    def __init__(self, index: _RecentIndex, count: int) -> None:
+        self.index = index
+        self.count = count
+        for name, _, _ in _COLUMNS:
+            setattr(self, name, getattr(index, name)[:count])
+
+    def expand(self, term: str, prefix: bool) -> list[str]:
+        return self.index.expand(term, prefix)
+
+    def document_frequency(self, token: str) -> int:
+        posting = self.index.postings.get(token)
+        return 0 if posting is None else bisect.bisect_left(posting[0], self.count)
+
+    def posting(self, token: str) -> tuple[np.ndarray, np.ndarray] | None:
+        posting = self.index.postings.get(token)
+        end = 0 if posting is None else bisect.bisect_left(posting[0], self.count)
+        if not end:
+            return None
+        return (
+            np.array(posting[0][:end], dtype=np.int32),
+            np.array(posting[1][:end], dtype=np.float32),
+        )
+
+
+class _CorpusStats:
+    """Document counts and lengths across the built index and recent inserts, for BM25."""
+
+    __slots__ = ("documents", "average_length", "frequencies")
+
+    def __init__(self, states: list["_IndexState | _RecentView"], tokens: Iterable[str]) -> None:
+        self.documents = sum(len(state.ids) for state in states)
+        total_length = sum(float(state.lengths.sum()) for state in states)
+        self.average_length = total_length / self.documents if self.documents else 1.0
+        self.frequencies = {
+            token: sum(state.document_frequency(token) for state in states) for token in tokens
+        }
+
+    def weight(self, token: str, frequencies: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """BM25 weight of ``token`` for documents with these term frequencies and lengths."""
+        count = self.frequencies[token]
+        idf = math.log(1 + (self.documents - count + 0.5) / (count + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / self.average_length)
+        return idf * frequencies * (BM25_K1 + 1) / (frequencies + norm)
+
+
+class ContractorTextIndex:
+    """Thread-safe inverted index answering full-text contractor queries."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Built index, the recent inserts index and how many of its documents are visible,
+        # swapped as one unit
+        self._snapshot: tuple[_IndexState | None, _RecentIndex | None, int] = (None, None, 0)
+        self._loaded_at = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the index has been built."""
+        return self._snapshot[0] is not None
+
+    def __len__(self) -> int:
+        state, _, count = self._snapshot
+        return (len(state.ids) if state else 0) + count
+
+    @property
+    def stale(self) -> bool:
+        """Whether the index must be (re)built before it can answer queries."""
+        return (
+            self._snapshot[0] is None or time.monotonic() - self._loaded_at > TEXT_INDEX_TTL_SECONDS
+        )
+
+    def build(self, rows: Iterable[tuple]) -> None:
+        """
+        Replace the index contents.
+
+        Recent inserts missing from the loaded rows were committed after the
+        rows were read, so they are kept. Ids are not compared against the
+        highest loaded id: concurrent transactions can commit out of id
+        order, so a later commit may carry a lower id.
+
+        Args:
+            rows: Tuples of (id, city_id, specialty, latitude, longitude, name,
+                description), read from the primary
+        """
+        state = _IndexState([_document(*row) for row in rows])
+        with self._lock:
+            recent = self._snapshot[1]
+            documents = recent.documents if recent else []
+            loaded = state.contains([document[0] for document in documents])
+            kept = [
+                document for document, known in zip(documents, loaded, strict=True) if not known
+            ]
+            self._snapshot = (state, _RecentIndex(kept) if kept else None, len(kept))
+            self._loaded_at = time.monotonic()
+
+    def load(self, db: Session) -> None:
+        """Build the index from the contractors table, with a session on the primary."""
+        self.build(db.execute(load_statement()).all())
+
+    def ensure_loaded(self, db: Session) -> None:
+        """Build the index on first use, and rebuild it once it is older than the TTL."""
+        if self.stale:
+            self.load(db)
+
+    def insert(
+        self,
+        contractor_id: int,
+        city_id: int,
+        specialty: Specialty,
+        latitude: float,
+        longitude: float,
+        name: str | None,
+        description: str | None,
+    ) -> None:
+        """
+        Add a newly committed contractor.
+
+        It is searchable immediately from a small index of recent inserts,
+        which is merged into the main posting arrays once it has grown enough
+        for the extra lookups to matter. A contractor the last build already
+        read is skipped, so no id is ever indexed twice.
+        """
+        document = _document(
+            contractor_id, city_id, specialty, latitude, longitude, name, description
+        )
+        with self._lock:
+            state, recent, count = self._snapshot
+            if state is None or state.contains([contractor_id])[0]:
+                return
+            if recent is not None and contractor_id in recent.contractor_ids:
+                return
+            if count + 1 >= max(MIN_MERGE_PENDING, MERGE_RATIO * len(state.ids)):
+                documents = [*recent.documents, document] if recent else [document]
+                self._snapshot = (_IndexState(documents, state), None, 0)
+            else:
+                recent = recent or _RecentIndex()
+                recent.append(document)
+                self._snapshot = (state, recent, count + 1)
+
+    def reset(self) -> None:
+        """Drop the index so the next query reloads it."""
+        with self._lock:
+            self._snapshot = (None, None, 0)
+
+    def search(
+        self,
+        query: str,
+        city_id: int | None = None,
+        specialty: Specialty | None = None,
+    ) -> TextMatches:
+        """
+        Find the contractors matching every word of ``query``.
+
+        Args:
+            query: Free text; the last word also matches as a prefix
+            city_id: Optional city filter
+            specialty: Optional specialty filter
+
+        Returns:
+            Matching contractors with their BM25 relevance scores
+        """
+        state, recent, count = self._snapshot
+        states: list[_IndexState | _RecentView] = [state] if state is not None else []
+        if recent is not None and count:
+            states.append(_RecentView(recent, count))
+        terms = tokenize(query)
+        if not states or not terms:
+            return TextMatches.empty()
+
+        expansions = [
+            sorted({token for s in states for token in s.expand(term, last)})
+            for term, last in zip(terms, [False] * (len(terms) - 1) + [True], strict=True)
+        ]
+        stats = _CorpusStats(states, {token for tokens in expansions for token in tokens})
+        code = SPECIALTY_CODES[Specialty(specialty)] if specialty else None
+        return TextMatches.concatenate([s.match(expansions, stats, city_id, code) for s in states])
+
+
+def load_statement() -> Select:
+    """Statement selecting the index's columns from the contractors table."""
+    return select(
+        Contractor.id,
+        Contractor.city_id,
+        Contractor.specialty,
+        Contractor.latitude,
+        Contractor.longitude,
+        Contractor.name,
+        Contractor.description,
+    )
+
+
+contractor_text_index = ContractorTextIndex()
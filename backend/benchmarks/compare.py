@@ -0,0 +1,74 @@
+"""Compare two load test result files, e.g. from the base branch and a PR.
+
+Usage:
+    python -m benchmarks.compare results/base.json results/head.json
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any
+
+# (label, path into a scenario's stats, whether higher is better)
+METRICS = (
+    ("req/s", ("throughput_rps",), True),
+    ("p50 ms", ("latency_ms", "p50"), False),
+    ("p95 ms", ("latency_ms", "p95"), False),
+    ("p99 ms", ("latency_ms", "p99"), False),
+)
+
+
+def _value(stats: dict[str, Any], path: tuple[str, ...]) -> float:
+    for key in path:
+        stats = stats[key]
+    return stats
+
+
+def compare(base: dict[str, Any], head: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Compute the relative change of every metric for scenarios present in both runs.
+
+    Returns:
+        One row per (scenario, metric) with the base and head values, the
+        change in percent and whether the change is an improvement
+    """
+    rows = []
+    for scenario, head_stats in head["scenarios"].items():
+        base_stats = base["scenarios"].get(scenario)
+        if base_stats is None:
+            continue
+        for label, path, higher_is_better in METRICS:
+            before, after = _value(base_stats, path), _value(head_stats, path)
+            change = (after - before) / before * 100 if before else 0.0
+            rows.append(
+                {
+                    "scenario": scenario,
+                    "metric": label,
+                    "base": before,
+                    "head": after,
+                    "change_pct": round(change, 1),
+                    "improved": change > 0 if higher_is_better else change < 0,
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two load test result files.")
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    args = parser.parse_args()
+
+    base = json.loads(args.base.read_text())
+    head = json.loads(args.head.read_text())
+    print(f"base {base.get('commit')} -> head {head.get('commit')}")
+    print(f"{'scenario':<18}{'metric':<8}{'base':>12}{'head':>12}{'change':>10}")
+    for row in compare(base, head):
+        print(
+            f"{row['scenario']:<18}{row['metric']:<8}{row['base']:>12}{row['head']:>12}"
+            f"{row['change_pct']:>+9.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Generate a large synthetic contractor dataset for load testing.
+
+Builds on ``app.seed_data``: the six seeded cities are created first if the
+database is empty, then contractors are scattered around each city center
+and inserted in large ``executemany`` batches.
+
+Usage:
+    python -m benchmarks.generate_data --contractors 2000000
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from sqlalchemy import Engine, insert, select
+
+from app.constants import PriceRange, Specialty
+from app.database import get_engine
+from app.models import City, Contractor, spatial_columns
+from app.seed_data import seed_database
+
+# Centers of the cities created by app.seed_data
+CITY_CENTERS = {
+    "Buenos Aires": (-34.6037, -58.3816),
+    "São Paulo": (-23.5505, -46.6333),
+    "Mexico City": (19.4326, -99.1332),
+    "Lima": (-12.0464, -77.0428),
+    "Bogotá": (4.7110, -74.0721),
+    "Santiago": (-33.4489, -70.6693),
+}
+
+# Standard deviation of the contractor spread around a city center, in degrees (~15 km)
+SPREAD_DEGREES = 0.135
+
+INSERT_BATCH_SIZE = 5000
+
+
+def city_ids(bind: Engine) -> dict[str, int]:
+    """Return the ids of the seeded cities, seeding the database first if it is empty."""
+    with bind.connect() as connection:
+        rows = connection.execute(select(City.name, City.id)).all()
+    if not rows:
+        seed_database()
+        return city_ids(bind)
+    return {name: city_id for name, city_id in rows if name in CITY_CENTERS}
+
+
+def synthetic_contractors(
+    count: int, cities: dict[str, int], seed: int = 42
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield insert parameters for ``count`` contractors spread over ``cities``.
+
+    Args:
+        count: Number of contractors to generate
+        cities: City ids by name, as returned by :func:`city_ids`
+        seed: Random seed, so runs on different commits load the same data
+    """
+    rng = random.Random(seed)
+    names = sorted(cities)
+    specialties = list(Specialty)
+    prices = list(PriceRange)
+
+    for index in range(count):
+        city = names[index % len(names)]
+        center_lat, center_lon = CITY_CENTERS[city]
+        latitude = rng.gauss(center_lat, SPREAD_DEGREES)
+        longitude = rng.gauss(center_lon, SPREAD_DEGREES)
+        specialty = rng.choice(specialties)
+        yield {
+            "name": f"{specialty.value.title()} {city} {index}",
+            "specialty": specialty,
+            "location": city,
+            "latitude": latitude,
+            "longitude": longitude,
+            "price_range": rng.choice(prices),
+            "phone": f"+00 {index:010d}",
+            "email": f"contractor{index}@example.com",
+            "description": "Synthetic contractor for load testing",
+            "city_id": cities[city],
+            **spatial_columns(latitude, longitude),
+        }
+
+
+def generate(
+    count: int,
+    bind: Engine | None = None,
+    batch_size: int = INSERT_BATCH_SIZE,
+    seed: int = 42,
+) -> int:
+    """
+    Insert ``count`` synthetic contractors.
+
+    Returns:
+        Number of contractors inserted
+    """
+    bind = bind or get_engine()
+    rows = synthetic_contractors(count, city_ids(bind), seed)
+    table = Contractor.__table__
+    inserted = 0
+
+    while True:
+        batch = [row for _, row in zip(range(batch_size), rows, strict=False)]
+        if not batch:
+            return inserted
+        with bind.begin() as connection:
+            connection.execute(insert(table), batch)
+        inserted += len(batch)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic contractors.")
+    parser.add_argument("--contractors", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=INSERT_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    inserted = generate(args.contractors, batch_size=args.batch_size, seed=args.seed)
+    print(f"Inserted {inserted} contractors in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
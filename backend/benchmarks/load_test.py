@@ -0,0 +1,258 @@
+"""Scenario-driven load generator for the contractor search API.
+
+Each scenario keeps ``--concurrency`` clients busy for ``--duration``
+seconds and records the latency of every request. Results (p50/p95/p99
+latency, throughput, errors and server RSS) are printed and saved as JSON
+so runs on different commits can be compared with ``benchmarks.compare``.
+
+Usage:
+    python -m benchmarks.load_test --base-url http://localhost:8000 \\
+        --server-pid $(pgrep -f uvicorn | head -1) --output results/head.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import resource
+import subprocess
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from app.constants import Specialty
+from benchmarks.generate_data import CITY_CENTERS, SPREAD_DEGREES
+
+RADII_KM = (1, 2, 5, 10)
+
+
+class Target:
+    """Ids discovered from the running API, used to build realistic requests."""
+
+    def __init__(self, cities: list[dict], contractor_ids: list[int]) -> None:
+        self.cities = cities
+        self.contractor_ids = contractor_ids
+
+    def city(self, rng: random.Random) -> dict:
+        return rng.choice(self.cities)
+
+    def point(self, rng: random.Random) -> tuple[float, float]:
+        """Pick a search origin near one of the seeded city centers."""
+        centers = [CITY_CENTERS[c["name"]] for c in self.cities if c["name"] in CITY_CENTERS]
+        latitude, longitude = rng.choice(centers or [(-34.6037, -58.3816)])
+        return rng.gauss(latitude, SPREAD_DEGREES), rng.gauss(longitude, SPREAD_DEGREES)
+
+
+def _filter_only(target: Target, rng: random.Random) -> str:
+    specialty = rng.choice(list(Specialty)).value
+    return f"/api/contractors?city_id={target.city(rng)['id']}&specialty={specialty}&page_size=50"
+
+
+def _radius(target: Target, rng: random.Random) -> str:
+    latitude, longitude = target.point(rng)
+    radius = rng.choice(RADII_KM)
+    return (
+        f"/api/contractors?latitude={latitude:.5f}&longitude={longitude:.5f}&max_distance={radius}"
+    )
+
+
+def _radius_specialty(target: Target, rng: random.Random) -> str:
+    return f"{_radius(target, rng)}&specialty={rng.choice(list(Specialty)).value}"
+
+
+def _cities(_target: Target, _rng: random.Random) -> str:
+    return "/api/cities/"
+
+
+def _contractor_by_id(target: Target, rng: random.Random) -> str:
+    return f"/api/contractors/{rng.choice(target.contractor_ids)}"
+
+
+SCENARIOS: dict[str, Callable[[Target, random.Random], str]] = {
+    "filter_only": _filter_only,
+    "radius": _radius,
+    "radius_specialty": _radius_specialty,
+    "cities": _cities,
+    "contractor_by_id": _contractor_by_id,
+}
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list; 0.0 for an empty list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    """Aggregate per-request latencies (seconds) into the reported statistics."""
+    values = sorted(latency * 1000 for latency in latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(values) / len(values), 3) if values else 0.0,
+            "p50": round(percentile(values, 0.50), 3),
+            "p95": round(percentile(values, 0.95), 3),
+            "p99": round(percentile(values, 0.99), 3),
+            "max": round(values[-1], 3) if values else 0.0,
+        },
+    }
+
+
+def process_rss_mb(pid: int) -> float | None:
+    """Resident set size of a local process in MiB, read from ``/proc``."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+    for line in status.splitlines():
+        if line.startswith("VmRSS:"):
+            return round(int(line.split()[1]) / 1024, 1)
+    return None
+
+
+async def discover(client: httpx.AsyncClient) -> Target:
+    """Fetch city and contractor ids from the API under test."""
+    cities = (await client.get("/api/cities/")).json()
+    contractor_ids = []
+    for city in cities:
+        response = await client.get(f"/api/contractors?city_id={city['id']}&page_size=200")
+        contractor_ids.extend(contractor["id"] for contractor in response.json())
+    if not cities or not contractor_ids:
+        raise SystemExit("No data to test against; run python -m benchmarks.generate_data first")
+    return Target(cities, contractor_ids)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    target: Target,
+    build_url: Callable[[Target, random.Random], str],
+    duration: float,
+    concurrency: int,
+    server_pid: int | None,
+    seed: int,
+) -> dict[str, Any]:
+    """Keep ``concurrency`` clients busy with one scenario for ``duration`` seconds."""
+    latencies: list[float] = []
+    errors = 0
+    rss_samples: list[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed + worker_id)
+        while time.perf_counter() < deadline:
+            url = build_url(target, rng)
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    async def sample_rss() -> None:
+        while time.perf_counter() < deadline:
+            rss = process_rss_mb(server_pid)
+            if rss is not None:
+                rss_samples.append(rss)
+            await asyncio.sleep(0.5)
+
+    started = time.perf_counter()
+    tasks = [worker(i) for i in range(concurrency)]
+    if server_pid is not None:
+        tasks.append(sample_rss())
+    await asyncio.gather(*tasks)
+
+    result = summarize(latencies, errors, time.perf_counter() - started)
+    if rss_samples:
+        result["server_rss_mb"] = {"max": max(rss_samples), "last": rss_samples[-1]}
+    return result
+
+
+def git_commit() -> str | None:
+    """Current commit of the working tree, recorded so results can be compared."""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        target = await discover(client)
+        scenarios = {}
+        for name in args.scenario or SCENARIOS:
+            print(f"Running {name} for {args.duration}s with {args.concurrency} clients...")
+            scenarios[name] = await run_scenario(
+                client,
+                target,
+                SCENARIOS[name],
+                args.duration,
+                args.concurrency,
+                args.server_pid,
+                args.seed,
+            )
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "config": {
+            "base_url": args.base_url,
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "client_max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "scenarios": scenarios,
+    }
+
+
+def print_results(results: dict[str, Any]) -> None:
+    header = f"{'scenario':<18}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'rss MB':>9}"
+    print(header)
+    for name, stats in results["scenarios"].items():
+        latency = stats["latency_ms"]
+        rss = stats.get("server_rss_mb", {}).get("max", "-")
+        print(
+            f"{name:<18}{stats['throughput_rps']:>10}{latency['p50']:>10}{latency['p95']:>10}"
+            f"{latency['p99']:>10}{stats['errors']:>8}{rss:>9}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the contractor search API.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--server-pid", type=int, help="Local API process to sample RSS from")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_results(results)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark process-pool scoring against single-core scoring.
+
+Scores a synthetic candidate set (contractors spread around Buenos Aires)
+with :func:`app.geo.rank_by_unit_vectors` on one core, then with
+:func:`app.parallel_rank.rank_parallel` on pools of increasing size, and
+reports the speed-up for each worker count. Use the results to pick
+``PARALLEL_RANK_WORKERS`` and ``PARALLEL_RANK_MIN_CANDIDATES``.
+
+Usage:
+    python -m benchmarks.parallel_rank --candidates 1000000 2000000 --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+from app.geo import rank_by_unit_vectors
+from app.parallel_rank import rank_parallel
+
+ORIGIN = (-34.6037, -58.3816)
+SPREAD_DEGREES = 0.5
+
+
+def unit_vectors(count: int, seed: int = 42) -> list[tuple[float, float, float]]:
+    """Unit vectors of ``count`` points scattered around the origin."""
+    rng = np.random.default_rng(seed)
+    lat = np.radians(rng.normal(ORIGIN[0], SPREAD_DEGREES, count))
+    lon = np.radians(rng.normal(ORIGIN[1], SPREAD_DEGREES, count))
+    points = np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+    return [tuple(point) for point in points.tolist()]
+
+
+def best_time(score, repeat: int) -> float:
+    """Return the best wall time of ``repeat`` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        score()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(candidates: list[int], workers: list[int], max_distance: float | None, repeat: int):
+    """Time serial and parallel scoring for every (candidates, workers) pair."""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for count in candidates:
+        vectors = unit_vectors(count)
+        serial_score = partial(rank_by_unit_vectors, *ORIGIN, vectors, max_distance)
+        expected = serial_score()
+        serial = best_time(serial_score, repeat)
+        results.append({"candidates": count, "workers": 0, "ms": round(serial * 1000, 1)})
+
+        for size in workers:
+            with ProcessPoolExecutor(size, mp_context=context) as pool:
+                score = partial(
+                    rank_parallel, *ORIGIN, vectors, max_distance, executor=pool, shards=size
+                )
+                # Also spawns the workers before anything is timed
+                assert score() == expected
+                seconds = best_time(score, repeat)
+            results.append(
+                {
+                    "candidates": count,
+                    "workers": size,
+                    "ms": round(seconds * 1000, 1),
+                    "speedup": round(serial / seconds, 2),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[250_000, 1_000_000])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+        help="Pool sizes to measure",
+    )
+    parser.add_argument("--max-distance", type=float, help="Radius in km (default: unbounded)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    parser.add_argument("--output", type=Path, help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = run(args.candidates, args.workers, args.max_distance, args.repeat)
+
+    print(f"{'candidates':>12}{'workers':>9}{'ms':>10}{'speedup':>9}")
+    for row in results:
+        workers = row["workers"] or "serial"
+        print(f"{row['candidates']:>12}{workers:>9}{row['ms']:>10}{row.get('speedup', 1.0):>9}")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark the per-row cost of the contractor search read path.
+
+Compares the previous ORM path (hydrate ``Contractor`` objects, build a
+``ContractorResponse`` per row, let FastAPI encode it) with the column-
+projected path (Core tuples, slotted result rows, orjson bytes), by wall
+time and by peak memory allocated per row.
+
+Usage:
+    python -m benchmarks.read_path --rows 20000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+import tracemalloc
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.constants import PriceRange, Specialty  # noqa: E402
+from app.database import Base  # noqa: E402
+from app.geo import rank_by_distance  # noqa: E402
+from app.models import City, Contractor, spatial_columns  # noqa: E402
+from app.reference_cache import serialize  # noqa: E402
+from app.schemas import ContractorResponse  # noqa: E402
+from app.search import LocationSearch, to_result  # noqa: E402
+
+ORIGIN = (-34.6037, -58.3816)
+FIELDS = [key for key in ContractorResponse.model_fields if key != "distance"]
+
+
+def populate(engine, rows: int) -> None:
+    """Insert ``rows`` contractors scattered around the origin."""
+    rng = random.Random(42)
+    specialties = list(Specialty)
+    prices = list(PriceRange)
+    with engine.begin() as connection:
+        connection.execute(City.__table__.insert(), [{"id": 1, "name": "CABA", "country": "AR"}])
+        values = []
+        for index in range(rows):
+            latitude = ORIGIN[0] + rng.uniform(-0.3, 0.3)
+            longitude = ORIGIN[1] + rng.uniform(-0.3, 0.3)
+            values.append(
+                {
+                    "name": f"Contractor {index}",
+                    "specialty": rng.choice(specialties),
+                    "location": "Buenos Aires",
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "price_range": rng.choice(prices),
+                    "email": f"contractor{index}@example.com",
+                    "description": "Benchmark contractor",
+                    "city_id": 1,
+                    **spatial_columns(latitude, longitude),
+                }
+            )
+        connection.execute(Contractor.__table__.insert(), values)
+
+
+def orm_path(engine) -> bytes:
+    """Previous path: ORM objects, response models and FastAPI's encoder."""
+    with Session(engine) as db:
+        contractors = db.scalars(select(Contractor).order_by(Contractor.id)).all()
+        indices, distances = rank_by_distance(
+            *ORIGIN,
+            [contractor.latitude for contractor in contractors],
+            [contractor.longitude for contractor in contractors],
+        )
+        results = []
+        for index, distance in zip(indices, distances, strict=True):
+            contractor = contractors[index]
+            data = {key: getattr(contractor, key) for key in FIELDS}
+            results.append(ContractorResponse(**data, distance=distance))
+        return json.dumps(jsonable_encoder(results)).encode()
+
+
+def projected_path(engine) -> bytes:
+    """Current path: column tuples, slotted result rows and direct serialization."""
+    search = LocationSearch(*ORIGIN, None, None, None, None)
+    with Session(engine) as db:
+        rows = db.execute(search.radius_statement()).all()
+        ranked = search.rank(rows)
+        return serialize([to_result(row, distance) for distance, row in ranked])
+
+
+def measure(path, engine, repeat: int) -> tuple[float, int]:
+    """Return the best wall time of ``repeat`` runs in seconds, and the peak traced memory."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        path(engine)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    path(engine)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="Contractors in the table")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per path (best is kept)")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    populate(engine, args.rows)
+
+    assert json.loads(orm_path(engine)) == json.loads(projected_path(engine))
+
+    print(f"{'path':<12}{'total ms':>12}{'us/row':>10}{'peak B/row':>12}")
+    for name, path in (("orm", orm_path), ("projected", projected_path)):
+        seconds, peak = measure(path, engine, args.repeat)
+        print(
+            f"{name:<12}{seconds * 1000:>12.1f}{seconds / args.rows * 1e6:>10.2f}"
+            f"{peak / args.rows:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Benchmark worker startup: import time, lifespan startup and first-request latency.
+
+Every run starts a fresh interpreter, so imports are cold, as they are when
+a worker boots or the service scales out. The child process times
+``import app.main``, then the application lifespan (engine creation and pool
+warmup), then the first and a second request to each path, served in-process
+through the ASGI interface. Runs are repeated and the median of each
+measurement is reported.
+
+The database at ``DATABASE_URL`` must already be migrated
+(``python -m app.migrations``); importing the app never creates tables.
+
+Usage:
+    python -m benchmarks.startup --repeat 5 --output results/startup.json
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+DEFAULT_PATHS = (
+    "/ready",
+    "/api/contractors?latitude=-34.6037&longitude=-58.3816&max_distance=5&page_size=50",
+    "/api/contractors?q=plomeria&page_size=50",
+)
+
+
+def measure(paths: list[str]) -> dict:
+    """
+    Time one cold start in the current process.
+
+    Returns:
+        Dict with ``import_ms``, ``startup_ms`` and, per path, the status and
+        the ``first_ms`` and ``warm_ms`` request latencies
+    """
+    start = time.perf_counter()
+    app = importlib.import_module("app.main").app
+    import_ms = (time.perf_counter() - start) * 1000
+
+    async def serve() -> tuple[float, list[dict]]:
+        start = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            startup_ms = (time.perf_counter() - start) * 1000
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://startup") as http:
+                requests = []
+                for path in paths:
+                    timings = []
+                    for _ in range(2):
+                        start = time.perf_counter()
+                        response = await http.get(path)
+                        timings.append((time.perf_counter() - start) * 1000)
+                    requests.append(
+                        {
+                            "path": path,
+                            "status": response.status_code,
+                            "first_ms": round(timings[0], 2),
+                            "warm_ms": round(timings[1], 2),
+                        }
+                    )
+        return startup_ms, requests
+
+    startup_ms, requests = asyncio.run(serve())
+    return {
+        "import_ms": round(import_ms, 2),
+        "startup_ms": round(startup_ms, 2),
+        "requests": requests,
+    }
+
+
+def run(paths: list[str], repeat: int) -> dict:
+    """Measure ``repeat`` cold starts, each in a new interpreter, and take the medians."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child", "--paths", *paths],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result["process_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        runs.append(result)
+
+    def median(values) -> float:
+        return round(statistics.median(values), 2)
+
+    return {
+        "runs": repeat,
+        "process_ms": median(run["process_ms"] for run in runs),
+        "import_ms": median(run["import_ms"] for run in runs),
+        "startup_ms": median(run["startup_ms"] for run in runs),
+        "requests": [
+            {
+                "path": path,
+                "status": runs[0]["requests"][index]["status"],
+                "first_ms": median(run["requests"][index]["first_ms"] for run in runs),
+                "warm_ms": median(run["requests"][index]["warm_ms"] for run in runs),
+            }
+            for index, path in enumerate(paths)
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", nargs="+", default=list(DEFAULT_PATHS))
+    parser.add_argument("--repeat", type=int, default=5, help="Cold starts to measure")
+    parser.add_argument("--output", type=Path, help="Write JSON results to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.paths)))
+        return
+
+    results = run(args.paths, args.repeat)
+    print(f"process   {results['process_ms']:>9.1f} ms  (interpreter start to exit)")
+    print(f"import    {results['import_ms']:>9.1f} ms")
+    print(f"startup   {results['startup_ms']:>9.1f} ms  (lifespan: engines and pool warmup)")
+    for request in results["requests"]:
+        print(
+            f"{request['status']}  first {request['first_ms']:>8.1f} ms"
+            f"  warm {request['warm_ms']:>8.1f} ms  {request['path']}"
+        )
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,15 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from app.database import Base, get_db
+
+from app.cache import search_cache
+from app.constants import PriceRange, Specialty
+from app.database import Base, get_db, get_read_db
 from app.main import app
-from app.models import Contractor, ContractorType, PriceRange
+from app.models import City, Contractor
+from app.routers.cities import cities_cache
+from app.spatial_tree import contractor_tree
+from app.text_index import contractor_text_index
 
 # Use in-memory SQLite for tests
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -17,6 +23,10 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 def db_session():
     """Create a fresh database session for each test."""
     Base.metadata.create_all(bind=engine)
+    contractor_tree.reset()
+    contractor_text_index.reset()
+    search_cache.clear()
+    cities_cache.invalidate()
     db = TestingSessionLocal()
     try:
         yield db
@@ -36,17 +46,18 @@ def client(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
 
 @pytest.fixture
-def sample_contractor(db_session):
+def sample_contractor(db_session, sample_city):
     """Create a sample contractor for testing."""
     contractor = Contractor(
         name="Test Electrician",
-        specialty=ContractorType.ELECTRICIAN,
+        specialty=Specialty.ELECTRICITY,
         location="Sydney CBD",
         latitude=-33.8688,
         longitude=151.2093,
@@ -54,6 +65,7 @@ def sample_contractor(db_session):
         phone="+61 2 1234 5678",
         email="test@example.com",
         description="Test contractor",
+        city_id=sample_city.id,
     )
     db_session.add(contractor)
     db_session.commit()
@@ -62,32 +74,99 @@ def sample_contractor(db_session):
 
 
 @pytest.fixture
-def sample_contractors(db_session):
+def sample_contractors(db_session, sample_city):
     """Create multiple sample contractors for testing."""
     contractors = [
         Contractor(
             name="Sydney Electrician",
-            specialty=ContractorType.ELECTRICIAN,
+            specialty=Specialty.ELECTRICITY,
             location="Sydney CBD",
             latitude=-33.8688,
             longitude=151.2093,
             price_range=PriceRange.MEDIUM,
+            city_id=sample_city.id,
         ),
         Contractor(
             name="Parramatta Plumber",
-            specialty=ContractorType.PLUMBER,
+            specialty=Specialty.PLUMBING,
             location="Parramatta",
             latitude=-33.8151,
             longitude=150.9989,
             price_range=PriceRange.LOW,
+            city_id=sample_city.id,
         ),
         Contractor(
             name="Bondi Builder",
-            specialty=ContractorType.BUILDER,
+            specialty=Specialty.CONSTRUCTION,
             location="Bondi",
             latitude=-33.8908,
             longitude=151.2743,
             price_range=PriceRange.HIGH,
+            city_id=sample_city.id,
+        ),
+    ]
+    db_session.add_all(contractors)
+    db_session.commit()
+    return contractors
+
+
+@pytest.fixture
+def sample_city(db_session):
+    """Create a sample city for testing."""
+    city = City(name="Buenos Aires", country="Argentina")
+    db_session.add(city)
+    db_session.commit()
+    db_session.refresh(city)
+    return city
+
+
+@pytest.fixture
+def sample_city_contractors(db_session, sample_city):
+    """Create contractors spread across a single city for testing."""
+    contractors = [
+        Contractor(
+            name="ElectroBA",
+            specialty=Specialty.ELECTRICITY,
+            location="Palermo",
+            latitude=-34.5889,
+            longitude=-58.4194,
+            price_range=PriceRange.MEDIUM,
+            email="contacto@electroba.com.ar",
+            description="Electricistas profesionales con 15 años de experiencia",
+            city_id=sample_city.id,
+        ),
+        Contractor(
+            name="PlomeroExpress",
+            specialty=Specialty.PLUMBING,
+            location="Recoleta",
+            latitude=-34.5875,
+            longitude=-58.3974,
+            price_range=PriceRange.LOW,
+            email="info@plomeroexpress.com.ar",
+            description="Servicio de plomería 24/7",
+            city_id=sample_city.id,
+        ),
+        Contractor(
+            name="Gas Seguro BA",
+            specialty=Specialty.GAS,
+            location="San Telmo",
+            latitude=-34.6211,
+            longitude=-58.3724,
+            price_range=PriceRange.HIGH,
+            email="contacto@gasseguro.com.ar",
+            description="Instalaciones de gas certificadas",
+            city_id=sample_city.id,
+        ),
+        Contractor(
+            name="Constructora del Sur",
+            specialty=Specialty.CONSTRUCTION,
+            location="Belgrano",
+            latitude=-34.5633,
+            longitude=-58.4575,
+            price_range=PriceRange.PREMIUM,
+            email="proyectos@constructoradelsur.com.ar",
+            description="Construcción y remodelaciones de alta gama",
+            city_id=sample_city.id,
         ),
     ]
     db_session.add_all(contractors)
@@ -0,0 +1,154 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.admission import (
+    ADMISSION_REJECTED,
+    AdmissionMiddleware,
+    ClassLimiter,
+    QueryClass,
+    classify,
+)
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "query", "expected"),
+    [
+        ("GET", "/api/contractors", "latitude=-34.6&longitude=-58.4", "heavy"),
+        ("GET", "/api/contractors", "latitude=-34.6&longitude=-58.4&max_distance=500", "heavy"),
+        ("GET", "/api/contractors", "latitude=-34.6&longitude=-58.4&max_distance=5", "search"),
+        ("GET", "/api/contractors", "latitude=-34.6&longitude=-58.4&city_id=1", "search"),
+        ("GET", "/api/contractors", "latitude=-34.6&longitude=-58.4&city_id=0", "heavy"),
+        ("GET", "/api/contractors", "city_id=0", "heavy"),
+        ("GET", "/api/contractors", "latitude=-34.6&longitude=-58.4&limit=10", "search"),
+        ("GET", "/api/contractors", "q=plomero", "search"),
+        ("GET", "/api/contractors", "", "heavy"),
+        ("GET", "/api/contractors", "specialty=plumber&page_size=50", "search"),
+        ("POST", "/api/contractors/nearest", "", "heavy"),
+        ("POST", "/api/contractors/bulk", "", "heavy"),
+        ("POST", "/api/contractors", "", "light"),
+        ("GET", "/api/contractors/7", "", "light"),
+        ("GET", "/api/cities", "", "light"),
+        ("GET", "/health", "", None),
+        ("GET", "/ready", "", None),
+    ],
+)
+def test_classify(method, path, query, expected):
+    """Test that requests are priced from the filters they carry."""
+    assert classify(method, path, query.encode()) == expected
+
+
+def test_limiter_queues_in_order_and_sheds_when_full():
+    """Test FIFO hand-over of released slots and rejection once the queue is full."""
+    limiter = ClassLimiter(limit=1, queue_size=2, timeout=5)
+    admitted = []
+
+    async def request(name: str):
+        reason = await limiter.acquire()
+        if reason is None:
+            admitted.append(name)
+        return reason
+
+    async def run():
+        assert await limiter.acquire() is None
+        first = asyncio.create_task(request("first"))
+        second = asyncio.create_task(request("second"))
+        await asyncio.sleep(0)
+        assert await limiter.acquire() == "queue_full"
+        assert limiter.stats()["queued"] == 2
+
+        limiter.release()
+        await first
+        limiter.release()
+        await second
+        limiter.release()
+        return limiter.stats()
+
+    stats = asyncio.run(run())
+    assert admitted == ["first", "second"]
+    assert stats["active"] == 0
+    assert stats["queued"] == 0
+    assert (stats["admitted"], stats["rejected"]) == (3, 1)
+
+
+def test_limiter_times_out_queued_requests():
+    """Test that a request waiting longer than the queue timeout is shed."""
+    limiter = ClassLimiter(limit=1, queue_size=4, timeout=0.01)
+
+    async def run():
+        await limiter.acquire()
+        return await limiter.acquire(), limiter.stats()
+
+    reason, stats = asyncio.run(run())
+    assert reason == "queue_timeout"
+    assert stats["queued"] == 0
+    assert stats["active"] == 1
+
+
+def test_cancelled_waiter_passes_on_a_handed_over_slot():
+    """Test that a waiter cancelled right after being handed a slot does not leak it."""
+    limiter = ClassLimiter(limit=1, queue_size=2, timeout=5)
+
+    async def request():
+        if await limiter.acquire() is None:
+            limiter.release()
+
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.create_task(request())
+        await asyncio.sleep(0)
+        limiter.release()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return limiter.stats()
+
+    stats = asyncio.run(run())
+    assert stats["active"] == 0
+    assert stats["queued"] == 0
+
+
+def test_heavy_burst_is_shed_without_starving_light_requests():
+    """Test that a full heavy queue answers 503 with Retry-After while lookups still pass."""
+    limiters = {
+        QueryClass.LIGHT: ClassLimiter(limit=2, queue_size=2),
+        QueryClass.SEARCH: ClassLimiter(limit=2, queue_size=2),
+        QueryClass.HEAVY: ClassLimiter(limit=1, queue_size=1, timeout=5),
+    }
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, limiters=limiters, enabled=True)
+    release = asyncio.Event()
+
+    @app.get("/api/contractors")
+    async def search():
+        await release.wait()
+        return []
+
+    @app.get("/api/contractors/{contractor_id}")
+    async def get_contractor(contractor_id: int):
+        return {"id": contractor_id}
+
+    rejected_before = ADMISSION_REJECTED.value("heavy", "queue_full")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            scans = [
+                asyncio.create_task(http.get("/api/contractors?latitude=1&longitude=2"))
+                for _ in range(2)
+            ]
+            await asyncio.sleep(0.05)
+            shed = await http.get("/api/contractors?latitude=1&longitude=2")
+            lookup = await http.get("/api/contractors/7")
+            release.set()
+            return shed, lookup, await asyncio.gather(*scans)
+
+    shed, lookup, scans = asyncio.run(run())
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "1"
+    assert shed.json() == {"detail": "Server is busy, retry later"}
+    assert lookup.status_code == 200
+    assert [response.status_code for response in scans] == [200, 200]
+    assert ADMISSION_REJECTED.value("heavy", "queue_full") == rejected_before + 1
+    assert limiters[QueryClass.HEAVY].stats()["active"] == 0
@@ -0,0 +1,235 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import bulk_load, search
+from app.cache import search_cache
+from app.database import async_database_url, get_async_db, get_async_read_db
+from app.geo import rank_by_unit_vectors
+from app.pagination import NDJSON_MEDIA_TYPE, NEXT_CURSOR_HEADER
+from app.routers import async_cities, async_contractors
+from app.schemas import ContractorCreate
+from app.search import Compute, run_search_async
+from tests.conftest import SQLALCHEMY_DATABASE_URL
+
+
+@pytest.fixture
+def async_client(db_session):  # noqa: ARG001 - creates and drops the tables
+    """Create a test client for the async routers, sharing the sync test database."""
+    engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(async_contractors.router, prefix="/api")
+    app.include_router(async_cities.router, prefix="/api")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_async_database_url():
+    """Test that sync URLs are mapped to their async drivers."""
+    assert (
+        async_database_url("mysql+pymysql://user:pass@db:3306/app")
+        == "mysql+aiomysql://user:pass@db:3306/app"
+    )
+    assert async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_async_location_search_matches_sync(client, async_client):
+    """Test that the async route returns the same ranking as the sync route."""
+    for query in ("", "&max_distance=3", "&limit=2"):
+        url = f"/api/contractors?latitude=-34.5889&longitude=-58.4194{query}"
+        assert async_client.get(url).json() == client.get(url).json()
+
+
+def test_async_listing_pages_and_stream(async_client, sample_city_contractors):
+    """Test paging and NDJSON streaming on the async listing."""
+    first = async_client.get("/api/contractors?page_size=3")
+    assert len(first.json()) == 3
+    cursor = first.headers[NEXT_CURSOR_HEADER]
+    second = async_client.get(f"/api/contractors?page_size=3&cursor={cursor}")
+    assert len(second.json()) == 1
+
+    response = async_client.get("/api/contractors", headers={"Accept": NDJSON_MEDIA_TYPE})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == sorted(c.id for c in sample_city_contractors)
+
+
+def test_async_create_and_get_contractor(async_client, sample_city):
+    """Test creating a contractor and reading it back through the async routes."""
+    payload = {
+        "name": "Jardines Unidos",
+        "specialty": "gardening",
+        "location": "Caballito",
+        "latitude": -34.6186,
+        "longitude": -58.4421,
+        "price_range": "$",
+        "city_id": sample_city.id,
+    }
+    created = async_client.post("/api/contractors", json=payload)
+    assert created.status_code == 200
+
+    fetched = async_client.get(f"/api/contractors/{created.json()['id']}")
+    assert fetched.json()["name"] == "Jardines Unidos"
+    assert async_client.get("/api/contractors/9999").status_code == 404
+
+
+def test_async_cities_etag(async_client, sample_city):
+    """Test that the async cities route serves the cached payload with an ETag."""
+    response = async_client.get("/api/cities/")
+    assert response.json() == [
+        {"id": sample_city.id, "name": "Buenos Aires", "country": "Argentina"}
+    ]
+
+    etag = response.headers["etag"]
+    assert async_client.get("/api/cities/", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_async_bulk_load(async_client, sample_city):
+    """Test bulk loading contractors through the async route."""
+    record = {
+        "name": "Gasista Norte",
+        "specialty": "gas",
+        "location": "Núñez",
+        "latitude": -34.5450,
+        "longitude": -58.4640,
+        "price_range": "$$",
+        "city_id": sample_city.id,
+    }
+    response = async_client.post("/api/contractors/bulk", json=[record, {**record, "city_id": 0}])
+
+    assert response.json()["inserted"] == 1
+    assert response.json()["failed"] == 1
+    assert [c["name"] for c in async_client.get("/api/contractors").json()] == ["Gasista Norte"]
+
+
+def test_async_bulk_load_validates_off_the_event_loop(async_client, sample_city, monkeypatch):
+    """Test that the async bulk route validates records in a worker thread."""
+    on_loop = []
+
+    def validate_record(record):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return ContractorCreate.model_validate(record)
+
+    monkeypatch.setattr(bulk_load, "validate_record", validate_record)
+    record = {
+        "name": "Gasista Norte",
+        "specialty": "gas",
+        "location": "Núñez",
+        "latitude": -34.5450,
+        "longitude": -58.4640,
+        "price_range": "$$",
+        "city_id": sample_city.id,
+    }
+    response = async_client.post("/api/contractors/bulk", json=[record, record])
+
+    assert response.json()["inserted"] == 2
+    assert on_loop == [False, False]
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_async_batch_search_matches_sync(client, async_client):
+    """Test that the async batch search returns the same lists as the sync route."""
+    body = {"origins": [{"latitude": -34.5889, "longitude": -58.4194, "k": 3}]}
+    expected = client.post("/api/contractors/nearest", json=body).json()
+    assert async_client.post("/api/contractors/nearest", json=body).json() == expected
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_async_fields_projection_matches_sync(client, async_client):
+    """Test that the async route applies the same field projection."""
+    for query in ("fields=name", "latitude=-34.5889&longitude=-58.4194&fields=name,email"):
+        url = f"/api/contractors?{query}"
+        assert async_client.get(url).json() == client.get(url).json()
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_async_text_search_matches_sync(client, async_client):
+    """Test that the async route answers q= searches like the sync route."""
+    for query in ("q=plomeria", "q=de&latitude=-34.5889&longitude=-58.4194&sort=distance"):
+        url = f"/api/contractors?{query}"
+        assert async_client.get(url).json() == client.get(url).json()
+
+
+def test_async_search_computes_off_the_event_loop():
+    """Test that CPU-bound search steps run in a worker thread, not on the event loop."""
+
+    def steps():
+        thread = yield Compute(threading.get_ident)
+        return [thread], None
+
+    async def run():
+        (worker,), _ = await run_search_async(steps(), None)
+        return worker, threading.get_ident()
+
+    worker, loop = asyncio.run(run())
+    assert worker != loop
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_async_top_k_search_computes_off_the_event_loop(client, async_client, monkeypatch):
+    """Test that the tree walk, row pairing, result building and paging run off the event loop."""
+    on_loop = {}
+
+    def recorded(name, function):
+        def wrapper(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                on_loop[name] = True
+            except RuntimeError:
+                on_loop.setdefault(name, False)
+            return function(*args, **kwargs)
+
+        return wrapper
+
+    url = "/api/contractors?latitude=-34.5889&longitude=-58.4194&limit=2&page_size=1"
+    expected = client.get(url).json()
+    search_cache.clear()
+    monkeypatch.setattr(
+        search.contractor_tree, "nearest", recorded("nearest", search.contractor_tree.nearest)
+    )
+    for name in ("order_nearest", "to_result", "paginate_ranked"):
+        monkeypatch.setattr(search, name, recorded(name, getattr(search, name)))
+    assert async_client.get(url).json() == expected
+    assert on_loop == dict.fromkeys(
+        ("nearest", "order_nearest", "to_result", "paginate_ranked"), False
+    )
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_async_parallel_rank_runs_off_the_event_loop(client, async_client, monkeypatch):
+    """Test that a radius search waits on the scoring pool outside the event loop."""
+    on_loop = []
+
+    def rank_parallel(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return rank_by_unit_vectors(*args, **kwargs)
+
+    url = "/api/contractors?latitude=-34.5889&longitude=-58.4194&max_distance=50"
+    expected = client.get(url).json()
+    search_cache.clear()
+    monkeypatch.setattr(search, "use_parallel", lambda _: True)
+    monkeypatch.setattr(search, "rank_parallel", rank_parallel)
+    assert async_client.get(url).json() == expected
+    assert on_loop == [False]
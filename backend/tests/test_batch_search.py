@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from app import search
+from app.geo import nearest_many, rank_by_unit_vectors, to_unit_vector
+
+ORIGINS = [
+    {"latitude": -34.5889, "longitude": -58.4194, "k": 2},
+    {"latitude": -34.6211, "longitude": -58.3724, "specialty": "gas", "k": 3},
+    {"latitude": -34.5875, "longitude": -58.3974, "max_distance": 3, "k": 10},
+    {"latitude": -34.5633, "longitude": -58.4575, "specialty": "plumbing", "max_distance": 1},
+]
+
+
+def _single_search_url(origin: dict) -> str:
+    url = f"/api/contractors?latitude={origin['latitude']}&longitude={origin['longitude']}"
+    url += f"&limit={origin.get('k', 10)}"
+    for key in ("specialty", "max_distance"):
+        if key in origin:
+            url += f"&{key}={origin[key]}"
+    return url
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_batch_matches_single_searches(client):
+    """Test that each origin gets exactly what a single search would return."""
+    response = client.post("/api/contractors/nearest", json={"origins": ORIGINS})
+
+    assert response.status_code == 200
+    results = response.json()
+    assert len(results) == len(ORIGINS)
+    for origin, result in zip(ORIGINS, results, strict=True):
+        assert result["contractors"] == client.get(_single_search_url(origin)).json()
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_batch_matrix_is_chunked(monkeypatch, client):
+    """Test that a tiny matrix budget (one origin at a time) gives the same results."""
+    expected = client.post("/api/contractors/nearest", json={"origins": ORIGINS}).json()
+
+    monkeypatch.setattr(search, "BATCH_SEARCH_MATRIX_CELLS", 1)
+    assert client.post("/api/contractors/nearest", json={"origins": ORIGINS}).json() == expected
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_batch_city_filter(client):
+    """Test that the shared city filter applies to every origin."""
+    response = client.post(
+        "/api/contractors/nearest", json={"city_id": 9999, "origins": ORIGINS[:2]}
+    )
+    assert response.json() == [{"contractors": []}, {"contractors": []}]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [{"origins": []}, {"origins": [{"latitude": 91, "longitude": 0}]}, {"origins": [{"k": 1}]}],
+)
+def test_batch_validation(client, body):
+    """Test that malformed batches are rejected."""
+    assert client.post("/api/contractors/nearest", json=body).status_code == 422
+
+
+def test_nearest_many_matches_exact_ranking():
+    """Test that dot-product screening never changes the exact ranking, even for close points."""
+    rng = random.Random(3)
+    points = [
+        to_unit_vector(-34.6 + rng.uniform(-0.05, 0.05), -58.4 + rng.uniform(-0.05, 0.05))
+        for _ in range(500)
+    ]
+    origins = [
+        (-34.6 + rng.uniform(-0.05, 0.05), -58.4 + rng.uniform(-0.05, 0.05)) for _ in range(20)
+    ]
+    limits = [rng.choice([1, 5, 50, None]) for _ in origins]
+    max_distances = [rng.choice([None, 0.5, 2.0]) for _ in origins]
+
+    results = nearest_many(
+        [to_unit_vector(*origin) for origin in origins], points, limits, max_distances, 1000
+    )
+
+    for origin, limit, max_distance, (indices, distances) in zip(
+        origins, limits, max_distances, results, strict=True
+    ):
+        expected_indices, expected_distances = rank_by_unit_vectors(*origin, points, max_distance)
+        assert indices == expected_indices[:limit]
+        assert distances == expected_distances[:limit]
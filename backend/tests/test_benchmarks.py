@@ -0,0 +1,94 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from app.main import app
+from app.models import Contractor
+from benchmarks import parallel_rank as parallel_rank_benchmark
+from benchmarks.compare import compare
+from benchmarks.generate_data import generate
+from benchmarks.load_test import SCENARIOS, Target, percentile, run_scenario, summarize
+from tests.conftest import engine
+
+
+def test_generate_spreads_contractors_over_seeded_cities(db_session, sample_city):
+    """Test that generated contractors land in the seeded cities with spatial columns."""
+    assert generate(25, bind=engine, batch_size=10) == 25
+
+    contractors = db_session.query(Contractor).all()
+    assert len(contractors) == 25
+    assert {contractor.city_id for contractor in contractors} == {sample_city.id}
+    assert all(abs(contractor.latitude + 34.6) < 2 for contractor in contractors)
+    assert all(contractor.geohash for contractor in contractors)
+
+
+def test_percentiles_and_summary():
+    """Test nearest-rank percentiles and the reported statistics."""
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+    stats = summarize([0.001, 0.002, 0.003, 0.004], errors=1, elapsed=2.0)
+    assert stats["requests"] == 4
+    assert stats["throughput_rps"] == 2.0
+    assert stats["latency_ms"]["p50"] == 2.0
+
+
+@pytest.mark.usefixtures("client")
+def test_scenarios_run_against_the_api(sample_city_contractors, sample_city):
+    """Test that every scenario builds requests the API answers successfully."""
+    target = Target(
+        [{"id": sample_city.id, "name": sample_city.name}],
+        [contractor.id for contractor in sample_city_contractors],
+    )
+
+    async def run_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return {
+                name: await run_scenario(http, target, build_url, 0.05, 1, None, seed=1)
+                for name, build_url in SCENARIOS.items()
+            }
+
+    results = asyncio.run(run_all())
+    for name, stats in results.items():
+        assert stats["requests"] > 0, name
+        assert stats["errors"] == 0, name
+
+    # URL builders are deterministic for a given seed
+    assert SCENARIOS["radius"](target, random.Random(1)) == SCENARIOS["radius"](
+        target, random.Random(1)
+    )
+
+
+def test_compare_reports_relative_change():
+    """Test that result files are compared metric by metric."""
+    base = {
+        "scenarios": {
+            "radius": {"throughput_rps": 100, "latency_ms": {"p50": 10, "p95": 20, "p99": 40}}
+        }
+    }
+    head = {
+        "scenarios": {
+            "radius": {"throughput_rps": 150, "latency_ms": {"p50": 5, "p95": 20, "p99": 50}}
+        }
+    }
+
+    rows = {row["metric"]: row for row in compare(base, head)}
+    assert rows["req/s"]["change_pct"] == 50.0
+    assert rows["req/s"]["improved"]
+    assert rows["p50 ms"]["change_pct"] == -50.0
+    assert rows["p50 ms"]["improved"]
+    assert not rows["p99 ms"]["improved"]
+
+
+def test_parallel_rank_benchmark_reports_speedup():
+    """Test that the scaling benchmark measures serial and pooled scoring."""
+    results = parallel_rank_benchmark.run([500], [2], max_distance=None, repeat=1)
+
+    assert [row["workers"] for row in results] == [0, 2]
+    assert all(row["candidates"] == 500 and row["ms"] >= 0 for row in results)
+    assert results[1]["speedup"] > 0
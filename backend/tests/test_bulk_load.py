@@ -0,0 +1,167 @@
+import asyncio
+import json
+
+import pytest
+
+from app import bulk_load
+from app.bulk_load import OversizedLine, load_contractors, ndjson_lines
+from app.models import Contractor
+from app.pagination import NDJSON_MEDIA_TYPE
+from tests.conftest import TestingSessionLocal
+
+
+def _record(city_id, name="Gasista Norte", **overrides):
+    return {
+        "name": name,
+        "specialty": "gas",
+        "location": "Núñez",
+        "latitude": -34.5450,
+        "longitude": -58.4640,
+        "price_range": "$$",
+        "city_id": city_id,
+        **overrides,
+    }
+
+
+def test_bulk_json_array_reports_row_errors(client, sample_city):
+    """Test that invalid rows are reported without aborting the load."""
+    records = [
+        _record(sample_city.id, "Uno"),
+        _record(sample_city.id, "Dos", specialty="welding"),
+        _record(sample_city.id, "Tres"),
+        _record(9999, "Cuatro"),
+    ]
+    response = client.post("/api/contractors/bulk", json=records)
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inserted"] == 2
+    assert result["failed"] == 2
+    assert [error["row"] for error in result["errors"]] == [2, 4]
+    assert result["errors"][0]["errors"][0].startswith("specialty:")
+    assert result["errors"][1]["errors"] == ["city_id: City not found"]
+
+    names = [c["name"] for c in client.get("/api/contractors").json()]
+    assert names == ["Uno", "Tres"]
+
+
+def test_bulk_ndjson_body(client, sample_city):
+    """Test that NDJSON bodies are loaded line by line, skipping malformed lines."""
+    lines = [json.dumps(_record(sample_city.id, "Uno")), "{not json", ""]
+    lines.append(json.dumps(_record(sample_city.id, "Dos")))
+    response = client.post(
+        "/api/contractors/bulk",
+        content="\n".join(lines),
+        headers={"Content-Type": NDJSON_MEDIA_TYPE},
+    )
+
+    result = response.json()
+    assert (result["inserted"], result["failed"]) == (2, 1)
+    assert result["errors"][0]["row"] == 2
+
+
+def test_bulk_rejects_non_array_body(client):
+    """Test that a JSON body that is not an array is rejected."""
+    response = client.post("/api/contractors/bulk", json={"name": "Uno"})
+    assert response.status_code == 400
+
+
+def test_bulk_rejects_values_longer_than_their_columns(client, sample_city):
+    """Test that values too long for their columns fail validation for their own row."""
+    records = [
+        _record(sample_city.id, "x" * 201),
+        _record(sample_city.id, "Dos", phone="1" * 26),
+        _record(sample_city.id, "Tres", description="x" * 500),
+    ]
+    response = client.post("/api/contractors/bulk", json=records)
+
+    result = response.json()
+    assert (result["inserted"], result["failed"]) == (1, 2)
+    assert [error["errors"][0].split(":")[0] for error in result["errors"]] == ["name", "phone"]
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_bulk_invalidates_search_cache(client, sample_city):
+    """Test that bulk-loaded contractors show up in cached location searches."""
+    url = "/api/contractors?latitude=-34.5450&longitude=-58.4640&limit=1"
+    assert client.get(url).json()[0]["name"] != "Gasista Norte"
+
+    client.post("/api/contractors/bulk", json=[_record(sample_city.id)])
+
+    assert client.get(url).json()[0]["name"] == "Gasista Norte"
+
+
+def test_load_contractors_in_batches(db_session, sample_city):
+    """Test that loads spanning several batches insert every valid row with its geohash."""
+    records = [_record(sample_city.id, f"Contractor {i}") for i in range(5)]
+    load = load_contractors(db_session, records, batch_size=2)
+
+    assert (load.inserted, load.failed) == (5, 0)
+    contractors = db_session.query(Contractor).all()
+    assert len(contractors) == 5
+    assert all(contractor.geohash for contractor in contractors)
+
+
+def test_load_continues_row_numbers_across_calls(db_session, sample_city):
+    """Test that a load fed in parts numbers rows from the start of the input."""
+    load = load_contractors(db_session, [_record(sample_city.id, "Uno"), {}])
+    load_contractors(db_session, [_record(sample_city.id, "Tres"), {"name": "Cuatro"}], load=load)
+
+    assert (load.inserted, load.failed) == (2, 2)
+    assert [error.row for error in load.errors] == [2, 4]
+
+
+def test_ndjson_lines_split_across_chunks():
+    """Test that lines are reassembled across chunks and oversized lines are skipped."""
+
+    async def chunks():
+        for chunk in (b'{"a"', b': 1}\n\n  \n{"b": 2}\n', b"x" * 30, b"x\n", b'{"c": 3}'):
+            yield chunk
+
+    async def collect():
+        return [line async for line in ndjson_lines(chunks(), max_line_bytes=20)]
+
+    lines = asyncio.run(collect())
+    assert lines[:2] == [b'{"a": 1}', b'{"b": 2}']
+    assert isinstance(lines[2], OversizedLine)
+    assert lines[3:] == [b'{"c": 3}']
+
+
+def test_bulk_ndjson_reports_oversized_lines(client, sample_city):
+    """Test that a line over the size cap fails its own row without aborting the upload."""
+    lines = [
+        json.dumps(_record(sample_city.id, "Uno")),
+        json.dumps(
+            _record(sample_city.id, "Largo", description="x" * bulk_load.BULK_MAX_LINE_BYTES)
+        ),
+        json.dumps(_record(sample_city.id, "Tres")),
+    ]
+    response = client.post(
+        "/api/contractors/bulk",
+        content=(line.encode() + b"\n" for line in lines),
+        headers={"Content-Type": NDJSON_MEDIA_TYPE},
+    )
+
+    result = response.json()
+    assert (result["inserted"], result["failed"]) == (2, 1)
+    assert result["errors"][0]["row"] == 2
+    assert "line longer than" in result["errors"][0]["errors"][0]
+
+
+def test_cli_loads_csv(db_session, sample_city, tmp_path, monkeypatch, capsys):
+    """Test loading a CSV file from the command line."""
+    path = tmp_path / "contractors.csv"
+    path.write_text(
+        "name,specialty,location,latitude,longitude,price_range,phone,email,city_id\n"
+        f"Uno,gas,Núñez,-34.545,-58.464,$$,,uno@example.com,{sample_city.id}\n"
+        f"Dos,gas,Núñez,not-a-number,-58.464,$$,,,{sample_city.id}\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(bulk_load, "SessionLocal", TestingSessionLocal)
+
+    assert bulk_load.main([str(path)]) == 1
+
+    captured = capsys.readouterr()
+    assert "Inserted 1 contractors, 1 failed" in captured.out
+    assert "row 2: latitude:" in captured.err
+    assert db_session.query(Contractor).one().phone is None
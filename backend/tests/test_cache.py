@@ -0,0 +1,185 @@
+import time
+
+import pytest
+
+from app.cache import MemoryCache, RedisCache, SearchCache, search_cache
+from app.constants import Specialty
+from app.search import LocationSearch
+
+
+def test_memory_cache_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = MemoryCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats.as_dict() == {
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "invalidations": 0,
+        "errors": 0,
+    }
+
+
+def test_memory_cache_ttl_expiry():
+    """Test that expired entries are treated as misses."""
+    cache = MemoryCache(max_entries=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_redis_cache_survives_an_unreachable_server():
+    """Test that Redis errors count as misses and skipped writes instead of failing searches."""
+    pytest.importorskip("redis")
+    cache = RedisCache("redis://127.0.0.1:1/0")
+
+    assert cache.get("a") is None
+    assert cache.set("a", [1], ["1:gas"], cache.generations(["1:gas"])) is False
+    assert cache.invalidate(["1:gas"]) == 0
+    assert cache.stats.misses == 1
+    assert cache.stats.errors == 4
+
+
+def test_search_cache_invalidates_only_affected_filters():
+    """Test that a write drops matching and wildcard entries but keeps the rest."""
+    cache = SearchCache(MemoryCache())
+    cache.set("gas-1", [1], 1, Specialty.GAS)
+    cache.set("any-1", [1], 1, None)
+    cache.set("gas-any", [1], None, Specialty.GAS)
+    cache.set("all", [1], None, None)
+    cache.set("plumbing-1", [1], 1, Specialty.PLUMBING)
+    cache.set("gas-2", [1], 2, Specialty.GAS)
+
+    assert cache.invalidate_contractor(1, Specialty.GAS) == 4
+
+    assert cache.get("gas-1") is None
+    assert cache.get("all") is None
+    assert cache.get("plumbing-1") == [1]
+    assert cache.get("gas-2") == [1]
+
+
+def test_search_cache_skips_results_computed_across_an_invalidation():
+    """Test that a result read before a matching write is not stored after it."""
+    cache = SearchCache(MemoryCache())
+    generations = cache.generations(1, Specialty.GAS)
+    other = cache.generations(2, Specialty.GAS)
+    cache.invalidate_contractor(1, Specialty.GAS)
+
+    cache.set("gas-1", [1], 1, Specialty.GAS, generations)
+    cache.set("gas-2", [1], 2, Specialty.GAS, other)
+    assert cache.get("gas-1") is None
+    assert cache.get("gas-2") == [1]
+
+    cache.set("gas-1", [1], 1, Specialty.GAS, cache.generations(1, Specialty.GAS))
+    assert cache.get("gas-1") == [1]
+
+
+def test_search_racing_a_write_is_not_cached(client, sample_city_contractors):
+    """Test that a search that loaded its rows before a create does not cache them."""
+    city_id = sample_city_contractors[0].city_id
+    search = LocationSearch(-34.5889, -58.4194, 3.0, None, city_id, None)
+    generations = search.generations()
+
+    new_contractor = {
+        "name": "Palermo Gas",
+        "specialty": "gas",
+        "location": "Palermo",
+        "latitude": -34.5880,
+        "longitude": -58.4190,
+        "price_range": "$$",
+        "city_id": city_id,
+    }
+    assert client.post("/api/contractors", json=new_contractor).status_code == 200
+    search.store([], generations)
+
+    assert search.cached() is None
+
+
+def test_search_cache_quantize_and_row_limit():
+    """Test coordinate quantization and that oversized results are not stored."""
+    cache = SearchCache(MemoryCache(), coord_decimals=3, max_rows=2)
+    assert cache.quantize(-34.58894) == -34.589
+
+    cache.set("big", [1, 2, 3], None, None)
+    assert cache.get("big") is None
+
+
+def test_disabled_search_cache():
+    """Test that a cache without a backend is a no-op."""
+    cache = SearchCache(None)
+    cache.set("a", [1], None, None)
+
+    assert cache.get("a") is None
+    assert cache.quantize(-34.58894) == -34.58894
+    assert cache.stats() == {"backend": "off"}
+
+
+def test_cached_location_searches_use_the_snapped_origin():
+    """Test that searches in one grid cell share a key and the origin their result uses."""
+    search = LocationSearch(-34.58891, -58.41941, 3.0, None, None, None).snapped()
+    nearby = LocationSearch(-34.58893, -58.41939, 3.0, None, None, None).snapped()
+
+    assert (search.latitude, search.longitude) == (-34.5889, -58.4194)
+    assert (nearby.latitude, nearby.longitude) == (search.latitude, search.longitude)
+    assert search.cache_key == nearby.cache_key
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_cached_results_do_not_depend_on_arrival_order(client):
+    """Test that either search of a grid cell filling the cache yields the same result."""
+    first = "/api/contractors?latitude=-34.58891&longitude=-58.41941&max_distance=3"
+    second = "/api/contractors?latitude=-34.58894&longitude=-58.41944&max_distance=3"
+    filled_by_first = client.get(first).json()
+    search_cache.clear()
+    filled_by_second = client.get(second).json()
+
+    assert filled_by_first == filled_by_second
+    assert filled_by_first == client.get(second).json()
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_get_contractors_served_from_cache(client):
+    """Test that repeated nearby searches hit the cache."""
+    url = "/api/contractors?latitude=-34.58891&longitude=-58.41941&max_distance=3"
+    first = client.get(url).json()
+    hits = search_cache.stats()["hits"]
+
+    second = client.get("/api/contractors?latitude=-34.58889&longitude=-58.41939&max_distance=3")
+
+    assert second.json() == first
+    assert search_cache.stats()["hits"] == hits + 1
+
+
+def test_create_contractor_invalidates_cache(client, sample_city_contractors):
+    """Test that a new contractor shows up in a previously cached search."""
+    url = "/api/contractors?latitude=-34.5889&longitude=-58.4194&max_distance=3"
+    assert len(client.get(url).json()) == 2
+
+    new_contractor = {
+        "name": "Palermo Gas",
+        "specialty": "gas",
+        "location": "Palermo",
+        "latitude": -34.5880,
+        "longitude": -58.4190,
+        "price_range": "$$",
+        "city_id": sample_city_contractors[0].city_id,
+    }
+    assert client.post("/api/contractors", json=new_contractor).status_code == 200
+
+    assert len(client.get(url).json()) == 3
+
+
+def test_cache_stats_endpoint(client):
+    """Test that cache counters are exposed."""
+    response = client.get("/cache/stats")
+    assert response.status_code == 200
+    assert set(response.json()["search"]) >= {"backend", "hits", "misses", "evictions"}
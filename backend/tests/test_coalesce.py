@@ -0,0 +1,161 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.coalesce import CoalescingMiddleware, SingleFlight, search_key
+
+
+def test_search_key_normalizes_equivalent_requests():
+    """Test that parameter order, number formats, field order and accents share a key."""
+    assert search_key(b"city_id=1&specialty=plumber") == search_key(b"specialty=plumber&city_id=01")
+    assert search_key(b"latitude=-34.6&longitude=-58.40") == search_key(
+        b"longitude=-58.4&latitude=-34.60"
+    )
+    assert search_key(b"fields=name,phone") == search_key(b"fields=phone,%20name")
+    assert search_key(b"q=Plomer%C3%ADa%20%2024/7") == search_key(b"q=plomeria+24/7")
+
+
+def test_search_key_separates_different_results():
+    """Test that pages, primary reads and invalid or unknown parameters are not merged."""
+    assert search_key(b"city_id=1") != search_key(b"city_id=2")
+    assert search_key(b"city_id=1&page_size=10") != search_key(b"city_id=1&page_size=20")
+    assert search_key(b"city_id=1", primary=True) != search_key(b"city_id=1")
+    assert search_key(b"city_id=abc") is None
+    assert search_key(b"city_id=1&city_id=2") is None
+    assert search_key(b"city_id=1&debug=1") is None
+
+
+def test_single_flight_shares_one_call():
+    """Test that concurrent callers share one call and later callers start a new one."""
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        shared = await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+        return shared, await flights.do("key", work)
+
+    shared, later = asyncio.run(run())
+    assert shared == [1] * 5
+    assert later == 2
+    assert flights.stats() == {"leaders": 2, "shared": 4, "in_flight": 0}
+
+
+def test_single_flight_shares_errors_and_survives_leader_cancellation():
+    """Test that errors reach every caller and a cancelled leader does not cancel waiters."""
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        failures = await asyncio.gather(
+            *(flights.do("fail", fail) for _ in range(3)), return_exceptions=True
+        )
+        leader = asyncio.create_task(flights.do("slow", slow))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.do("slow", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return failures, await waiter
+
+    failures, result = asyncio.run(run())
+    assert [str(error) for error in failures] == ["boom"] * 3
+    assert result == "done"
+
+
+@pytest.fixture
+def coalesced_app():
+    """App whose search endpoint blocks until released, counting how often it runs."""
+    app = FastAPI()
+    flights = SingleFlight()
+    app.add_middleware(CoalescingMiddleware, flights=flights, enabled=True)
+    app.state.calls = 0
+    app.state.flights = flights
+    return app
+
+
+def test_identical_async_requests_run_once(coalesced_app):
+    """Test that concurrent identical requests get the leader's status, headers and body."""
+    release = asyncio.Event()
+
+    @coalesced_app.get("/api/contractors")
+    async def search(city_id: int, response: Response):
+        coalesced_app.state.calls += 1
+        call = coalesced_app.state.calls
+        await release.wait()
+        response.headers["X-Next-Cursor"] = "next"
+        return [{"call": call, "city_id": city_id}]
+
+    async def run():
+        transport = httpx.ASGITransport(app=coalesced_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            same = [
+                asyncio.create_task(http.get(url))
+                for url in ("/api/contractors?city_id=1",) * 4 + ("/api/contractors?city_id=01",)
+            ]
+            other = asyncio.create_task(http.get("/api/contractors?city_id=2"))
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*same), await other
+
+    same, other = asyncio.run(run())
+    assert coalesced_app.state.calls == 2
+    assert {response.content for response in same} == {b'[{"call":1,"city_id":1}]'}
+    assert all(response.headers["x-next-cursor"] == "next" for response in same)
+    assert other.json() == [{"call": 2, "city_id": 2}]
+    assert coalesced_app.state.flights.stats()["shared"] == 4
+
+
+def test_identical_threadpool_requests_run_once(coalesced_app):
+    """Test coalescing of a sync route, with clients on separate threads and event loops."""
+    arrived = threading.Semaphore(0)
+    release = threading.Event()
+
+    @coalesced_app.get("/api/contractors")
+    def search(city_id: int):
+        coalesced_app.state.calls += 1
+        arrived.release()
+        release.wait(5)
+        return [{"id": 7, "city_id": city_id}]
+
+    client = TestClient(coalesced_app)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        responses = [executor.submit(client.get, "/api/contractors?city_id=3") for _ in range(4)]
+        assert arrived.acquire(timeout=5)
+        # Let the other requests join the leader's call before it finishes
+        while coalesced_app.state.flights.stats()["shared"] < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        bodies = [future.result().json() for future in responses]
+
+    assert coalesced_app.state.calls == 1
+    assert bodies == [[{"id": 7, "city_id": 3}]] * 4
+
+
+def test_ndjson_requests_are_not_coalesced(coalesced_app):
+    """Test that streamed responses always run their own search."""
+
+    @coalesced_app.get("/api/contractors")
+    def search():
+        coalesced_app.state.calls += 1
+        return []
+
+    client = TestClient(coalesced_app)
+    client.get("/api/contractors", headers={"Accept": "application/x-ndjson"})
+    assert coalesced_app.state.flights.stats()["leaders"] == 0
+    assert coalesced_app.state.calls == 1
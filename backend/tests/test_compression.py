@@ -0,0 +1,87 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware, choose_encoding
+from app.pagination import NDJSON_MEDIA_TYPE
+
+ROWS = [{"id": i, "description": "Electricistas profesionales " * 4} for i in range(200)]
+
+
+@pytest.fixture
+def compressed_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    def large():
+        return ROWS
+
+    @app.get("/small")
+    def small():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(
+            (json.dumps(row) + "\n" for row in ROWS), media_type=NDJSON_MEDIA_TYPE
+        )
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("gzip;q=0.5, br;q=0.4", "gzip"),
+        ("identity", None),
+        ("*", "br"),
+        ("", None),
+    ],
+)
+def test_choose_encoding(header, expected):
+    """Test Accept-Encoding negotiation, including q-values and wildcards."""
+    assert choose_encoding(header) == expected
+
+
+@pytest.mark.parametrize(
+    ("encoding", "decompress"), [("br", brotli.decompress), ("gzip", gzip.decompress)]
+)
+def test_large_responses_are_compressed(compressed_client, encoding, decompress):
+    """Test that responses above the threshold use the negotiated encoding."""
+    with compressed_client.stream(
+        "GET", "/large", headers={"Accept-Encoding": encoding}
+    ) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw)
+    assert len(raw) < len(json.dumps(ROWS)) // 5
+    assert json.loads(decompress(raw)) == ROWS
+
+
+def test_small_responses_are_not_compressed(compressed_client):
+    """Test that responses below the threshold are sent as is."""
+    response = compressed_client.get("/small", headers={"Accept-Encoding": "gzip, br"})
+
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"status": "ok"}
+
+
+def test_streams_are_compressed_incrementally(compressed_client):
+    """Test that NDJSON streams are compressed chunk by chunk and decode to every row."""
+    response = compressed_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert [json.loads(line) for line in response.text.splitlines()] == ROWS
@@ -1,7 +1,3 @@
-import pytest
-from app.models import ContractorType, PriceRange
-
-
 def test_get_contractors_empty(client):
     """Test getting contractors when database is empty."""
     response = client.get("/api/contractors")
@@ -19,11 +15,11 @@ def test_get_contractors(client, sample_contractors):
 
 def test_get_contractors_by_specialty(client, sample_contractors):
     """Test filtering contractors by specialty."""
-    response = client.get("/api/contractors?specialty=electrician")
+    response = client.get("/api/contractors?specialty=electricity")
     assert response.status_code == 200
     data = response.json()
     assert len(data) == 1
-    assert data[0]["specialty"] == "electrician"
+    assert data[0]["specialty"] == "electricity"
     assert data[0]["name"] == "Sydney Electrician"
 
 
@@ -69,7 +65,7 @@ def test_get_contractor_by_id(client, sample_contractor):
     data = response.json()
     assert data["id"] == contractor_id
     assert data["name"] == "Test Electrician"
-    assert data["specialty"] == "electrician"
+    assert data["specialty"] == "electricity"
 
 
 def test_get_contractor_not_found(client):
@@ -79,11 +75,11 @@ def test_get_contractor_not_found(client):
     assert response.json()["detail"] == "Contractor not found"
 
 
-def test_create_contractor(client):
+def test_create_contractor(client, sample_city):
     """Test creating a new contractor."""
     new_contractor = {
         "name": "New Plumber",
-        "specialty": "plumber",
+        "specialty": "plumbing",
         "location": "Melbourne",
         "latitude": -37.8136,
         "longitude": 144.9631,
@@ -91,13 +87,14 @@ def test_create_contractor(client):
         "phone": "+61 3 1234 5678",
         "email": "newplumber@example.com",
         "description": "Expert plumber in Melbourne",
+        "city_id": sample_city.id,
     }
 
     response = client.post("/api/contractors", json=new_contractor)
     assert response.status_code == 200
     data = response.json()
     assert data["name"] == "New Plumber"
-    assert data["specialty"] == "plumber"
+    assert data["specialty"] == "plumbing"
     assert data["id"] is not None
 
 
@@ -120,7 +117,7 @@ def test_create_contractor_missing_fields(client):
     """Test creating a contractor with missing required fields."""
     incomplete_contractor = {
         "name": "Incomplete Contractor",
-        "specialty": "electrician",
+        "specialty": "electricity",
     }
 
     response = client.post("/api/contractors", json=incomplete_contractor)
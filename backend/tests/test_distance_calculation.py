@@ -1,3 +1,4 @@
+from app.geo import rank_by_distance, rank_by_unit_vectors, to_unit_vector
 from app.routers.contractors import calculate_distance
 
 
@@ -32,3 +33,57 @@ def test_calculate_distance_positive():
     """Test that distance is always positive."""
     distance = calculate_distance(-33.8688, 151.2093, -37.8136, 144.9631)
     assert distance > 0
+
+
+def test_rank_by_distance_matches_scalar():
+    """Test that batch ranking agrees with the scalar distance function."""
+    latitudes = [-33.8151, -33.8688, -33.8908, -37.8136]
+    longitudes = [150.9989, 151.2093, 151.2743, 144.9631]
+
+    indices, distances = rank_by_distance(-33.8688, 151.2093, latitudes, longitudes)
+
+    assert indices == [1, 2, 0, 3]
+    assert distances == [
+        calculate_distance(-33.8688, 151.2093, latitudes[i], longitudes[i]) for i in indices
+    ]
+
+
+def test_rank_by_distance_max_distance():
+    """Test that batch ranking applies the cutoff to the rounded distance."""
+    latitudes = [-33.8151, -33.8688, -33.8908]
+    longitudes = [150.9989, 151.2093, 151.2743]
+    cutoff = calculate_distance(-33.8688, 151.2093, -33.8908, 151.2743)
+
+    indices, distances = rank_by_distance(-33.8688, 151.2093, latitudes, longitudes, cutoff)
+
+    assert indices == [1, 2]
+    assert distances[-1] == cutoff
+
+
+def test_rank_by_distance_empty():
+    """Test ranking an empty candidate set."""
+    assert rank_by_distance(-33.8688, 151.2093, [], []) == ([], [])
+
+
+def test_rank_by_unit_vectors_matches_haversine():
+    """Test that ranking precomputed unit vectors agrees with the haversine ranking."""
+    latitudes = [-33.8151, -33.8688, -33.8908, -37.8136]
+    longitudes = [150.9989, 151.2093, 151.2743, 144.9631]
+    unit_vectors = [
+        to_unit_vector(lat, lon) for lat, lon in zip(latitudes, longitudes, strict=True)
+    ]
+
+    assert rank_by_unit_vectors(-33.8688, 151.2093, unit_vectors, 10) == rank_by_distance(
+        -33.8688, 151.2093, latitudes, longitudes, 10
+    )
+
+
+def test_rank_by_unit_vectors_without_cutoff():
+    """Test that unit-vector ranking without max_distance keeps every candidate."""
+    unit_vectors = [to_unit_vector(-33.8151, 150.9989), to_unit_vector(-33.8688, 151.2093)]
+
+    indices, distances = rank_by_unit_vectors(-33.8688, 151.2093, unit_vectors)
+
+    assert indices == [1, 0]
+    assert distances[0] == 0.0
+    assert distances[1] == calculate_distance(-33.8688, 151.2093, -33.8151, 150.9989)
@@ -1,3 +1,11 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app import database
+from app.main import app
+
+
 def test_read_root(client):
     """Test the root endpoint."""
     response = client.get("/")
@@ -6,10 +14,32 @@ def test_read_root(client):
 
 
 def test_health_check(client):
-    """Test the health check endpoint."""
+    """Test the health check endpoint, with live pool and admission queue statistics."""
     response = client.get("/health")
     assert response.status_code == 200
-    assert response.json() == {"status": "healthy"}
+    data = response.json()
+    assert data["status"] == "healthy"
+    assert "class" in data["pools"]["sync"]
+    assert data["admission"]["heavy"]["active"] == 0
+
+
+def test_health_check_without_database_config(client, monkeypatch):
+    """Test that liveness does not depend on the database being configured."""
+    monkeypatch.setattr(database, "_engine", None)
+    monkeypatch.setattr(database, "_read_router", None)
+    monkeypatch.setattr(database, "DATABASE_URL", None)
+
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert "pools" not in response.json()
+    assert client.get("/pool/stats").status_code == 503
+
+
+def test_pool_stats(client):
+    """Test the pool and admission queue statistics endpoint."""
+    data = client.get("/pool/stats").json()
+    assert "class" in data["pools"]["sync"]
+    assert data["admission"]["heavy"]["active"] == 0
 
 
 def test_get_specialties(client):
@@ -18,8 +48,42 @@ def test_get_specialties(client):
     assert response.status_code == 200
     data = response.json()
     assert "specialties" in data
-    assert len(data["specialties"]) == 4
-    assert "electrician" in data["specialties"]
-    assert "plumber" in data["specialties"]
+    assert len(data["specialties"]) == 8
+    assert "electricity" in data["specialties"]
+    assert "plumbing" in data["specialties"]
     assert "gas" in data["specialties"]
-    assert "builder" in data["specialties"]
+    assert "construction" in data["specialties"]
+
+
+def test_ready_check(client):
+    """Test that a started worker with a reachable database is ready."""
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
+
+
+def test_not_ready_before_startup():
+    """Test that readiness fails until the lifespan has run."""
+    response = TestClient(app).get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "starting"}
+
+
+def test_not_ready_without_database(client, monkeypatch, tmp_path):
+    """Test that an unreachable database makes the worker unready but still healthy."""
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'app.db'}")
+    monkeypatch.setattr(database, "_engine", broken)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "unavailable"
+    assert client.get("/health").status_code == 200
+
+
+def test_engine_created_on_first_use(monkeypatch):
+    """Test that a missing DATABASE_URL only fails when an engine is first needed."""
+    monkeypatch.setattr(database, "_engine", None)
+    monkeypatch.setattr(database, "DATABASE_URL", None)
+
+    with pytest.raises(ValueError, match="DATABASE_URL"):
+        database.get_engine()
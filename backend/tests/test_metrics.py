@@ -0,0 +1,63 @@
+import pytest
+
+from app.metrics import REQUEST_DURATION, SEARCH_PHASES, SQL_QUERIES, Counter, Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test the Prometheus text rendering of a labelled histogram."""
+    histogram = Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(3.0, "/a")
+
+    lines = list(histogram.samples())
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+    assert 'demo_seconds_sum{route="/a"} 3.55' in lines
+
+
+def test_counter_escapes_label_values():
+    """Test that label values are escaped in the exposition format."""
+    counter = Counter("demo", "Demo.", ("name",))
+    counter.inc('say "hi"', amount=2)
+    assert list(counter.samples()) == ['demo_total{name="say \\"hi\\""} 2']
+
+
+def test_requests_are_timed_per_route_template(client, sample_city_contractors):
+    """Test that request durations are labelled by route template, not raw path."""
+    contractor_id = sample_city_contractors[0].id
+    before = REQUEST_DURATION.count("GET", "/api/contractors/{contractor_id}", "200")
+
+    client.get(f"/api/contractors/{contractor_id}")
+
+    after = REQUEST_DURATION.count("GET", "/api/contractors/{contractor_id}", "200")
+    assert after == before + 1
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_search_phases_and_sql_are_recorded(client):
+    """Test that a location search records its phases and SQL statements."""
+    phases_before = {phase: SEARCH_PHASES.count(phase) for phase in ("query", "rank", "serialize")}
+    selects_before = SQL_QUERIES.value("SELECT")
+
+    client.get("/api/contractors?latitude=-34.5889&longitude=-58.4194&max_distance=10")
+
+    for phase, count in phases_before.items():
+        assert SEARCH_PHASES.count(phase) == count + 1, phase
+    assert SQL_QUERIES.value("SELECT") > selects_before
+
+
+def test_metrics_endpoint(client):
+    """Test that /metrics serves every metric family as Prometheus text."""
+    client.get("/health")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in (
+        response.text
+    )
+    assert "# TYPE db_queries counter" in response.text
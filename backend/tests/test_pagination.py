@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from app.models import City
+from app.pagination import NDJSON_MEDIA_TYPE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+
+def _collect_pages(client, url):
+    """Follow X-Next-Cursor headers and return every page."""
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return pages
+
+
+def test_cursor_round_trip():
+    """Test that cursors decode back to the encoded sort key."""
+    assert decode_cursor(encode_cursor((1.25, 7))) == [1.25, 7]
+    assert decode_cursor(encode_cursor(("São Paulo", 2))) == ["São Paulo", 2]
+
+
+def test_invalid_cursor(client):
+    """Test that a malformed cursor is rejected."""
+    response = client.get("/api/contractors?cursor=not-a-cursor")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_contractors_keyset_pages(client, sample_city_contractors):
+    """Test paging through contractors by id."""
+    pages = _collect_pages(client, "/api/contractors?page_size=3")
+
+    assert [len(page) for page in pages] == [3, 1]
+    ids = [contractor["id"] for page in pages for contractor in page]
+    assert ids == sorted(c.id for c in sample_city_contractors)
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_contractors_location_keyset_pages(client):
+    """Test paging through a location search by (distance, id)."""
+    url = "/api/contractors?latitude=-34.5889&longitude=-58.4194&page_size=2"
+    pages = _collect_pages(client, url)
+
+    assert [len(page) for page in pages] == [2, 2]
+    distances = [contractor["distance"] for page in pages for contractor in page]
+    assert distances == sorted(distances)
+    full = client.get("/api/contractors?latitude=-34.5889&longitude=-58.4194").json()
+    assert [c["id"] for page in pages for c in page] == [c["id"] for c in full]
+
+
+def test_contractors_ndjson_stream(client, sample_city_contractors):
+    """Test streaming contractors as newline-delimited JSON."""
+    response = client.get("/api/contractors", headers={"Accept": NDJSON_MEDIA_TYPE})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(NDJSON_MEDIA_TYPE)
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert {row["name"] for row in rows} == {c.name for c in sample_city_contractors}
+
+
+def test_cities_keyset_pages(client, db_session):
+    """Test paging through cities by (name, id), including duplicate names."""
+    db_session.add_all(
+        [
+            City(name="Lima", country="Peru"),
+            City(name="Bogotá", country="Colombia"),
+            City(name="Lima", country="Peru"),
+            City(name="Santiago", country="Chile"),
+        ]
+    )
+    db_session.commit()
+
+    pages = _collect_pages(client, "/api/cities/?page_size=2")
+
+    assert [len(page) for page in pages] == [2, 2]
+    names = [city["name"] for page in pages for city in page]
+    assert names == ["Bogotá", "Lima", "Lima", "Santiago"]
+
+
+def test_cities_ndjson_stream(client, sample_city):
+    """Test streaming cities as newline-delimited JSON."""
+    response = client.get("/api/cities/", headers={"Accept": NDJSON_MEDIA_TYPE})
+
+    assert response.status_code == 200
+    assert [json.loads(line)["name"] for line in response.text.splitlines()] == [sample_city.name]
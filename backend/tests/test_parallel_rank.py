@@ -0,0 +1,79 @@
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from app import parallel_rank
+from app.geo import rank_by_unit_vectors, to_unit_vector
+from app.parallel_rank import rank_parallel, use_parallel
+from app.search import LocationSearch
+
+ORIGIN = (-34.6037, -58.3816)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as executor:
+        yield executor
+
+
+def scattered_unit_vectors(count: int) -> list[tuple[float, float, float]]:
+    rng = random.Random(7)
+    points = [
+        (ORIGIN[0] + rng.uniform(-0.2, 0.2), ORIGIN[1] + rng.uniform(-0.2, 0.2))
+        for _ in range(count)
+    ]
+    # Duplicate points produce distance ties across shard boundaries
+    points += points[:50]
+    return [to_unit_vector(lat, lon) for lat, lon in points]
+
+
+@pytest.mark.parametrize("max_distance", [None, 5.0])
+def test_rank_parallel_matches_serial(pool, max_distance):
+    """Test that sharded scoring returns exactly the single-core ranking."""
+    vectors = scattered_unit_vectors(2000)
+
+    expected = rank_by_unit_vectors(*ORIGIN, vectors, max_distance)
+    assert rank_parallel(*ORIGIN, vectors, max_distance, executor=pool, shards=3) == expected
+
+
+def test_rank_parallel_merges_top_k(pool):
+    """Test that per-shard top-k results merge into the global top-k, ties in index order."""
+    vectors = scattered_unit_vectors(2000)
+
+    indices, distances = rank_by_unit_vectors(*ORIGIN, vectors, 10.0)
+    result = rank_parallel(*ORIGIN, vectors, 10.0, limit=25, executor=pool, shards=4)
+    assert result == (indices[:25], distances[:25])
+
+
+def test_rank_parallel_empty(pool):
+    """Test scoring an empty candidate set."""
+    assert rank_parallel(*ORIGIN, [], executor=pool) == ([], [])
+
+
+def test_use_parallel_threshold(monkeypatch):
+    """Test that only large candidate sets go to the pool, and only when enabled."""
+    monkeypatch.setattr(parallel_rank, "PARALLEL_RANK_WORKERS", 4)
+    monkeypatch.setattr(parallel_rank, "PARALLEL_RANK_MIN_CANDIDATES", 1000)
+    monkeypatch.setattr(parallel_rank, "PARALLEL_RANK_ENABLED", False)
+    assert not use_parallel(5000)
+
+    monkeypatch.setattr(parallel_rank, "PARALLEL_RANK_ENABLED", True)
+    assert use_parallel(5000)
+    assert not use_parallel(999)
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_location_search_ranks_in_pool(monkeypatch, pool, db_session):
+    """Test that a large radius search is scored by the pool with the same result."""
+    search = LocationSearch(-34.5889, -58.4194, None, None, None, None)
+    rows = db_session.execute(search.radius_statement()).all()
+    expected = search.rank(rows)
+
+    monkeypatch.setattr(parallel_rank, "PARALLEL_RANK_ENABLED", True)
+    monkeypatch.setattr(parallel_rank, "PARALLEL_RANK_WORKERS", 2)
+    monkeypatch.setattr(parallel_rank, "PARALLEL_RANK_MIN_CANDIDATES", 1)
+    monkeypatch.setattr(parallel_rank, "_executor", pool)
+
+    assert search.rank(rows) == expected
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.pool import (
+    TimedAsyncQueuePool,
+    TimedQueuePool,
+    pool_options,
+    pool_stats,
+    warm_async_pool,
+    warm_pool,
+)
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    """File SQLite engine on a small timed queue pool."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=2,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_pool_options_for_server_databases():
+    """Test that server databases get a sized, timed pool and SQLite keeps its default."""
+    assert pool_options("sqlite:///./test.db") == {}
+
+    options = pool_options("mysql+pymysql://user:secret@db/contractor_db")
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_pre_ping"] is True
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_recycle"} <= options.keys()
+    async_options = pool_options("mysql+aiomysql://user:secret@db/contractor_db", asynchronous=True)
+    assert async_options["poolclass"] is TimedAsyncQueuePool
+
+
+def test_pool_stats_report_checked_out_and_overflow(pooled_engine):
+    """Test that stats count overflow connections and checkout timeouts."""
+    connections = [pooled_engine.connect() for _ in range(3)]
+
+    stats = pool_stats(pooled_engine.pool)
+    assert stats["class"] == "TimedQueuePool"
+    assert (stats["size"], stats["checked_out"], stats["overflow"]) == (2, 3, 1)
+
+    with pytest.raises(exc.TimeoutError):
+        pooled_engine.connect()
+    for connection in connections:
+        connection.close()
+
+    stats = pool_stats(pooled_engine.pool)
+    assert (stats["checked_out"], stats["checked_in"], stats["overflow"]) == (0, 2, 0)
+    assert stats["checkout"]["checkouts"] == 3
+    assert stats["checkout"]["timeouts"] == 1
+    assert stats["checkout"]["max_ms"] >= stats["checkout"]["avg_ms"] > 0
+
+
+def test_checkout_stats_survive_dispose(pooled_engine):
+    """Test that recreating the pool keeps the checkout totals."""
+    pooled_engine.connect().close()
+    pooled_engine.dispose()
+
+    assert pool_stats(pooled_engine.pool)["checkout"]["checkouts"] == 1
+
+
+def test_warm_pool_opens_up_to_pool_size(pooled_engine):
+    """Test that warmup leaves the pool full of idle connections, never overflowing it."""
+    assert warm_pool(pooled_engine, connections=10) == 2
+
+    stats = pool_stats(pooled_engine.pool)
+    assert (stats["checked_in"], stats["checked_out"]) == (2, 0)
+
+
+def test_warm_pool_tolerates_unreachable_database(tmp_path, caplog):
+    """Test that a failing warmup is logged instead of stopping startup."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'missing' / 'pool.db'}", poolclass=TimedQueuePool
+    )
+
+    assert warm_pool(engine, connections=2) == 0
+    assert "Pool warmup stopped" in caplog.text
+
+
+def test_warm_async_pool(tmp_path):
+    """Test that the async engine's pool is warmed the same way."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=TimedAsyncQueuePool, pool_size=3
+    )
+
+    async def warm():
+        try:
+            return await warm_async_pool(engine, connections=5), pool_stats(engine.pool)
+        finally:
+            await engine.dispose()
+
+    opened, stats = asyncio.run(warm())
+    assert opened == 3
+    assert stats["checked_in"] == 3
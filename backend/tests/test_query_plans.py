@@ -0,0 +1,97 @@
+"""Query-plan regression tests for the statements behind GET /api/contractors.
+
+Every filtered query must be answered through an index; a plan that falls
+back to scanning the whole contractors table fails the test.
+"""
+
+import pytest
+from sqlalchemy import Connection, Select, inspect
+
+from app.constants import Specialty
+from app.migrations import FILTER_INDEXES, add_contractor_filter_indexes, migrate
+from app.pagination import PageParams
+from app.search import LocationSearch, by_ids_statement, listing_statement
+from tests.conftest import engine
+
+ORIGIN = (-34.6037, -58.3816)
+
+
+def query_plan(connection: Connection, statement: Select) -> list[str]:
+    """Return the database's plan for ``statement``, one line per step."""
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN {compiled}").mappings()
+    return [f"{row['table']} type={row['type']} key={row['key']}" for row in rows]
+
+
+def full_scans(plan: list[str], table: str = "contractors") -> list[str]:
+    """Return the plan steps that read every row of ``table``."""
+    return [
+        step for step in plan if step == f"SCAN {table}" or step.startswith(f"{table} type=ALL")
+    ]
+
+
+def _listing(city_id, specialty, page_size=None):
+    return listing_statement(city_id, specialty, None, PageParams(None, page_size))[0]
+
+
+def _location(city_id, specialty, max_distance=None):
+    return LocationSearch(*ORIGIN, max_distance, None, city_id, specialty).radius_statement()
+
+
+FILTERED_QUERIES = {
+    "city": _listing(1, None),
+    "specialty": _listing(None, Specialty.GAS),
+    "city_specialty": _listing(1, Specialty.GAS),
+    "city_specialty_page": _listing(1, Specialty.GAS, page_size=20),
+    "specialty_page": _listing(None, Specialty.GAS, page_size=20),
+    "radius": _location(None, None, 5),
+    "city_radius": _location(1, None, 5),
+    "specialty_radius": _location(None, Specialty.GAS, 5),
+    "city_specialty_radius": _location(1, Specialty.GAS, 5),
+    "specialty_location": _location(None, Specialty.GAS),
+    "city_specialty_location": _location(1, Specialty.GAS),
+    "nearest_ids": by_ids_statement([1, 2, 3]),
+}
+
+
+@pytest.mark.parametrize("name", FILTERED_QUERIES)
+def test_filtered_queries_use_an_index(db_session, name):
+    """Test that no filter combination regresses to a full table scan."""
+    plan = query_plan(db_session.connection(), FILTERED_QUERIES[name])
+    assert not full_scans(plan), plan
+
+
+def test_city_specialty_uses_composite_index(db_session):
+    """Test that the city + specialty combination is served by the composite index."""
+    plan = query_plan(db_session.connection(), FILTERED_QUERIES["city_specialty"])
+    assert any("ix_contractors_city_specialty" in step for step in plan), plan
+
+
+@pytest.mark.usefixtures("db_session")
+def test_migration_adds_filter_indexes():
+    """Test that the migration creates missing filter indexes and is idempotent."""
+    with engine.begin() as connection:
+        for name in FILTER_INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX {name}")
+
+    for expected in (True, False):
+        with engine.begin() as connection:
+            assert add_contractor_filter_indexes(connection) is expected
+
+    existing = {index["name"] for index in inspect(engine).get_indexes("contractors")}
+    assert set(FILTER_INDEXES) <= existing
+
+
+@pytest.mark.usefixtures("db_session")
+def test_migrate_reports_only_migrations_that_changed_something():
+    """Test that migrate() lists a migration only when it had something to apply."""
+    assert migrate(engine) == []
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f"DROP INDEX {FILTER_INDEXES[0]}")
+
+    assert migrate(engine) == ["add_contractor_filter_indexes"]
+    assert migrate(engine) == []
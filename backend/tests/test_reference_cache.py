@@ -0,0 +1,80 @@
+import pytest
+
+from app.models import City
+from app.reference_cache import ReferenceCache, etag_matches
+
+
+def test_etag_matches():
+    """Test If-None-Match parsing, including lists, weak tags and wildcards."""
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"xyz", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"xyz"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_specialties_conditional_request(client):
+    """Test that specialties carry an ETag and answer revalidation with 304."""
+    response = client.get("/api/specialties")
+    assert response.status_code == 200
+    assert "max-age" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+
+    cached = client.get("/api/specialties", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+
+def test_cities_conditional_request(client, sample_city):
+    """Test that cities are served with an ETag and revalidated with 304."""
+    response = client.get("/api/cities/")
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": sample_city.id, "name": sample_city.name, "country": sample_city.country}
+    ]
+
+    cached = client.get("/api/cities/", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+
+@pytest.mark.usefixtures("sample_city")
+def test_cities_payload_invalidated_on_commit(client, db_session):
+    """Test that committing a city change produces a new payload and ETag."""
+    etag = client.get("/api/cities/").headers["etag"]
+
+    db_session.add(City(name="Lima", country="Peru"))
+    db_session.commit()
+
+    response = client.get("/api/cities/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [city["name"] for city in response.json()] == ["Buenos Aires", "Lima"]
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.usefixtures("sample_city")
+def test_cities_payload_kept_on_rollback(client, db_session):
+    """Test that rolled back city changes do not invalidate the payload."""
+    etag = client.get("/api/cities/").headers["etag"]
+
+    db_session.add(City(name="Lima", country="Peru"))
+    db_session.flush()
+    db_session.rollback()
+
+    assert client.get("/api/cities/", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_build_racing_a_commit_is_not_stored():
+    """Test that a payload built across an invalidation is served once but not cached."""
+
+    def build_during_commit(_db):
+        # A commit lands while the rows are being read
+        cache.invalidate()
+        return ["stale"]
+
+    cache = ReferenceCache(build_during_commit, "no-cache")
+    assert cache.get(None).body == b'["stale"]'
+    assert cache.peek() is None
+
+    version = cache.version
+    assert cache.put(["fresh"], version) is cache.peek()
@@ -0,0 +1,162 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.requests import Request
+
+from app import database, replicas
+from app.database import Base, get_read_db
+from app.main import app
+from app.models import City
+from app.replicas import READ_PRIMARY_COOKIE, ReadRouter, reads_primary
+from app.spatial_tree import contractor_tree
+from app.text_index import contractor_text_index
+from tests.conftest import engine as primary_engine
+from tests.test_bulk_load import _record
+
+
+def _replica(path, name):
+    """File SQLite stand-in for a replica, holding one city called ``name``."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(City.__table__.insert().values(name=name, country="Replica"))
+    return engine
+
+
+@pytest.fixture
+def replica_engines(tmp_path):
+    engines = [_replica(tmp_path / "a.db", "a"), _replica(tmp_path / "b.db", "b")]
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+def _served_by(router: ReadRouter, primary: bool = False) -> str:
+    with router.connect(primary) as connection:
+        return connection.execute(text("SELECT name FROM cities ORDER BY id")).scalar() or "primary"
+
+
+@pytest.mark.usefixtures("db_session")
+def test_round_robin_cycles_replicas(replica_engines):
+    """Test that round-robin spreads reads over the replicas and never picks the primary."""
+    router = ReadRouter(primary_engine, replica_engines, "round_robin")
+
+    assert [_served_by(router) for _ in range(4)] == ["a", "b", "a", "b"]
+    assert _served_by(router, primary=True) == "primary"
+
+
+@pytest.mark.usefixtures("db_session")
+def test_least_connections_picks_idlest_replica(replica_engines):
+    """Test that least-connections avoids the replica with connections checked out."""
+    router = ReadRouter(primary_engine, replica_engines, "least_connections")
+
+    with replica_engines[0].connect():
+        assert [_served_by(router) for _ in range(3)] == ["b", "b", "b"]
+    assert _served_by(router) == "a"
+
+
+@pytest.mark.usefixtures("db_session")
+def test_failed_replica_is_skipped_then_primary_used(replica_engines, tmp_path):
+    """Test that unreachable replicas fall back to the next one, then to the primary."""
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'c.db'}")
+    router = ReadRouter(primary_engine, [broken, replica_engines[0]], "round_robin")
+
+    assert {_served_by(router) for _ in range(4)} == {"a"}
+    assert router.candidates()[:-1] == [replica_engines[0]]
+
+    only_broken = ReadRouter(primary_engine, [broken], retry_seconds=0)
+    assert _served_by(only_broken) == "primary"
+    # With no retry delay the replica is tried again on the next read
+    assert only_broken.candidates() == [broken, primary_engine]
+
+
+def test_invalid_selection_rejected():
+    """Test that an unknown selection strategy is a configuration error."""
+    with pytest.raises(ValueError, match="DB_REPLICA_SELECTION"):
+        ReadRouter(primary_engine, selection="random")
+
+
+@pytest.mark.usefixtures("replica_engines")
+def test_async_connect_falls_back(tmp_path):
+    """Test that the async router skips a failing replica as well."""
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'c.db'}")
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'a.db'}")
+    router = ReadRouter(replica, [broken, replica])
+
+    async def read():
+        connection = await router.connect_async()
+        try:
+            return (await connection.execute(text("SELECT name FROM cities"))).scalar()
+        finally:
+            await connection.close()
+            await broken.dispose()
+            await replica.dispose()
+
+    assert asyncio.run(read()) == "a"
+    assert router.candidates()[:-1] == [replica]
+
+
+def test_reads_follow_writes_to_primary(client, sample_city, replica_engines, monkeypatch):
+    """Test that reads go to a replica, except shortly after the client wrote."""
+    monkeypatch.setattr(database, "_read_router", ReadRouter(primary_engine, replica_engines[:1]))
+    monkeypatch.setattr(replicas, "REPLICA_URLS", ["sqlite:///a.db"])
+    del app.dependency_overrides[get_read_db]
+
+    response = client.post("/api/contractors/bulk", json=[_record(sample_city.id)])
+    assert response.json()["inserted"] == 1
+    assert READ_PRIMARY_COOKIE in response.cookies
+
+    # The replica has not caught up, but the writer reads from the primary
+    assert [c["name"] for c in client.get("/api/contractors").json()] == ["Gasista Norte"]
+
+    client.cookies.clear()
+    assert client.get("/api/contractors").json() == []
+
+
+@pytest.mark.parametrize(
+    ("offset", "expected"),
+    [(-1, False), (2, True), (3600, False), (float("inf"), False), (float("nan"), False)],
+)
+def test_read_primary_cookie_is_bounded_by_the_window(offset, expected):
+    """Test that only deadlines within one read-your-writes window pin reads to the primary."""
+    until = time.time() + offset
+    request = Request(
+        {"type": "http", "headers": [(b"cookie", f"{READ_PRIMARY_COOKIE}={until}".encode())]}
+    )
+    assert reads_primary(request) is expected
+
+
+def test_primary_reads_skip_replica_cached_searches(
+    client, sample_city, replica_engines, monkeypatch
+):
+    """Test that a search cached from a lagging replica is not served to a recent writer."""
+    monkeypatch.setattr(database, "_read_router", ReadRouter(primary_engine, replica_engines[:1]))
+    monkeypatch.setattr(replicas, "REPLICA_URLS", ["sqlite:///a.db"])
+    del app.dependency_overrides[get_read_db]
+    url = "/api/contractors?latitude=-34.545&longitude=-58.464&max_distance=5"
+
+    client.post("/api/contractors/bulk", json=[_record(sample_city.id)])
+    pinned = dict(client.cookies)
+    client.cookies.clear()
+    # Another client caches the replica's result, which does not have the new row yet
+    assert client.get(url).json() == []
+
+    client.cookies.update(pinned)
+    assert [c["name"] for c in client.get(url).json()] == ["Gasista Norte"]
+
+
+def test_index_loads_read_the_primary(client, sample_city, replica_engines, monkeypatch):
+    """Test that replica-served searches build the in-process indexes from the primary."""
+    monkeypatch.setattr(database, "_read_router", ReadRouter(primary_engine, replica_engines[:1]))
+    monkeypatch.setattr(replicas, "REPLICA_URLS", ["sqlite:///a.db"])
+    del app.dependency_overrides[get_read_db]
+
+    client.post("/api/contractors/bulk", json=[_record(sample_city.id)])
+    client.cookies.clear()
+    client.get("/api/contractors?latitude=-34.545&longitude=-58.464&limit=1")
+    client.get("/api/contractors?q=gasista")
+
+    assert len(contractor_tree) == len(contractor_text_index) == 1
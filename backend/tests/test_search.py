@@ -0,0 +1,111 @@
+import json
+import pickle
+
+import pytest
+from sqlalchemy import event
+
+from app.pagination import encode_row
+from app.reference_cache import serialize
+from app.schemas import ContractorResponse
+from app.search import by_ids_statement, parse_fields, result_columns, to_result
+from tests.conftest import engine
+
+
+def test_result_rows_match_response_model(db_session, sample_city_contractors):
+    """Test that lean result rows serialize exactly like validated response models."""
+    ids = [contractor.id for contractor in sample_city_contractors]
+    rows = db_session.execute(by_ids_statement(ids).order_by("id")).all()
+
+    for row, contractor in zip(rows, sample_city_contractors, strict=True):
+        expected = ContractorResponse.model_validate(contractor).model_dump(mode="json")
+        assert json.loads(encode_row(to_result(row))) == expected
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_location_results_are_plain_json(client):
+    """Test that location searches return every response field, with distances."""
+    response = client.get("/api/contractors?latitude=-34.5889&longitude=-58.4194&limit=2")
+
+    assert response.headers["content-type"] == "application/json"
+    rows = response.json()
+    assert set(rows[0]) == set(ContractorResponse.model_fields)
+    assert rows[0]["name"] == "ElectroBA"
+    assert rows[0]["distance"] == 0
+    assert rows[0]["specialty"] == "electricity"
+
+
+def test_serialize_result_rows(db_session, sample_city_contractors):
+    """Test that result rows serialize to the same document as their validated responses."""
+    ids = [contractor.id for contractor in sample_city_contractors]
+    rows = db_session.execute(by_ids_statement(ids).order_by("id")).all()
+    results = [to_result(row, 1.25) for row in rows]
+
+    document = json.loads(serialize(results))
+    assert document == [
+        ContractorResponse.model_validate(result, from_attributes=True).model_dump(mode="json")
+        for result in results
+    ]
+    assert document[0]["distance"] == 1.25
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_fields_projection_listing(client):
+    """Test that a listing returns only the requested fields plus the id."""
+    response = client.get("/api/contractors?fields=name,price_range&page_size=2")
+
+    assert response.status_code == 200
+    assert [set(row) for row in response.json()] == [{"id", "name", "price_range"}] * 2
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_fields_projection_location_matches_full_rows(client):
+    """Test that projected location results are the full results restricted to the fields."""
+    url = "/api/contractors?latitude=-34.5889&longitude=-58.4194"
+    full = client.get(url).json()
+    projected = client.get(f"{url}&fields=name,specialty").json()
+
+    assert projected == [
+        {key: row[key] for key in ("id", "name", "specialty", "distance")} for row in full
+    ]
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_fields_projection_reaches_sql(client):
+    """Test that projected-out columns are not selected from the database."""
+    statements = []
+
+    def record(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        client.get("/api/contractors?latitude=-34.5889&longitude=-58.4194&fields=name")
+        client.get("/api/contractors?fields=name&page_size=2")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    selects = [statement for statement in statements if statement.startswith("SELECT")]
+    assert selects
+    assert not any("description" in statement for statement in selects)
+
+
+def test_fields_projection_rejects_unknown_fields(client):
+    """Test that unknown fields are reported as a bad request."""
+    response = client.get("/api/contractors?fields=name,password")
+
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
+
+
+def test_projected_rows_pickle(db_session, sample_city_contractors):
+    """Test that projected rows survive the Redis cache's pickling."""
+    fields = parse_fields("name", location=True)
+    row = db_session.execute(
+        by_ids_statement([sample_city_contractors[0].id], result_columns(fields))
+    ).one()
+
+    result = to_result(row, 1.5, fields)
+    assert pickle.loads(pickle.dumps(result)) == result
+    assert json.loads(serialize([result])) == [
+        {"id": sample_city_contractors[0].id, "name": "ElectroBA", "distance": 1.5}
+    ]
@@ -0,0 +1,145 @@
+import os
+
+import numpy as np
+import pytest
+
+from app import search
+from app.models import Contractor
+from app.snapshot import ContractorSnapshot, build_snapshot
+from tests.test_pagination import _collect_pages
+
+ORIGIN = "latitude=-34.5889&longitude=-58.4194"
+
+
+@pytest.fixture
+def snapshot(monkeypatch, tmp_path):
+    """Serve location searches from a snapshot directory under ``tmp_path``."""
+    handle = ContractorSnapshot(tmp_path)
+    monkeypatch.setattr(search, "contractor_snapshot", handle)
+    return handle
+
+
+def test_build_snapshot_writes_typed_columns(db_session, sample_city_contractors, tmp_path):
+    """Test that a build writes id-ordered typed columns and publishes them as current."""
+    path = build_snapshot(db_session, tmp_path)
+
+    assert os.readlink(tmp_path / "current") == path.name == "v000001"
+    state = ContractorSnapshot(tmp_path).refresh()
+    assert state.version == 1
+    assert state.manifest["count"] == len(sample_city_contractors)
+    assert state.ids.tolist() == sorted(c.id for c in sample_city_contractors)
+    assert state.latitudes.dtype == np.float32
+    assert state.unit_vectors.shape == (len(sample_city_contractors), 3)
+    assert isinstance(state.ids, np.memmap)
+
+
+def test_snapshot_search_matches_database_search(
+    client, db_session, sample_city_contractors, snapshot, tmp_path
+):
+    """Test that snapshot-backed searches return the same rows as database searches."""
+    urls = [
+        f"/api/contractors?{ORIGIN}",
+        f"/api/contractors?{ORIGIN}&max_distance=3",
+        f"/api/contractors?{ORIGIN}&limit=2",
+        f"/api/contractors?{ORIGIN}&specialty=gas&city_id={sample_city_contractors[0].city_id}",
+    ]
+    expected = [client.get(url).json() for url in urls]
+
+    build_snapshot(db_session, tmp_path)
+    snapshot.refresh()
+    assert [client.get(url).json() for url in urls] == expected
+
+
+def test_snapshot_pages_load_only_requested_rows(
+    client, db_session, sample_city_contractors, snapshot, tmp_path
+):
+    """Test that keyset pagination over the snapshot walks every match exactly once."""
+    build_snapshot(db_session, tmp_path)
+    snapshot.refresh()
+
+    pages = _collect_pages(client, f"/api/contractors?{ORIGIN}&page_size=2")
+
+    assert len(pages[0]) == 2
+    rows = [row for page in pages for row in page]
+    assert sorted(row["id"] for row in rows) == sorted(c.id for c in sample_city_contractors)
+    assert [row["distance"] for row in rows] == sorted(row["distance"] for row in rows)
+
+
+def test_unpaged_snapshot_search_loads_rows_in_chunks(
+    client, db_session, sample_city_contractors, snapshot, tmp_path, monkeypatch
+):
+    """Test that an unpaged snapshot search loads its rows through bounded IN lists."""
+    build_snapshot(db_session, tmp_path)
+    snapshot.refresh()
+    monkeypatch.setattr(search, "BY_IDS_CHUNK_SIZE", 3)
+
+    rows = client.get(f"/api/contractors?{ORIGIN}").json()
+    assert sorted(row["id"] for row in rows) == sorted(c.id for c in sample_city_contractors)
+
+
+def test_snapshot_search_includes_rows_written_after_the_build(
+    client, db_session, sample_city_contractors, snapshot, tmp_path
+):
+    """Test that contractors created after the build are ranked in until the next one."""
+    build_snapshot(db_session, tmp_path)
+    snapshot.refresh()
+    created = client.post(
+        "/api/contractors",
+        json={
+            "name": "Electricistas Nuevos",
+            "specialty": "electricity",
+            "location": "Palermo",
+            "latitude": -34.5890,
+            "longitude": -58.4195,
+            "price_range": "$",
+            "city_id": sample_city_contractors[0].city_id,
+        },
+    ).json()
+
+    urls = [
+        f"/api/contractors?{ORIGIN}",
+        f"/api/contractors?{ORIGIN}&limit=2",
+        f"/api/contractors?{ORIGIN}&max_distance=3&specialty=electricity",
+    ]
+    served = [client.get(url).json() for url in urls]
+    assert all(created["id"] in [row["id"] for row in rows] for rows in served)
+    assert len(served[0]) == len(sample_city_contractors) + 1
+
+    # The database path ranks the same rows
+    snapshot.directory = None
+    assert [client.get(url).json() for url in urls] == served
+
+
+def test_rebuild_swaps_version_and_prunes_old(
+    db_session, sample_city_contractors, snapshot, tmp_path
+):
+    """Test that a rebuild is picked up on refresh while the old mapping stays readable."""
+    build_snapshot(db_session, tmp_path)
+    old = snapshot.refresh()
+
+    db_session.query(Contractor).filter(Contractor.id == sample_city_contractors[0].id).delete()
+    db_session.commit()
+    build_snapshot(db_session, tmp_path, keep=1)
+    build_snapshot(db_session, tmp_path, keep=1)
+
+    assert sorted(path.name for path in tmp_path.glob("v*")) == ["v000003"]
+    new = snapshot.refresh()
+    assert new.version == 3
+    assert len(new) == len(old) - 1
+    assert old.ids.tolist()[0] == sample_city_contractors[0].id
+
+
+def test_build_rejects_keeping_no_versions(db_session, tmp_path):
+    """Test that keep=0 is rejected before anything is written, instead of pruning nothing."""
+    with pytest.raises(ValueError, match="keep"):
+        build_snapshot(db_session, tmp_path, keep=0)
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_missing_snapshot_falls_back_to_database(client, snapshot):
+    """Test that searches use the database until a snapshot has been built."""
+    assert snapshot.search(-34.5889, -58.4194) is None
+
+    response = client.get(f"/api/contractors?{ORIGIN}&max_distance=3")
+    assert [row["name"] for row in response.json()] == ["ElectroBA", "PlomeroExpress"]
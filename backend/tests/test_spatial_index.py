@@ -0,0 +1,116 @@
+import math
+
+import pytest
+from sqlalchemy import select, text
+
+from app.geo import (
+    bounding_box,
+    calculate_distance,
+    encode_geohash,
+    geohash_cover,
+    to_unit_vector,
+)
+from app.migrations import UNIT_VECTOR_COLUMNS, backfill_spatial_columns
+from app.models import Contractor
+from app.search import nearby_filter
+from tests.conftest import engine
+
+
+def test_encode_geohash_known_value():
+    """Test geohash encoding against a published reference value."""
+    assert encode_geohash(57.64911, 10.40744) == "u4pruydqq"
+    assert encode_geohash(57.64911, 10.40744, precision=5) == "u4pru"
+
+
+def test_bounding_box_contains_circle():
+    """Test that the bounding box encloses points at the search radius."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(-34.6037, -58.3816, 10)
+
+    assert calculate_distance(-34.6037, -58.3816, max_lat, -58.3816) <= 10.01
+    assert calculate_distance(-34.6037, -58.3816, -34.6037, max_lon) <= 10.01
+    assert min_lat < -34.6037 < max_lat
+    assert min_lon < -58.3816 < max_lon
+
+
+def test_bounding_box_crossing_antimeridian():
+    """Test that longitude bounds are dropped when the box wraps around."""
+    _, _, min_lon, max_lon = bounding_box(-17.7134, 179.99, 50)
+    assert min_lon is None
+    assert max_lon is None
+
+
+def test_geohash_cover_includes_points_in_radius():
+    """Test that every point within the radius falls in a covering cell."""
+    latitude, longitude, radius = -23.5505, -46.6333, 5
+    cells = geohash_cover(latitude, longitude, radius)
+    assert cells
+
+    for bearing in range(0, 360, 15):
+        for fraction in (0.25, 0.5, 1.0):
+            dlat = radius * fraction * math.cos(math.radians(bearing)) / 111.2
+            dlon = (
+                radius
+                * fraction
+                * math.sin(math.radians(bearing))
+                / (111.2 * math.cos(math.radians(latitude)))
+            )
+            point_hash = encode_geohash(latitude + dlat * 0.99, longitude + dlon * 0.99)
+            assert any(point_hash.startswith(cell) for cell in cells)
+
+
+def test_geohash_cover_too_large():
+    """Test that continental radii skip the geohash prefilter."""
+    assert geohash_cover(0.0, 0.0, 20000) == []
+
+
+def test_backfill_spatial_columns(db_session, sample_city_contractors):
+    """Test that rows without a geohash are backfilled by the migration."""
+    db_session.execute(text("UPDATE contractors SET geohash = NULL"))
+    db_session.commit()
+
+    with engine.begin() as connection:
+        assert backfill_spatial_columns(connection, batch_size=2) == len(sample_city_contractors)
+
+    for contractor in sample_city_contractors:
+        db_session.refresh(contractor)
+        assert contractor.geohash == encode_geohash(contractor.latitude, contractor.longitude)
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_get_contractors_radius_uses_spatial_index(client):
+    """Test that radius search returns exactly the rows within max_distance."""
+    response = client.get("/api/contractors?latitude=-34.5889&longitude=-58.4194&max_distance=3")
+    assert response.status_code == 200
+    names = [contractor["name"] for contractor in response.json()]
+    assert names == ["ElectroBA", "PlomeroExpress"]
+
+
+def test_backfill_unit_vector_columns(db_session, sample_city_contractors):
+    """Test that rows without unit vectors are backfilled by the migration."""
+    db_session.execute(text("UPDATE contractors SET unit_x = NULL, unit_y = NULL, unit_z = NULL"))
+    db_session.commit()
+
+    with engine.begin() as connection:
+        assert backfill_spatial_columns(connection, UNIT_VECTOR_COLUMNS) == len(
+            sample_city_contractors
+        )
+
+    for contractor in sample_city_contractors:
+        db_session.refresh(contractor)
+        assert (contractor.unit_x, contractor.unit_y, contractor.unit_z) == to_unit_vector(
+            contractor.latitude, contractor.longitude
+        )
+
+
+def test_nearby_filter_excludes_bounding_box_corners(db_session, sample_city_contractors):
+    """Test that the SQL dot-product filter drops rows inside the box but outside the radius."""
+    latitude, longitude = -34.5889, -58.4194
+    statement = select(Contractor.name).where(nearby_filter(latitude, longitude, 3))
+    names = set(db_session.scalars(statement))
+
+    expected = {
+        contractor.name
+        for contractor in sample_city_contractors
+        if calculate_distance(latitude, longitude, contractor.latitude, contractor.longitude) <= 3
+    }
+    assert names == expected
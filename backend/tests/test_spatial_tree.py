@@ -0,0 +1,159 @@
+import random
+
+import pytest
+
+from app.constants import Specialty
+from app.geo import calculate_distance
+from app.spatial_tree import ContractorTree
+
+
+def _random_rows(count, seed=42):
+    rng = random.Random(seed)
+    specialties = list(Specialty)
+    return [
+        (
+            contractor_id,
+            rng.randint(1, 3),
+            rng.choice(specialties),
+            rng.uniform(-35.0, -33.0),
+            rng.uniform(-59.0, -57.0),
+        )
+        for contractor_id in range(1, count + 1)
+    ]
+
+
+def _brute_force(rows, latitude, longitude, k, max_distance=None, city_id=None, specialty=None):
+    scored = sorted(
+        (calculate_distance(latitude, longitude, lat, lon), contractor_id)
+        for contractor_id, row_city, row_specialty, lat, lon in rows
+        if (city_id is None or row_city == city_id)
+        and (specialty is None or row_specialty == specialty)
+    )
+    if max_distance is not None:
+        scored = [item for item in scored if item[0] <= max_distance]
+    return scored[:k]
+
+
+def test_nearest_matches_brute_force():
+    """Test that tree top-k results equal a full sort of all candidates."""
+    rows = _random_rows(2000)
+    tree = ContractorTree()
+    tree.build(rows)
+
+    for latitude, longitude in [(-34.6, -58.4), (-33.1, -57.2), (-36.0, -60.0)]:
+        assert tree.nearest(latitude, longitude, 10) == _brute_force(rows, latitude, longitude, 10)
+
+
+def test_nearest_with_filters():
+    """Test that city, specialty and distance filters are applied during the search."""
+    rows = _random_rows(2000)
+    tree = ContractorTree()
+    tree.build(rows)
+
+    result = tree.nearest(-34.6, -58.4, 25, 40, city_id=2, specialty=Specialty.GAS)
+
+    assert result == _brute_force(rows, -34.6, -58.4, 25, 40, 2, Specialty.GAS)
+    assert all(distance <= 40 for distance, _ in result)
+
+
+def test_insert_is_searchable_and_rebuilds():
+    """Test that inserted points are found before and after the tree is rebuilt."""
+    rows = _random_rows(100)
+    tree = ContractorTree()
+    tree.build(rows)
+
+    tree.insert(1000, 1, Specialty.GAS, -34.6, -58.4)
+    assert tree.nearest(-34.6, -58.4, 1) == [(0.0, 1000)]
+
+    extra = [(2000 + i, 1, Specialty.CLEANING, -34.0, -58.0) for i in range(300)]
+    for row in extra:
+        tree.insert(*row)
+    assert len(tree) == 100 + 1 + 300
+    assert tree.nearest(-34.6, -58.4, 1) == [(0.0, 1000)]
+
+
+def test_rebuild_keeps_inserts_committed_after_the_load():
+    """Test that a rebuild keeps pending points missing from the loaded rows, and only those."""
+    rows = _random_rows(100)
+    tree = ContractorTree()
+    tree.build(rows)
+    tree.insert(101, 1, Specialty.GAS, -34.6, -58.4)
+    tree.insert(500, 1, Specialty.GAS, -34.61, -58.41)
+
+    tree.build([*rows, (101, 1, Specialty.GAS, -34.6, -58.4)])
+    assert len(tree) == 102
+    assert [contractor_id for _, contractor_id in tree.nearest(-34.6, -58.4, 2)] == [101, 500]
+
+
+def test_rebuild_keeps_inserts_committed_out_of_id_order():
+    """Test that a pending point with a lower id than the loaded rows survives a rebuild."""
+    rows = _random_rows(100)
+    tree = ContractorTree()
+    tree.build(rows[:49])
+    tree.insert(50, 1, Specialty.GAS, -34.6, -58.4)
+
+    tree.build([row for row in rows if row[0] != 50])
+    assert len(tree) == 100
+    assert tree.nearest(-34.6, -58.4, 1) == [(0.0, 50)]
+
+
+def test_rows_loaded_and_inserted_are_returned_once():
+    """Test that a point both read by a build and reported as inserted is stored once."""
+    rows = _random_rows(100)
+    tree = ContractorTree()
+    tree.build(rows[:99])
+    tree.insert(*rows[99])
+    tree.insert(*rows[99])
+    tree.build(rows)
+    tree.insert(*rows[99])
+
+    assert len(tree) == 100
+    latitude, longitude = rows[99][3], rows[99][4]
+    result = tree.nearest(latitude, longitude, 100)
+    assert len({contractor_id for _, contractor_id in result}) == len(result) == 100
+    assert result == _brute_force(rows, latitude, longitude, 100)
+
+
+def test_insert_before_load_is_ignored():
+    """Test that inserts are dropped until the tree is first built."""
+    tree = ContractorTree()
+    tree.insert(1, 1, Specialty.GAS, -34.6, -58.4)
+    assert not tree.loaded
+    assert len(tree) == 0
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_get_contractors_with_limit(client):
+    """Test that limit returns only the closest contractors, nearest first."""
+    response = client.get("/api/contractors?latitude=-34.5889&longitude=-58.4194&limit=2")
+    assert response.status_code == 200
+    data = response.json()
+    assert [contractor["name"] for contractor in data] == ["ElectroBA", "PlomeroExpress"]
+    assert data[0]["distance"] == 0.0
+
+
+def test_get_contractors_with_limit_sees_new_contractor(client, sample_city_contractors):
+    """Test that contractors created after the tree is built are returned."""
+    client.get("/api/contractors?latitude=-34.6037&longitude=-58.3816&limit=1")
+
+    new_contractor = {
+        "name": "Obelisco Electric",
+        "specialty": "electricity",
+        "location": "Centro",
+        "latitude": -34.6037,
+        "longitude": -58.3816,
+        "price_range": "$$",
+        "city_id": sample_city_contractors[0].city_id,
+    }
+    assert client.post("/api/contractors", json=new_contractor).status_code == 200
+
+    response = client.get("/api/contractors?latitude=-34.6037&longitude=-58.3816&limit=1")
+    assert [contractor["name"] for contractor in response.json()] == ["Obelisco Electric"]
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_get_contractors_limit_without_location(client):
+    """Test that limit without a location caps the number of results."""
+    response = client.get("/api/contractors?limit=3")
+    assert response.status_code == 200
+    assert len(response.json()) == 3
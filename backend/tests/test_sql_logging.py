@@ -0,0 +1,73 @@
+import json
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from app.sql_logging import SqlLogger, fingerprint
+from tests.conftest import engine
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(json.loads(self.format(record)))
+
+
+def _run(sql_logger, *statements):
+    handler = sql_logger.handler
+    sql_logger.install()
+    try:
+        with engine.connect() as connection:
+            for statement in statements:
+                connection.execute(text(statement))
+    finally:
+        sql_logger.uninstall()
+    return handler.lines
+
+
+def test_fingerprint_strips_literals_and_collapses_in_lists():
+    """Test that executions of the same query share a fingerprint."""
+    assert fingerprint("SELECT *  FROM t\n WHERE id IN (?, ?, ?) AND name = 'x'") == (
+        "SELECT * FROM t WHERE id IN (...) AND name = ?"
+    )
+    assert fingerprint("SELECT * FROM t WHERE id IN (%s, %s) LIMIT 10") == (
+        "SELECT * FROM t WHERE id IN (...) LIMIT ?"
+    )
+    assert fingerprint("UPDATE t SET a = :a_1 WHERE id = 7") == "UPDATE t SET a = ? WHERE id = ?"
+
+
+def test_all_mode_writes_structured_records():
+    """Test that records are JSON with fingerprint, duration and rows, and no parameters."""
+    lines = _run(SqlLogger("all", handler=_Collect()), "SELECT 1 WHERE 'secret' = 'secret'")
+
+    assert len(lines) == 1
+    record = lines[0]
+    assert record["fingerprint"] == "SELECT ? WHERE ? = ?"
+    assert record["operation"] == "SELECT"
+    assert record["duration_ms"] >= 0
+    assert "rows" in record
+    assert len(record["fingerprint_id"]) == 12
+    assert "secret" not in json.dumps(record)
+
+
+def test_slow_mode_only_logs_above_threshold():
+    """Test that slow mode skips statements under the threshold."""
+    assert _run(SqlLogger("slow", slow_ms=60_000, handler=_Collect()), "SELECT 1") == []
+    assert len(_run(SqlLogger("slow", slow_ms=0, handler=_Collect()), "SELECT 1")) == 1
+
+
+def test_sampled_mode_respects_rate():
+    """Test that sampling at the extremes logs nothing or everything."""
+    assert _run(SqlLogger("sampled", sample_rate=0.0, handler=_Collect()), "SELECT 1") == []
+    lines = _run(SqlLogger("sampled", sample_rate=1.0, handler=_Collect()), "SELECT 1", "SELECT 2")
+    assert len(lines) == 2
+
+
+def test_invalid_mode():
+    """Test that an unknown SQL_LOG_MODE is rejected."""
+    with pytest.raises(ValueError):
+        SqlLogger("verbose")
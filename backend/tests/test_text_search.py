@@ -0,0 +1,185 @@
+import pytest
+
+from app import search
+from app.constants import PriceRange, Specialty
+from app.models import Contractor
+from app.search import TextSearch, contractor_written
+from app.text_index import ContractorTextIndex, fold, tokenize
+from tests.test_pagination import _collect_pages
+
+ORIGIN = "latitude=-34.5889&longitude=-58.4194"
+
+ROWS = [
+    (1, 1, Specialty.PLUMBING, -34.60, -58.38, "Plomería São Jorge", "Urgencias 24/7"),
+    (2, 1, Specialty.PLUMBING, -34.61, -58.39, "Agua Viva", "Plomeros y gasistas 24/7"),
+    (3, 2, Specialty.GAS, -23.55, -46.63, "Gás Paulista", "Instalação de gás"),
+]
+
+
+def _index(rows=ROWS) -> ContractorTextIndex:
+    index = ContractorTextIndex()
+    index.build(rows)
+    return index
+
+
+def _ids(matches) -> list[int]:
+    return [int(i) for _, i in sorted(zip(-matches.scores, matches.ids, strict=True))]
+
+
+def test_fold_and_tokenize():
+    """Test that accents and case are folded and tokens like 24/7 are kept whole."""
+    assert fold("Construção PEÑA") == "construcao pena"
+    assert tokenize("Plomería 24/7, São-Paulo!") == ["plomeria", "24/7", "sao", "paulo"]
+
+
+def test_search_requires_every_word_and_folds_accents():
+    """Test that all query words must match, with or without accents."""
+    index = _index()
+
+    assert _ids(index.search("plomeria")) == [1]
+    assert _ids(index.search("PLOMERÍA sao")) == [1]
+    assert sorted(_ids(index.search("24/7"))) == [1, 2]
+    assert _ids(index.search("gas instalacao")) == [3]
+    assert len(index.search("plomeria paulista")) == 0
+
+
+def test_last_word_matches_as_prefix():
+    """Test that the last query word also matches longer words, for type-ahead."""
+    index = _index()
+
+    assert _ids(index.search("plom")) == [1, 2]
+    assert len(index.search("plom gas")) == 0
+
+
+def test_name_matches_rank_first_and_filters_apply():
+    """Test that name matches outrank description matches and filters narrow matches."""
+    index = _index()
+
+    assert _ids(index.search("gas")) == [3, 2]
+    assert _ids(index.search("gas", city_id=1)) == [2]
+    assert _ids(index.search("gas", specialty=Specialty.GAS)) == [3]
+
+
+def test_inserts_are_searchable_and_merged(monkeypatch):
+    """Test that inserted contractors are found before and after being merged."""
+    index = _index()
+    index.insert(4, 1, Specialty.CLEANING, -34.6, -58.4, "Limpieza Total", "Plomería no")
+    assert _ids(index.search("limpieza")) == [4]
+    assert _ids(index.search("plomeria")) == [1, 4]
+
+    monkeypatch.setattr("app.text_index.MIN_MERGE_PENDING", 2)
+    index.insert(5, 1, Specialty.CLEANING, -34.6, -58.4, "Limpieza Rápida", None)
+    assert len(index) == 5
+    assert index._snapshot[1] is None
+    assert _ids(index.search("limpieza rapida")) == [5]
+    assert sorted(_ids(index.search("limp"))) == [4, 5]
+
+
+def test_rebuild_keeps_inserts_committed_after_the_load():
+    """Test that a rebuild keeps recent documents missing from the loaded rows."""
+    index = _index()
+    index.insert(3, 2, Specialty.GAS, -23.55, -46.63, "Gás Paulista", None)
+    index.insert(9, 1, Specialty.CLEANING, -34.6, -58.4, "Limpieza Total", None)
+
+    index.build(ROWS)
+    assert len(index) == 4
+    assert _ids(index.search("limpieza")) == [9]
+    assert _ids(index.search("paulista")) == [3]
+
+
+def test_rebuild_keeps_inserts_committed_out_of_id_order():
+    """Test that a recent document with a lower id than the loaded rows survives a rebuild."""
+    index = _index([ROWS[0], ROWS[2]])
+    index.insert(*ROWS[1])
+
+    index.build([ROWS[0], ROWS[2]])
+    assert len(index) == 3
+    assert _ids(index.search("agua")) == [2]
+
+
+def test_rows_loaded_and_inserted_are_indexed_once():
+    """Test that a contractor both read by a build and reported as inserted is indexed once."""
+    index = _index(ROWS[:2])
+    index.insert(*ROWS[2])
+    index.insert(*ROWS[2])
+    index.build(ROWS)
+    index.insert(*ROWS[2])
+
+    assert len(index) == 3
+    assert _ids(index.search("paulista")) == [3]
+    assert _ids(index.search("gas")) == [3, 2]
+
+
+def test_q_search_ranks_by_relevance(client, sample_city_contractors):
+    """Test that q= returns matching contractors by relevance, without distances."""
+    response = client.get("/api/contractors?q=plomeria")
+    assert response.status_code == 200
+    assert [row["name"] for row in response.json()] == ["PlomeroExpress"]
+
+    response = client.get("/api/contractors?q=CONSTRUCCION&fields=name")
+    assert response.json() == [
+        {"id": sample_city_contractors[3].id, "name": "Constructora del Sur"}
+    ]
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_q_search_with_location_and_distance_sort(client):
+    """Test that q= combines with a location, max_distance and sort=distance."""
+    everything = client.get(f"/api/contractors?{ORIGIN}").json()
+    distances = {row["id"]: row["distance"] for row in everything}
+
+    response = client.get(f"/api/contractors?q=de&{ORIGIN}&sort=distance")
+    rows = response.json()
+    assert [row["id"] for row in rows] == [row["id"] for row in everything]
+    assert all(row["distance"] == distances[row["id"]] for row in rows)
+
+    response = client.get(f"/api/contractors?q=de&{ORIGIN}&max_distance=3&sort=distance&limit=1")
+    assert [row["name"] for row in response.json()] == ["ElectroBA"]
+
+
+def test_q_search_pages_and_index_updates(client, db_session, sample_city_contractors):
+    """Test that q= results paginate and include contractors written afterwards."""
+    assert len(client.get("/api/contractors?q=de").json()) == 4
+    contractor = Contractor(
+        name="Plomería del Centro",
+        specialty=Specialty.PLUMBING,
+        location="Microcentro",
+        latitude=-34.6037,
+        longitude=-58.3816,
+        price_range=PriceRange.LOW,
+        description="Destapaciones",
+        city_id=sample_city_contractors[0].city_id,
+    )
+    db_session.add(contractor)
+    db_session.commit()
+    contractor_written(contractor)
+
+    pages = _collect_pages(client, "/api/contractors?q=de&page_size=2")
+    ids = [row["id"] for page in pages for row in page]
+    assert len(pages) == 3
+    assert contractor.id in ids
+    assert len(ids) == len(set(ids)) == 5
+    assert [row["name"] for row in client.get("/api/contractors?q=plomeria").json()] == [
+        "Plomería del Centro",
+        "PlomeroExpress",
+    ]
+
+
+@pytest.mark.usefixtures("sample_city_contractors")
+def test_q_search_rejects_invalid_parameters(client):
+    """Test that empty queries and distance sorts without a location are rejected."""
+    assert client.get("/api/contractors?q=%20!!").status_code == 400
+    assert client.get("/api/contractors?q=gas&sort=distance").status_code == 400
+
+
+def test_q_search_loads_unpaged_matches_in_chunks(client, sample_city_contractors, monkeypatch):
+    """Test that an unpaged q= search loads its rows through bounded IN lists."""
+    monkeypatch.setattr(search, "BY_IDS_CHUNK_SIZE", 3)
+    rows = client.get("/api/contractors?q=de").json()
+    assert sorted(row["id"] for row in rows) == sorted(c.id for c in sample_city_contractors)
+
+
+def test_text_search_keeps_the_exact_origin():
+    """Test that uncached text searches measure distances from the requested coordinates."""
+    text_search = TextSearch("gas", -34.58894321, -58.41943219, None, None, None, None)
+    assert (text_search.latitude, text_search.longitude) == (-34.58894321, -58.41943219)